@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Blender Python Script: Persistent Generation Worker
+===================================================
+Loads Blender, generate-pen-models.py and create-button-animations.py once and then
+runs generation jobs sent as JSON lines, resetting the scene between jobs. Repeated
+small jobs skip Blender startup, add-on registration and Python imports.
+
+Run with:
+    blender --background --factory-startup --python blender-worker.py
+    blender --background --factory-startup --python blender-worker.py -- --socket /tmp/blender-worker.sock
+
+Without --socket, jobs are read from stdin and responses written to stdout, one JSON
+object per line; everything Blender and the generators print goes to stderr instead.
+With --socket, the worker listens on a Unix socket and serves one connection at a
+time, each carrying any number of job lines.
+
+Jobs:
+    {"job": "pen", "pen": "stylus"}                      Build a pen and export its GLB
+    {"job": "pen", "pen": "fountain", "export": false}   Build a pen only
+    {"job": "animation", "animation": "icon-morph"}      Render frames and write Lottie JSON
+    {"job": "animation", "animation": "icon-morph", "profile": "preview", "frames": [10, 20]}
+                                                         Render frames 10-20 only
+    {"job": "ping"}                                      Report uptime and jobs run
+    {"job": "shutdown"}                                  Stop the worker
+
+Any job may carry an "id", echoed in its response:
+    {"id": ..., "ok": true, "seconds": 1.2, "result": {...}, "memory": {...}}
+    {"id": ..., "ok": false, "error": "..."}
+
+Pen and animation responses carry datablock counts and RSS from before the job and
+after the scene reset. A "warning" is added when datablocks survive the reset or RSS
+has grown by more than RSS_DRIFT_WARNING since the first job. If the reset itself
+fails, the response carries "reset_error" and "restart": true, and the worker stops
+taking jobs and exits with RESTART_EXIT_STATUS so its supervisor starts a fresh one.
+
+With BLENDER_TRACE set, each job is also a span in the trace (pipeline_trace.py) shared
+with the generators' bpy.ops calls and stages.
+"""
+
+import bpy
+import argparse
+import importlib.util
+import json
+import os
+import resource
+import socket
+import sys
+import time
+import traceback
+
+try:
+    import psutil
+except ImportError:  # Optional, the current RSS is read from /proc where available
+    psutil = None
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SCRIPT_DIR)
+from pipeline_trace import TRACER  # noqa: E402
+
+# Datablock collections counted around every job
+DATABLOCK_TYPES = ("objects", "meshes", "curves", "materials", "node_groups", "textures", "images",
+                   "lights", "cameras", "actions", "worlds", "collections")
+# RSS growth since the first job that is reported as a likely leak
+RSS_DRIFT_WARNING = 256 * 1024 * 1024
+# Exit status when a failed scene reset leaves the session unfit for more jobs (EX_TEMPFAIL)
+RESTART_EXIT_STATUS = 75
+
+
+def load_script(filename, module_name):
+    """Import one of the generator scripts as a module, without running its main()."""
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(SCRIPT_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def rss_bytes():
+    """Resident set size of this process (the peak where the current size is unavailable)."""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def memory_snapshot():
+    """Datablock counts per collection and the process RSS."""
+    return {
+        "rss": rss_bytes(),
+        "datablocks": {name: len(getattr(bpy.data, name)) for name in DATABLOCK_TYPES},
+    }
+
+
+class Worker:
+    """Runs jobs against the loaded generator modules and resets the scene after each."""
+
+    def __init__(self):
+        self.pens = load_script("generate-pen-models.py", "generate_pen_models")
+        self.animations = load_script("create-button-animations.py", "create_button_animations")
+        self.started = time.perf_counter()
+        self.jobs = 0
+        self.running = True
+        self.needs_restart = False
+        self.baseline_rss = None
+
+    def run_pen(self, job):
+        name = job["pen"]
+        if name not in self.pens.PENS:
+            raise ValueError(f"Unknown pen {name!r}; expected one of {sorted(self.pens.PENS)}")
+        path = self.pens.generate_pen(name, job.get("output_dir"), job.get("export", True))
+        return {"pen": name, "path": path if job.get("export", True) else None}
+
+    def run_animation(self, job):
+        animations = self.animations
+        name = job["animation"]
+        profile = job.get("profile", animations.DEFAULT_RENDER_PROFILE)
+        if name not in animations.ANIMATIONS:
+            raise ValueError(f"Unknown animation {name!r}; expected one of {sorted(animations.ANIMATIONS)}")
+        if profile not in animations.RENDER_PROFILES:
+            raise ValueError(f"Unknown profile {profile!r}")
+        os.makedirs(animations.OUTPUT_DIR, exist_ok=True)
+
+        if "frames" not in job:
+            animations.create_animation(name, profile)
+            return {"animation": name, "profile": profile, "frames_dir": animations.frames_dir_for(name, profile),
+                    "lottie": os.path.join(animations.OUTPUT_DIR, f"{name}.json")}
+
+        frame_count = animations.build_spec_scene(animations.ANIMATIONS[name], profile)
+        first, last = job["frames"]
+        if not 1 <= first <= last <= frame_count:
+            raise ValueError(f"{name} has frames 1-{frame_count}, got {first}-{last}")
+        frames_dir = job.get("output_dir", animations.frames_dir_for(name, profile))
+        os.makedirs(frames_dir, exist_ok=True)
+        animations.render_frames_individually(frame_count, frames_dir, frames=range(first, last + 1))
+        return {"animation": name, "profile": profile, "frames_dir": frames_dir, "frames": [first, last]}
+
+    def reset(self, job):
+        """Tear down what a job built, with the clear_scene of the script it used."""
+        module = self.pens if job.get("job") == "pen" else self.animations
+        module.clear_scene()
+
+    def account(self, response, before):
+        """Add before/after memory to a job's response and warn about anything the reset left behind."""
+        after = memory_snapshot()
+        if self.baseline_rss is None:
+            self.baseline_rss = after["rss"]
+        leaked = {name: after["datablocks"][name] - count for name, count in before["datablocks"].items()
+                  if after["datablocks"][name] > count}
+        drift = after["rss"] - self.baseline_rss
+        response["memory"] = {"before": before, "after": after, "leaked": leaked, "rss_drift": drift}
+
+        warnings = []
+        if leaked:
+            warnings.append("datablocks left after reset: " + ", ".join(f"{n} +{c}" for n, c in leaked.items()))
+        if drift > RSS_DRIFT_WARNING:
+            warnings.append(f"RSS grew {drift // (1024 * 1024)} MB since the first job")
+        if warnings:
+            response["warning"] = "; ".join(warnings)
+            print(f"Warning: job {response.get('id')} {response['warning']}", file=sys.stderr)
+
+    def run(self, job):
+        """Run one job and return its response."""
+        response = {"id": job.get("id")}
+        started = time.perf_counter()
+        kind = job.get("job")
+        before = memory_snapshot() if kind in ("pen", "animation") else None
+        trace_start = time.perf_counter_ns()
+        try:
+            if kind == "ping":
+                result = {"uptime": round(time.perf_counter() - self.started, 1), "jobs": self.jobs,
+                          "memory": memory_snapshot()}
+            elif kind == "shutdown":
+                self.running = False
+                result = {"jobs": self.jobs}
+            elif kind == "pen":
+                result = self.run_pen(job)
+            elif kind == "animation":
+                result = self.run_animation(job)
+            else:
+                raise ValueError(f"Unknown job type {kind!r}")
+            response.update(ok=True, result=result)
+        except Exception as e:
+            traceback.print_exc()
+            response.update(ok=False, error=f"{type(e).__name__}: {e}")
+        finally:
+            if before is not None:
+                self.jobs += 1
+                try:
+                    self.reset(job)
+                except Exception as e:
+                    # Whatever the job left in the scene would leak into the next one
+                    traceback.print_exc()
+                    response.update(reset_error=f"{type(e).__name__}: {e}", restart=True)
+                    self.needs_restart = True
+                    self.running = False
+                self.account(response, before)
+        response["seconds"] = round(time.perf_counter() - started, 3)
+        if TRACER is not None:
+            TRACER.record(f"job {kind}", "job", trace_start, {"id": job.get("id"), "ok": response["ok"]})
+        return response
+
+    def serve_lines(self, lines, respond):
+        """Run the job on each JSON line and respond to it, until input ends or a shutdown job."""
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                job = json.loads(line)
+            except json.JSONDecodeError as e:
+                respond({"ok": False, "error": f"Invalid JSON: {e}"})
+                continue
+            respond(self.run(job))
+            if not self.running:
+                return
+
+
+def serve_stdin(worker):
+    """Serve jobs from stdin, keeping stdout for responses only."""
+    responses = os.fdopen(os.dup(1), 'w', buffering=1)
+    os.dup2(2, 1)  # Blender's own render logs and the generators' prints go to stderr
+    sys.stdout = sys.stderr
+
+    def respond(response):
+        responses.write(json.dumps(response) + "\n")
+
+    respond({"ok": True, "result": {"ready": True, "pid": os.getpid()}})
+    worker.serve_lines(sys.stdin, respond)
+
+
+def serve_socket(worker, path):
+    """Serve jobs over a Unix socket, one connection at a time."""
+    if os.path.exists(path):
+        os.unlink(path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(1)
+    print(f"Worker listening on {path}")
+    try:
+        while worker.running:
+            connection, _ = server.accept()
+            # Separate files: writing to a read/write text file drops what it has read ahead
+            with connection, connection.makefile('r') as reader, connection.makefile('w', buffering=1) as writer:
+                def respond(response):
+                    writer.write(json.dumps(response) + "\n")
+                worker.serve_lines(reader, respond)
+    finally:
+        server.close()
+        os.unlink(path)
+
+
+def main():
+    """Load the generators once and serve jobs until shut down."""
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(description="Run pen and button animation jobs in one Blender session.")
+    parser.add_argument("--socket", help="Listen on this Unix socket path instead of stdin")
+    args = parser.parse_args(argv)
+
+    worker = Worker()
+    if args.socket:
+        serve_socket(worker, args.socket)
+    else:
+        serve_stdin(worker)
+    if worker.needs_restart:
+        sys.exit(RESTART_EXIT_STATUS)
+
+
+if __name__ == "__main__":
+    main()
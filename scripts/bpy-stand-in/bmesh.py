@@ -0,0 +1,10 @@
+"""
+Dry-run stand-in for bmesh
+==========================
+generate-pen-models.py imports bmesh but builds its meshes with operators, so the
+dry run only needs the module to exist. Mesh editing itself needs Blender.
+"""
+
+
+def new(use_operators=True):
+    raise NotImplementedError("bmesh editing needs Blender; the dry run only records operators")
@@ -0,0 +1,1680 @@
+"""
+Dry-run stand-in for bpy
+========================
+A recording imitation of the part of Blender's Python API that
+generate-pen-models.py and create-button-animations.py use, so both generators run
+in plain Python, in milliseconds, without a Blender install. Put this directory
+first on sys.path (dry-run.py does) and the scripts' `import bpy` picks it up.
+
+Nothing is really rendered or exported. Instead every bpy.ops call is logged, and
+renders and glTF exports are recorded as outputs, each with a snapshot of the
+scene: objects with their transforms, bounds and modifiers, materials with their
+node settings and links, and keyframes. Renders write blank placeholder images at
+the output resolution wherever Blender would write files, so the stages that read
+frames back run too. plan() returns the lot as plain JSON and reset() starts a
+fresh session, e.g. between tests.
+
+What is modelled:
+    - Datablocks (objects, meshes, curves, materials, lights, cameras, actions,
+      images), with Blender's ".001" name deduplication and user counts
+    - Shader node trees with the sockets of the node types the scripts build
+    - Keyframes and F-curves, evaluated with BEZIER (auto-clamped handles), LINEAR
+      and CONSTANT interpolation, so F-curve sampling and the Lottie export work
+    - Object transforms and local bounding boxes, kept through transform_apply,
+      join, origin_set and convert
+    - Render handlers, called around each simulated frame
+    - Rendered frames and stills as 8-bit PNG (or OpenEXR), transparent with film
+      transparency and opaque black without
+    - The compositor: Render Layers outputs (light groups included), File Output
+      slots written per frame as 32-bit OpenEXR, and the Viewer Node image
+    - Images with integer size and float pixels: images.load reads 8-bit PNGs and
+      the uncompressed OpenEXR files written here, and save_render writes them
+
+Pixels are placeholders: comparisons between renders always match, and passes other
+than Image are black. Only the file formats above can be read back.
+"""
+
+import math
+import numbers
+import os
+import struct
+import zlib
+
+import numpy as np
+
+from mathutils import Vector, Matrix
+
+PLAN = {"operations": [], "outputs": []}
+
+RENDER_ENGINES = ('BLENDER_EEVEE_NEXT', 'BLENDER_WORKBENCH', 'CYCLES')
+IMAGE_EXTENSIONS = {'PNG': ".png", 'JPEG': ".jpg", 'OPEN_EXR': ".exr", 'OPEN_EXR_MULTILAYER': ".exr",
+                    'WEBP': ".webp", 'TIFF': ".tif"}
+
+# bl_idname -> (node type, default name, inputs as (name, default value), output names).
+# Shader sockets have no default value.
+NODE_TYPES = {
+    'ShaderNodeBsdfPrincipled': ('BSDF_PRINCIPLED', "Principled BSDF", [
+        ("Base Color", (0.8, 0.8, 0.8, 1.0)), ("Metallic", 0.0), ("Roughness", 0.5), ("IOR", 1.5),
+        ("Alpha", 1.0), ("Normal", (0.0, 0.0, 0.0)), ("Specular IOR Level", 0.5),
+        ("Specular Tint", (1.0, 1.0, 1.0, 1.0)), ("Coat Weight", 0.0), ("Sheen Weight", 0.0),
+        ("Emission Color", (1.0, 1.0, 1.0, 1.0)), ("Emission Strength", 0.0), ("Transmission Weight", 0.0),
+    ], ["BSDF"]),
+    'ShaderNodeOutputMaterial': ('OUTPUT_MATERIAL', "Material Output", [
+        ("Surface", None), ("Volume", None), ("Displacement", (0.0, 0.0, 0.0)),
+    ], []),
+    'ShaderNodeMixShader': ('MIX_SHADER', "Mix Shader", [("Fac", 0.5), ("Shader", None), ("Shader", None)],
+                            ["Shader"]),
+    'ShaderNodeBsdfGlass': ('BSDF_GLASS', "Glass BSDF", [
+        ("Color", (1.0, 1.0, 1.0, 1.0)), ("Roughness", 0.0), ("IOR", 1.5), ("Normal", (0.0, 0.0, 0.0)),
+    ], ["BSDF"]),
+    'ShaderNodeEmission': ('EMISSION', "Emission", [("Color", (1.0, 1.0, 1.0, 1.0)), ("Strength", 1.0)],
+                           ["Emission"]),
+    'ShaderNodeTexGradient': ('TEX_GRADIENT', "Gradient Texture", [("Vector", (0.0, 0.0, 0.0))],
+                              ["Color", "Fac"]),
+    'ShaderNodeMapping': ('MAPPING', "Mapping", [
+        ("Vector", (0.0, 0.0, 0.0)), ("Location", (0.0, 0.0, 0.0)), ("Rotation", (0.0, 0.0, 0.0)),
+        ("Scale", (1.0, 1.0, 1.0)),
+    ], ["Vector"]),
+    'ShaderNodeTexCoord': ('TEX_COORD', "Texture Coordinate", [],
+                           ["Generated", "Normal", "UV", "Object", "Camera", "Window", "Reflection"]),
+    'ShaderNodeValToRGB': ('VALTORGB', "Color Ramp", [("Fac", 0.5)], ["Color", "Alpha"]),
+    'CompositorNodeRLayers': ('R_LAYERS', "Render Layers", [],
+                              ["Image", "Alpha", "Depth", "Normal", "Vector", "Emit", "IndexMA"]),
+    'CompositorNodeComposite': ('COMPOSITE', "Composite", [("Image", None)], []),
+    'CompositorNodeViewer': ('VIEWER', "Viewer", [("Image", None)], []),
+    'CompositorNodePremulKey': ('PREMULKEY', "Alpha Convert", [("Image", None)], ["Image"]),
+    'CompositorNodeConvertColorSpace': ('CONVERT_COLORSPACE', "Convert Colorspace", [("Image", None)], ["Image"]),
+    'CompositorNodeOutputFile': ('OUTPUT_FILE', "File Output", [], []),
+}
+
+
+def _coerce(value):
+    """Store non-empty numeric sequences as Vectors, like Blender's array properties."""
+    if isinstance(value, np.ndarray):
+        value = value.tolist()
+    if (isinstance(value, (tuple, list)) and not isinstance(value, Vector) and value
+            and all(isinstance(v, numbers.Real) and not isinstance(v, bool) for v in value)):
+        return Vector(value)
+    return value
+
+
+def _plain(value):
+    """Convert a property value to plain JSON: datablocks by name, floats rounded."""
+    if isinstance(value, ID):
+        return value.name
+    if isinstance(value, Struct):
+        return _properties(value)
+    if isinstance(value, dict):
+        return {str(k): _plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [_plain(v) for v in value]
+    if isinstance(value, (bool, str)) or value is None:
+        return value
+    if hasattr(value, "__iter__"):
+        return [_plain(v) for v in value]
+    if isinstance(value, numbers.Integral):
+        return int(value)
+    if isinstance(value, numbers.Real):
+        return round(float(value), 6) + 0.0
+    return repr(value)
+
+
+def _properties(struct):
+    """A struct's public properties as plain JSON."""
+    return {name: _plain(value) for name, value in vars(struct).items() if not name.startswith("_")}
+
+
+# ---------------------------------------------------------------------------
+# Image files
+# ---------------------------------------------------------------------------
+
+def _srgb_encode(linear):
+    """Linear to sRGB-encoded values, as the Standard view transform writes them."""
+    linear = np.clip(linear, 0.0, 1.0)
+    return np.where(linear <= 0.0031308, linear * 12.92, 1.055 * linear ** (1 / 2.4) - 0.055)
+
+
+def _png_chunk(tag, payload):
+    return struct.pack(">I", len(payload)) + tag + payload + struct.pack(">I", zlib.crc32(tag + payload))
+
+
+def write_png(path, pixels):
+    """Write top-down float RGBA (0-1) as an 8-bit RGBA PNG."""
+    height, width = pixels.shape[:2]
+    rows = np.round(np.clip(pixels, 0.0, 1.0) * 255).astype(np.uint8).reshape(height, width * 4)
+    raw = np.concatenate([np.zeros((height, 1), dtype=np.uint8), rows], axis=1).tobytes()
+    with open(path, 'wb') as f:
+        f.write(b"\x89PNG\r\n\x1a\n" + _png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0))
+                + _png_chunk(b"IDAT", zlib.compress(raw)) + _png_chunk(b"IEND", b""))
+
+
+def read_png(path):
+    """Read an 8-bit, non-interlaced PNG as top-down float RGBA (0-1)."""
+    with open(path, 'rb') as f:
+        contents = f.read()
+    chunks, offset, compressed = {}, 8, b""
+    while offset < len(contents):
+        length, tag = struct.unpack(">I4s", contents[offset:offset + 8])
+        payload = contents[offset + 8:offset + 8 + length]
+        if tag == b"IDAT":
+            compressed += payload
+        else:
+            chunks[tag] = payload
+        offset += 12 + length
+    width, height, depth, color_type, _, _, interlace = struct.unpack(">IIBBBBB", chunks[b"IHDR"])
+    if depth != 8 or interlace:
+        raise RuntimeError(f'Error: Cannot read image file "{path}": only 8-bit non-interlaced PNGs are supported')
+    channels = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}[color_type]
+    stride = width * channels
+    raw = zlib.decompress(compressed)
+    rows = np.zeros((height, stride), dtype=np.uint8)
+    previous = bytearray(stride)
+    for y in range(height):
+        start = y * (stride + 1)
+        filter_type, line = raw[start], bytearray(raw[start + 1:start + 1 + stride])
+        if filter_type == 2:
+            line = bytearray((a + b) & 0xff for a, b in zip(line, previous))
+        elif filter_type in (1, 3, 4):
+            for x in range(stride):
+                left = line[x - channels] if x >= channels else 0
+                up = previous[x]
+                if filter_type == 1:
+                    predictor = left
+                elif filter_type == 3:
+                    predictor = (left + up) >> 1
+                else:
+                    up_left = previous[x - channels] if x >= channels else 0
+                    estimate = left + up - up_left
+                    pa, pb, pc = abs(estimate - left), abs(estimate - up), abs(estimate - up_left)
+                    predictor = left if pa <= pb and pa <= pc else up if pb <= pc else up_left
+                line[x] = (line[x] + predictor) & 0xff
+        rows[y] = np.frombuffer(bytes(line), dtype=np.uint8)
+        previous = line
+    values = rows.reshape(height, width, channels)
+    if color_type == 3:
+        palette = np.frombuffer(chunks[b"PLTE"], dtype=np.uint8).reshape(-1, 3)
+        alpha = np.full(len(palette), 255, dtype=np.uint8)
+        transparency = np.frombuffer(chunks.get(b"tRNS", b""), dtype=np.uint8)
+        alpha[:len(transparency)] = transparency
+        values = np.concatenate([palette, alpha[:, None]], axis=1)[values[..., 0]]
+    elif channels < 3:
+        gray = np.repeat(values[..., :1], 3, axis=2)
+        values = np.concatenate([gray, values[..., 1:]], axis=2) if channels == 2 else gray
+    if values.shape[2] == 3:
+        values = np.concatenate([values, np.full((height, width, 1), 255, dtype=np.uint8)], axis=2)
+    return values.astype(np.float32) / 255
+
+
+def _exr_attribute(name, kind, payload):
+    return name.encode() + b"\0" + kind.encode() + b"\0" + struct.pack("<i", len(payload)) + payload
+
+
+def write_exr(path, pixels):
+    """Write top-down float RGBA as an uncompressed 32-bit float scanline OpenEXR file."""
+    height, width = pixels.shape[:2]
+    # FLOAT (2) channels sampled at every pixel, in the alphabetical order EXR stores them
+    channels = b"".join(name + b"\0" + struct.pack("<iBBBBii", 2, 0, 0, 0, 0, 1, 1)
+                        for name in (b"A", b"B", b"G", b"R"))
+    window = struct.pack("<iiii", 0, 0, width - 1, height - 1)
+    header = b"".join([
+        struct.pack("<ii", 20000630, 2),
+        _exr_attribute("channels", "chlist", channels + b"\0"),
+        _exr_attribute("compression", "compression", b"\0"),
+        _exr_attribute("dataWindow", "box2i", window),
+        _exr_attribute("displayWindow", "box2i", window),
+        _exr_attribute("lineOrder", "lineOrder", b"\0"),
+        _exr_attribute("pixelAspectRatio", "float", struct.pack("<f", 1.0)),
+        _exr_attribute("screenWindowCenter", "v2f", struct.pack("<ff", 0.0, 0.0)),
+        _exr_attribute("screenWindowWidth", "float", struct.pack("<f", 1.0)),
+        b"\0",
+    ])
+    line_size = width * 4 * 4
+    first_line = len(header) + height * 8
+    offsets = struct.pack(f"<{height}Q", *(first_line + y * (8 + line_size) for y in range(height)))
+    planar = np.ascontiguousarray(pixels[..., [3, 2, 1, 0]].transpose(0, 2, 1), dtype="<f4")  # A, B, G, R planes
+    with open(path, 'wb') as f:
+        f.write(header + offsets)
+        for y in range(height):
+            f.write(struct.pack("<ii", y, line_size) + planar[y].tobytes())
+
+
+def read_exr(path):
+    """Read an uncompressed 32-bit float RGBA OpenEXR file, as write_exr writes them, top-down."""
+    with open(path, 'rb') as f:
+        contents = f.read()
+    if struct.unpack("<i", contents[:4])[0] != 20000630:
+        raise RuntimeError(f'Error: Cannot read image file "{path}": not an OpenEXR file')
+    offset, attributes = 8, {}
+    while contents[offset] != 0:
+        name_end = contents.index(b"\0", offset)
+        kind_end = contents.index(b"\0", name_end + 1)
+        size = struct.unpack("<i", contents[kind_end + 1:kind_end + 5])[0]
+        attributes[contents[offset:name_end].decode()] = contents[kind_end + 5:kind_end + 5 + size]
+        offset = kind_end + 5 + size
+    if attributes["compression"] != b"\0":
+        raise RuntimeError(f'Error: Cannot read image file "{path}": only uncompressed OpenEXR is supported')
+    x0, y0, x1, y1 = struct.unpack("<iiii", attributes["dataWindow"])
+    width, height = x1 - x0 + 1, y1 - y0 + 1
+    data_start = offset + 1 + height * 8
+    line_size = width * 4 * 4
+    planar = np.stack([
+        np.frombuffer(contents, dtype="<f4", count=width * 4, offset=data_start + y * (8 + line_size) + 8)
+        for y in range(height)
+    ]).reshape(height, 4, width)
+    return planar.transpose(0, 2, 1)[..., [3, 2, 1, 0]].astype(np.float32)  # A, B, G, R back to RGBA
+
+
+# ---------------------------------------------------------------------------
+# Structs and datablocks
+# ---------------------------------------------------------------------------
+
+class Struct:
+    """An RNA struct: free-form properties that can be keyframed on their datablock."""
+
+    def __init__(self, **properties):
+        for name, value in properties.items():
+            setattr(self, name, value)
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, _coerce(value))
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {getattr(self, 'name', '')}>"
+
+    @property
+    def id_data(self):
+        raise AttributeError(f"{type(self).__name__} is not part of a datablock")
+
+    def path_from_id(self, attribute=""):
+        raise ValueError(f"{type(self).__name__}.path_from_id() does not support path creation")
+
+    def keyframe_insert(self, data_path, index=-1, frame=None, **kwargs):
+        """Key the current value of a property, every component of a vector when index is -1."""
+        value = getattr(self, data_path)
+        frame = context.scene.frame_current if frame is None else frame
+        id_data = self.id_data
+        action = id_data.animation_data_create().action
+        if action is None:
+            action = id_data.animation_data.action = data.actions.new(f"{id_data.name}Action")
+        path = self.path_from_id(data_path)
+        indices = range(len(value)) if isinstance(value, Vector) and index < 0 else [max(index, 0)]
+        for i in indices:
+            fcurve = action.fcurves.find(path, index=i) or action.fcurves.new(path, index=i)
+            fcurve.keyframe_points.insert(frame, value[i] if isinstance(value, Vector) else value)
+        return True
+
+
+class ID(Struct):
+    """A datablock, named uniquely within its bpy.data collection."""
+
+    def __init__(self, name, collection=None):
+        self._collection = collection
+        self.name = name
+        self.animation_data = None
+        self.use_fake_user = False
+
+    @property
+    def name(self):
+        return self._name
+
+    @name.setter
+    def name(self, value):
+        self._name = self._collection.unique_name(value, self) if self._collection is not None else value
+
+    @property
+    def id_data(self):
+        return self
+
+    @property
+    def users(self):
+        return _users(self)
+
+    def path_from_id(self, attribute=""):
+        return attribute
+
+    def animation_data_create(self):
+        if self.animation_data is None:
+            self.animation_data = AnimData(action=None)
+        return self.animation_data
+
+
+class IDCollection:
+    """A bpy.data collection of one datablock type."""
+
+    def __init__(self, id_type):
+        self._type = id_type
+        self._items = []
+
+    def __iter__(self):
+        return iter(list(self._items))  # Safe to remove items while iterating
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items or any(item.name == key for item in self._items)
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return self._items[key]
+        item = self.get(key)
+        if item is None:
+            raise KeyError(f'bpy_prop_collection[key]: key "{key}" not found')
+        return item
+
+    def get(self, name, default=None):
+        return next((item for item in self._items if item.name == name), default)
+
+    def keys(self):
+        return [item.name for item in self._items]
+
+    def values(self):
+        return list(self._items)
+
+    def unique_name(self, name, item):
+        """Blender's deduplication: a taken name gets the first free .001-style suffix."""
+        taken = {other.name for other in self._items if other is not item}
+        if name not in taken:
+            return name
+        base = name.rsplit(".", 1)[0] if name[-4:-3] == "." and name[-3:].isdigit() else name
+        return next(f"{base}.{n:03d}" for n in range(1, 1000) if f"{base}.{n:03d}" not in taken)
+
+    def new(self, name, *args, **kwargs):
+        item = self._type(name, self, *args, **kwargs)
+        self._items.append(item)
+        return item
+
+    def remove(self, item, do_unlink=True, **kwargs):
+        if not isinstance(item, self._type):
+            raise TypeError(f"expected a {self._type.__name__} type, not {type(item).__name__}")
+        self._items.remove(item)
+        item._collection = None
+        if isinstance(item, Material):
+            for owner in (*data.meshes, *data.curves):
+                owner.materials[:] = [None if slot is item else slot for slot in owner.materials]
+        elif isinstance(item, Object) and context.view_layer.objects.active is item:
+            context.view_layer.objects.active = None
+
+
+class AnimData(Struct):
+    """An ID's animation data, holding its action."""
+
+
+class Keyframe(Struct):
+    """One F-curve keyframe: co is (frame, value)."""
+
+    def __init__(self, frame=0.0, value=0.0):
+        super().__init__(co=(frame, value), handle_left=(frame, value), handle_right=(frame, value),
+                         interpolation='BEZIER', handle_left_type='AUTO_CLAMPED',
+                         handle_right_type='AUTO_CLAMPED', easing='AUTO')
+
+
+class KeyframePoints:
+    """An F-curve's keyframes, with the bulk foreach_get/foreach_set access of Blender."""
+
+    def __init__(self, fcurve):
+        self._fcurve = fcurve
+        self._points = []
+
+    def __iter__(self):
+        return iter(list(self._points))
+
+    def __len__(self):
+        return len(self._points)
+
+    def __getitem__(self, index):
+        return self._points[index]
+
+    def insert(self, frame, value, options=set(), keyframe_type='KEYFRAME'):
+        """Key a value, replacing any keyframe already on that frame."""
+        point = next((p for p in self._points if abs(p.co[0] - frame) < 1e-6), None)
+        if point is None:
+            point = Keyframe(frame, value)
+            self._points.append(point)
+        point.co = (float(frame), float(value))
+        self._fcurve.update()
+        return point
+
+    def add(self, count=1):
+        self._points.extend(Keyframe() for _ in range(count))
+
+    def remove(self, keyframe, fast=False):
+        self._points.remove(keyframe)
+
+    def foreach_get(self, attribute, sequence):
+        sequence[:] = np.ravel([getattr(point, attribute) for point in self._points])
+
+    def foreach_set(self, attribute, sequence):
+        width = len(sequence) // max(len(self._points), 1)
+        for i, point in enumerate(self._points):
+            setattr(point, attribute, [float(v) for v in sequence[i * width:(i + 1) * width]])
+
+
+class FCurve(Struct):
+    """An animated property component, evaluated the way Blender plays it back."""
+
+    def __init__(self, data_path, index=0, group=""):
+        super().__init__(data_path=data_path, array_index=index, group=group, extrapolation='CONSTANT')
+        self.keyframe_points = KeyframePoints(self)
+
+    def update(self):
+        """Sort the keyframes and recalculate their auto-clamped handles."""
+        points = sorted(self.keyframe_points, key=lambda point: point.co[0])
+        self.keyframe_points._points[:] = points
+        for i, point in enumerate(points):
+            if 'AUTO' not in point.handle_left_type:
+                continue
+            frame, value = point.co
+            left = points[i - 1].co if i > 0 else None
+            right = points[i + 1].co if i < len(points) - 1 else None
+            slope = 0.0  # First and last keys, and extremes under auto-clamping, have flat handles
+            if left and right:
+                before = (value - left[1]) / (frame - left[0])
+                after = (right[1] - value) / (right[0] - frame)
+                if before * after > 0:
+                    slope = (before + after) / 2
+            left_width = (frame - left[0]) / 3 if left else 1.0
+            right_width = (right[0] - frame) / 3 if right else 1.0
+            point.handle_left = (frame - left_width, value - slope * left_width)
+            point.handle_right = (frame + right_width, value + slope * right_width)
+
+    def evaluate(self, frame):
+        points = self.keyframe_points._points
+        if not points:
+            return 0.0
+        if frame <= points[0].co[0]:
+            return points[0].co[1]
+        if frame >= points[-1].co[0]:
+            return points[-1].co[1]
+        index = next(i for i, point in enumerate(points) if point.co[0] > frame) - 1
+        start, end = points[index], points[index + 1]
+        (x0, y0), (x3, y3) = start.co, end.co
+        if start.interpolation == 'CONSTANT':
+            return y0
+        if start.interpolation != 'BEZIER':
+            return y0 + (y3 - y0) * (frame - x0) / (x3 - x0)
+        (x1, y1), (x2, y2) = start.handle_right, end.handle_left
+
+        def bezier(a, b, c, d, u):
+            return (1 - u) ** 3 * a + 3 * (1 - u) ** 2 * u * b + 3 * (1 - u) * u ** 2 * c + u ** 3 * d
+
+        low, high = 0.0, 1.0  # Handles stay inside the segment, so x rises with u
+        for _ in range(40):
+            middle = (low + high) / 2
+            low, high = (middle, high) if bezier(x0, x1, x2, x3, middle) < frame else (low, middle)
+        return bezier(y0, y1, y2, y3, (low + high) / 2)
+
+
+class FCurves:
+    """An action's F-curves."""
+
+    def __init__(self):
+        self._fcurves = []
+
+    def __iter__(self):
+        return iter(list(self._fcurves))
+
+    def __len__(self):
+        return len(self._fcurves)
+
+    def find(self, data_path, index=0):
+        return next((f for f in self._fcurves if f.data_path == data_path and f.array_index == index), None)
+
+    def new(self, data_path, index=0, action_group=""):
+        if self.find(data_path, index):
+            raise RuntimeError(f"F-Curve '{data_path}[{index}]' already exists in action")
+        fcurve = FCurve(data_path, index, action_group)
+        self._fcurves.append(fcurve)
+        return fcurve
+
+    def remove(self, fcurve):
+        self._fcurves.remove(fcurve)
+
+
+class Action(ID):
+    def __init__(self, name, collection=None):
+        super().__init__(name, collection)
+        self.fcurves = FCurves()
+
+
+class Mesh(ID):
+    """Mesh data, reduced to its materials and local bounding box."""
+
+    def __init__(self, name, collection=None):
+        super().__init__(name, collection)
+        self.materials = []
+        self._bounds = (Vector(), Vector())
+        self._shading = 'FLAT'
+
+
+class BezierPoint(Struct):
+    pass
+
+
+class Spline(Struct):
+    pass
+
+
+class Curve(ID):
+    """Curve data; its bounds are its control points padded by the bevel."""
+
+    def __init__(self, name, collection=None, type='CURVE'):
+        super().__init__(name, collection)
+        self.materials = []
+        self.splines = []
+        self.dimensions = '3D'
+        self.bevel_mode = 'ROUND'
+        self.bevel_depth = 0.0
+        self.bevel_resolution = 4
+        self.bevel_object = None
+        self.use_fill_caps = False
+
+    @property
+    def _bounds(self):
+        points = [p for spline in self.splines for bezier in spline.bezier_points
+                  for p in (bezier.co, bezier.handle_left, bezier.handle_right)]
+        points = np.array(points) if points else np.zeros((1, 3))
+        pad = self.bevel_depth
+        if self.bevel_mode == 'OBJECT' and self.bevel_object is not None:
+            low, high = self.bevel_object.data._bounds
+            pad = max(np.abs(low).max(), np.abs(high).max())
+        return Vector(points.min(axis=0) - pad), Vector(points.max(axis=0) + pad)
+
+
+class Light(ID):
+    def __init__(self, name, collection=None, type='POINT'):
+        super().__init__(name, collection)
+        self.type = type
+        self.energy = 1000.0 if type in ('POINT', 'SPOT') else 10.0
+        self.color = (1.0, 1.0, 1.0)
+        self.size = 0.25 if type == 'AREA' else 0.1
+
+
+class Camera(ID):
+    def __init__(self, name, collection=None):
+        super().__init__(name, collection)
+        self.type = 'PERSP'
+        self.lens = 50.0
+        self.sensor_fit = 'AUTO'
+        self.sensor_width = 36.0
+        self.sensor_height = 24.0
+        self.shift_x = 0.0
+        self.shift_y = 0.0
+        self.clip_start = 0.1
+        self.clip_end = 1000.0
+
+
+class ImagePixels:
+    """An image's float RGBA pixels, bottom row first, read and written in bulk."""
+
+    def __init__(self, width, height):
+        self._values = np.zeros(width * height * 4, dtype=np.float32)
+        self._values[3::4] = 1.0  # Blender's new images are opaque black
+
+    def __len__(self):
+        return len(self._values)
+
+    def __getitem__(self, index):
+        return self._values[index].tolist()
+
+    def foreach_get(self, sequence):
+        sequence[:] = self._values
+
+    def foreach_set(self, sequence):
+        self._values[:] = np.asarray(sequence, dtype=np.float32).ravel()
+
+
+class Image(ID):
+    def __init__(self, name, collection=None, width=0, height=0, alpha=False, float_buffer=False, filepath=""):
+        super().__init__(name, collection)
+        self.filepath = filepath
+        self.alpha_mode = 'STRAIGHT' if alpha else 'NONE'
+        self.is_float = float_buffer
+        self._resize(width, height)
+
+    def _resize(self, width, height, pixels=None):
+        object.__setattr__(self, "_size", (int(width), int(height)))  # Integers, unlike float properties
+        self._pixels = ImagePixels(int(width), int(height))
+        if pixels is not None:
+            self._pixels.foreach_set(pixels)
+
+    @property
+    def size(self):
+        return self._size
+
+    @property
+    def pixels(self):
+        return self._pixels
+
+    def save_render(self, filepath, scene=None):
+        """Write the image in the scene's output format, display-encoded like Blender's Standard view."""
+        width, height = self.size
+        pixels = self._pixels._values.reshape(height, width, 4).copy()
+        if self.alpha_mode == 'PREMUL':
+            alpha = pixels[..., 3:4]
+            pixels[..., :3] = np.where(alpha > 0, pixels[..., :3] / np.maximum(alpha, 1e-6), 0.0)
+        file_format = (scene or context.scene).render.image_settings.file_format
+        if file_format == 'OPEN_EXR':
+            write_exr(filepath, pixels)
+        else:
+            if self.is_float:
+                pixels[..., :3] = _srgb_encode(pixels[..., :3])
+            write_png(filepath, pixels)
+
+
+class Modifier(Struct):
+    pass
+
+
+class Modifiers:
+    """An object's modifier stack."""
+
+    def __init__(self):
+        self._modifiers = []
+
+    def __iter__(self):
+        return iter(list(self._modifiers))
+
+    def __len__(self):
+        return len(self._modifiers)
+
+    def __getitem__(self, key):
+        return self._modifiers[key] if isinstance(key, int) else next(m for m in self._modifiers if m.name == key)
+
+    def get(self, name, default=None):
+        return next((m for m in self._modifiers if m.name == name), default)
+
+    def new(self, name, type):
+        modifier = Modifier(name=name, type=type, show_viewport=True, show_render=True)
+        self._modifiers.append(modifier)
+        return modifier
+
+    def remove(self, modifier):
+        self._modifiers.remove(modifier)
+
+
+def transform_matrix(location, rotation, scale):
+    """A 4x4 world matrix from location, XYZ Euler rotation and scale."""
+    (cx, cy, cz), (sx, sy, sz) = np.cos(rotation), np.sin(rotation)
+    rotation = np.array([
+        [cy * cz, sx * sy * cz - cx * sz, cx * sy * cz + sx * sz],
+        [cy * sz, sx * sy * sz + cx * cz, cx * sy * sz - sx * cz],
+        [-sy, sx * cy, cx * cy],
+    ])
+    matrix = np.identity(4)
+    matrix[:3, :3] = rotation * np.asarray(scale)[None, :]
+    matrix[:3, 3] = location
+    return matrix
+
+
+def box_corners(low, high):
+    """The 8 corners of a box, in Blender's bound_box order."""
+    return [(x, y, z) for x in (low[0], high[0]) for y, z in
+            ((low[1], low[2]), (low[1], high[2]), (high[1], high[2]), (high[1], low[2]))]
+
+
+class Object(ID):
+    """An object: transform, data, modifiers and selection state."""
+
+    def __init__(self, name, collection=None, object_data=None):
+        super().__init__(name, collection)
+        self.data = object_data
+        self.location = (0.0, 0.0, 0.0)
+        self.rotation_euler = (0.0, 0.0, 0.0)
+        self.scale = (1.0, 1.0, 1.0)
+        self.modifiers = Modifiers()
+        self._selected = False
+
+    @property
+    def type(self):
+        for data_type, name in ((Mesh, 'MESH'), (Curve, 'CURVE'), (Light, 'LIGHT'), (Camera, 'CAMERA')):
+            if isinstance(self.data, data_type):
+                return name
+        return 'EMPTY'
+
+    @property
+    def matrix_world(self):
+        return Matrix(transform_matrix(self.location, self.rotation_euler, self.scale))
+
+    @property
+    def bound_box(self):
+        low, high = getattr(self.data, "_bounds", (Vector(), Vector()))
+        return [Vector(corner) for corner in box_corners(low, high)]
+
+    def select_set(self, state, view_layer=None):
+        self._selected = bool(state)
+
+    def select_get(self, view_layer=None):
+        return self._selected
+
+    def evaluated_get(self, depsgraph):
+        return self
+
+
+class Socket(Struct):
+    """A node socket; keyframes on its default_value live on the node tree."""
+
+    def __init__(self, node, name, default_value, is_output):
+        self._node = node
+        super().__init__(name=name, identifier=name, is_output=is_output)
+        if default_value is not None:
+            self.default_value = default_value
+
+    @property
+    def node(self):
+        return self._node
+
+    @property
+    def id_data(self):
+        return self._node.id_data
+
+    @property
+    def is_linked(self):
+        return any(self in (link.from_socket, link.to_socket) for link in self._node.id_data.links)
+
+    def path_from_id(self, attribute=""):
+        sockets = self._node.outputs if self.is_output else self._node.inputs
+        kind = "outputs" if self.is_output else "inputs"
+        return f'nodes["{self._node.name}"].{kind}[{sockets._sockets.index(self)}].{attribute}'.rstrip(".")
+
+
+class Sockets:
+    """A node's inputs or outputs, indexed by position or name."""
+
+    def __init__(self, sockets):
+        self._sockets = sockets
+
+    def __iter__(self):
+        return iter(self._sockets)
+
+    def __len__(self):
+        return len(self._sockets)
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return self._sockets[key]
+        socket = self.get(key)
+        if socket is None:
+            raise KeyError(f'bpy_prop_collection[key]: key "{key}" not found')
+        return socket
+
+    def get(self, name, default=None):
+        return next((socket for socket in self._sockets if socket.name == name), default)
+
+
+class ColorRampElement(Struct):
+    pass
+
+
+class ColorRampElements:
+    """A color ramp's stops, kept in position order."""
+
+    def __init__(self):
+        self._elements = [ColorRampElement(position=0.0, color=(0.0, 0.0, 0.0, 1.0)),
+                          ColorRampElement(position=1.0, color=(1.0, 1.0, 1.0, 1.0))]
+
+    def __iter__(self):
+        return iter(self._elements)
+
+    def __len__(self):
+        return len(self._elements)
+
+    def __getitem__(self, index):
+        return self._elements[index]
+
+    def new(self, position):
+        """Add a stop with the color the ramp currently has at that position."""
+        positions = [element.position for element in self._elements]
+        color = [np.interp(position, positions, [element.color[i] for element in self._elements]) for i in range(4)]
+        element = ColorRampElement(position=position, color=color)
+        self._elements.append(element)
+        self._elements.sort(key=lambda e: e.position)
+        return element
+
+    def remove(self, element):
+        self._elements.remove(element)
+
+
+class ColorRamp(Struct):
+    def __init__(self):
+        super().__init__(interpolation='LINEAR', color_mode='RGB')
+        self.elements = ColorRampElements()
+
+
+class Node(Struct):
+    """A shader or compositor node with the sockets of its type."""
+
+    def __init__(self, tree, bl_idname):
+        node_type, name, inputs, outputs = NODE_TYPES.get(bl_idname, (bl_idname.upper(), bl_idname, [], []))
+        self._tree = tree
+        super().__init__(bl_idname=bl_idname, type=node_type, name=name, label="", location=(0.0, 0.0))
+        self.inputs = Sockets([Socket(self, socket, default, False) for socket, default in inputs])
+        self.outputs = Sockets([Socket(self, socket, None, True) for socket in outputs])
+        if node_type == 'VALTORGB':
+            self.color_ramp = ColorRamp()
+        elif node_type == 'TEX_GRADIENT':
+            self.gradient_type = 'LINEAR'
+
+    @property
+    def id_data(self):
+        return self._tree
+
+    def path_from_id(self, attribute=""):
+        return f'nodes["{self.name}"].{attribute}'.rstrip(".")
+
+
+class RenderLayersNode(Node):
+    """The compositor's Render Layers node, with an output per light group of the view layer."""
+
+    @property
+    def outputs(self):
+        names = {socket.name for socket in self._outputs}
+        for group in context.view_layer.lightgroups:
+            if f"Combined_{group.name}" not in names:
+                self._outputs._sockets.append(Socket(self, f"Combined_{group.name}", None, True))
+        return self._outputs
+
+    @outputs.setter
+    def outputs(self, value):
+        self._outputs = value
+
+
+class FileSlots:
+    """A File Output node's slots, each with its own input socket."""
+
+    def __init__(self, node):
+        self._node = node
+
+    def __iter__(self):
+        return iter([Struct(path=socket.name) for socket in self._node.inputs])
+
+    def __len__(self):
+        return len(self._node.inputs)
+
+    def new(self, name):
+        self._node.inputs._sockets.append(Socket(self._node, name, None, False))
+
+    def clear(self):
+        for socket in list(self._node.inputs):
+            for link in [link for link in self._node.id_data.links if link.to_socket is socket]:
+                self._node.id_data.links.remove(link)
+        self._node.inputs._sockets.clear()
+
+
+class FileOutputNode(Node):
+    """A compositor File Output node writing one image per slot and frame."""
+
+    def __init__(self, tree, bl_idname):
+        super().__init__(tree, bl_idname)
+        self.base_path = "/tmp/"
+        self.format = Struct(file_format='OPEN_EXR', color_depth='32', color_mode='RGBA')
+        self.file_slots = FileSlots(self)
+
+
+# bl_idname -> node class, for nodes that need more than generic sockets
+NODE_CLASSES = {'CompositorNodeRLayers': RenderLayersNode, 'CompositorNodeOutputFile': FileOutputNode}
+
+
+class Nodes:
+    """A node tree's nodes, named uniquely like datablocks."""
+
+    def __init__(self, tree):
+        self._tree = tree
+        self._nodes = []
+
+    def __iter__(self):
+        return iter(list(self._nodes))
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return self._nodes[key]
+        node = self.get(key)
+        if node is None:
+            raise KeyError(f'bpy_prop_collection[key]: key "{key}" not found')
+        return node
+
+    def get(self, name, default=None):
+        return next((node for node in self._nodes if node.name == name), default)
+
+    def new(self, type):
+        node = NODE_CLASSES.get(type, Node)(self._tree, type)
+        node.name = IDCollection.unique_name(self, node.name, node)
+        self._nodes.append(node)
+        return node
+
+    def remove(self, node):
+        self._nodes.remove(node)
+        self._tree.links._links[:] = [link for link in self._tree.links
+                                      if node not in (link.from_node, link.to_node)]
+
+    def clear(self):
+        for node in list(self._nodes):
+            self.remove(node)
+
+    @property
+    def _items(self):  # For IDCollection.unique_name
+        return self._nodes
+
+
+class Link(Struct):
+    pass
+
+
+class Links:
+    def __init__(self):
+        self._links = []
+
+    def __iter__(self):
+        return iter(list(self._links))
+
+    def __len__(self):
+        return len(self._links)
+
+    def new(self, input, output, verify_limits=True):
+        # Like Blender, an input takes one link: linking it again replaces the old one
+        self._links[:] = [link for link in self._links if link.to_socket is not output]
+        link = Link(from_socket=input, to_socket=output, from_node=input.node, to_node=output.node)
+        self._links.append(link)
+        return link
+
+    def remove(self, link):
+        self._links.remove(link)
+
+    def clear(self):
+        self._links.clear()
+
+
+class NodeTree(ID):
+    """A node tree embedded in a material (shader nodes) or a scene (compositor nodes)."""
+
+    def __init__(self, name="Shader Nodetree"):
+        super().__init__(name)
+        self.nodes = Nodes(self)
+        self.links = Links()
+
+
+class Material(ID):
+    def __init__(self, name, collection=None):
+        super().__init__(name, collection)
+        self.diffuse_color = (0.8, 0.8, 0.8, 1.0)
+        self.node_tree = None
+        self._use_nodes = False
+
+    @property
+    def use_nodes(self):
+        return self._use_nodes
+
+    @use_nodes.setter
+    def use_nodes(self, value):
+        self._use_nodes = bool(value)
+        if value and self.node_tree is None:
+            # The node tree new materials get: a Principled BSDF into the output
+            self.node_tree = NodeTree()
+            bsdf = self.node_tree.nodes.new('ShaderNodeBsdfPrincipled')
+            output = self.node_tree.nodes.new('ShaderNodeOutputMaterial')
+            self.node_tree.links.new(bsdf.outputs['BSDF'], output.inputs['Surface'])
+
+
+def _users(id_block):
+    """How many datablocks use an ID, as far as the stand-in tracks references."""
+    if isinstance(id_block, Object):
+        return int(id_block in data.objects._items)
+    if isinstance(id_block, (Mesh, Curve, Light, Camera)):
+        return sum(obj.data is id_block for obj in data.objects) + sum(
+            curve.bevel_object is not None and curve.bevel_object.data is id_block for curve in data.curves)
+    if isinstance(id_block, Material):
+        return sum(owner.materials.count(id_block) for owner in (*data.meshes, *data.curves))
+    if isinstance(id_block, Action):
+        owners = [*data.objects, *(material.node_tree for material in data.materials if material.node_tree)]
+        return sum(owner.animation_data is not None and owner.animation_data.action is id_block for owner in owners)
+    return int(id_block.use_fake_user)
+
+
+class BlendData:
+    """bpy.data: the datablock collections of the session."""
+
+    COLLECTIONS = {
+        "objects": Object, "meshes": Mesh, "curves": Curve, "materials": Material, "lights": Light,
+        "cameras": Camera, "actions": Action, "images": Image, "node_groups": NodeTree, "textures": ID,
+        "worlds": ID, "collections": ID,
+    }
+
+    def __init__(self):
+        for name, id_type in self.COLLECTIONS.items():
+            setattr(self, name, IDCollection(id_type))
+        self.scenes = IDCollection(Scene)
+        self.images.load = self._load_image
+
+    def _load_image(self, filepath, check_existing=False):
+        if not os.path.exists(filepath):
+            raise RuntimeError(f'Error: Cannot read image file "{filepath}": No such file or directory')
+        pixels = read_exr(filepath) if filepath.lower().endswith(".exr") else read_png(filepath)
+        height, width = pixels.shape[:2]
+        image = self.images.new(os.path.basename(filepath), width, height, alpha=True,
+                                float_buffer=filepath.lower().endswith(".exr"), filepath=filepath)
+        image._pixels.foreach_set(pixels[::-1])
+        return image
+
+    def orphans_purge(self, do_local_ids=True, do_linked_ids=True, do_recursive=False):
+        """Remove datablocks without users, repeating while that orphans more with do_recursive."""
+        removed = 0
+        while True:
+            orphans = [(collection, item) for name in ("meshes", "curves", "lights", "cameras", "materials",
+                                                       "actions", "images")
+                       for collection in [getattr(self, name)] for item in collection if item.users == 0]
+            for collection, item in orphans:
+                collection.remove(item)
+            removed += len(orphans)
+            if not orphans or not do_recursive:
+                return removed
+
+
+# ---------------------------------------------------------------------------
+# Scene and context
+# ---------------------------------------------------------------------------
+
+class RenderSettings(Struct):
+    def __init__(self):
+        super().__init__(
+            resolution_x=1920, resolution_y=1080, resolution_percentage=100, fps=24, fps_base=1.0,
+            film_transparent=False, filepath="/tmp/", use_border=False, use_crop_to_border=False,
+            border_min_x=0.0, border_min_y=0.0, border_max_x=1.0, border_max_y=1.0, use_motion_blur=False,
+            use_persistent_data=False,
+        )
+        self.image_settings = Struct(file_format='PNG', color_mode='RGBA', color_depth='8', compression=15)
+        self.ffmpeg = Struct(format='MPEG4', codec='H264', constant_rate_factor='MEDIUM')
+        self._engine = 'BLENDER_EEVEE_NEXT'
+
+    @property
+    def engine(self):
+        return self._engine
+
+    @engine.setter
+    def engine(self, value):
+        if value not in RENDER_ENGINES:
+            raise TypeError(f'bpy_struct: item.attr = val: enum "{value}" not found in {RENDER_ENGINES}')
+        self._engine = value
+
+
+class Scene(ID):
+    def __init__(self, name="Scene", collection=None):
+        super().__init__(name, collection)
+        self.render = RenderSettings()
+        self.frame_start = 1
+        self.frame_end = 250
+        self.frame_step = 1
+        self.frame_current = 1
+        self.camera = None
+        self.cycles = Struct(device='CPU', samples=4096, use_denoising=True, use_adaptive_sampling=True,
+                             adaptive_threshold=0.01, adaptive_min_samples=0, time_limit=0.0)
+        self.eevee = Struct(taa_render_samples=64, use_raytracing=False)
+        self.display = Struct(render_aa='8', shading=Struct(light='STUDIO', color_type='MATERIAL'))
+        self.view_settings = Struct(view_transform='AgX', look='None', exposure=0.0, gamma=1.0)
+        self.node_tree = None
+        self._use_nodes = False
+
+    @property
+    def use_nodes(self):
+        return self._use_nodes
+
+    @use_nodes.setter
+    def use_nodes(self, value):
+        self._use_nodes = bool(value)
+        if value and self.node_tree is None:
+            self.node_tree = NodeTree("Compositing Nodetree")
+
+    @property
+    def view_layers(self):
+        return [context.view_layer]
+
+    @property
+    def objects(self):
+        return data.objects
+
+    def frame_set(self, frame, subframe=0.0):
+        self.frame_current = int(frame)  # An int property in Blender, whatever integer type is passed
+        for handler in list(app.handlers.frame_change_post):
+            handler(self, None)
+
+
+class LayerObjects:
+    def __init__(self):
+        self.active = None
+
+    def __iter__(self):
+        return iter(data.objects)
+
+    def __len__(self):
+        return len(data.objects)
+
+
+class LightGroups:
+    """A view layer's light groups, each adding a Combined_<name> Render Layers output."""
+
+    def __init__(self):
+        self._groups = []
+
+    def __iter__(self):
+        return iter(self._groups)
+
+    def __len__(self):
+        return len(self._groups)
+
+    def __contains__(self, name):
+        return any(group.name == name for group in self._groups)
+
+    def add(self, name="Lightgroup"):
+        group = Struct(name=name)
+        self._groups.append(group)
+        return group
+
+
+class ViewLayer(Struct):
+    def __init__(self):
+        super().__init__(name="ViewLayer", use_pass_vector=False, use_pass_emit=False,
+                         use_pass_material_index=False)
+        self.objects = LayerObjects()
+        self.lightgroups = LightGroups()
+
+    def update(self):
+        pass
+
+
+class Depsgraph(Struct):
+    pass
+
+
+class Context:
+    """bpy.context in object mode."""
+
+    mode = 'OBJECT'
+
+    def __init__(self):
+        self.scene = data.scenes.new("Scene")
+        self.view_layer = ViewLayer()
+
+    @property
+    def active_object(self):
+        return self.view_layer.objects.active
+
+    object = active_object
+
+    @property
+    def selected_objects(self):
+        return [obj for obj in data.objects if obj.select_get()]
+
+    def evaluated_depsgraph_get(self):
+        return Depsgraph(scene=self.scene)
+
+
+class App:
+    version = (4, 2, 0)
+    version_string = "4.2.0 (dry run)"
+    background = True
+    binary_path = ""
+
+    def __init__(self):
+        self.handlers = Struct(**{name: [] for name in (
+            "render_init", "render_pre", "render_post", "render_stats", "render_complete", "render_cancel",
+            "frame_change_pre", "frame_change_post", "depsgraph_update_post", "load_post")})
+        self.driver_namespace = {}
+
+
+# ---------------------------------------------------------------------------
+# Operators
+# ---------------------------------------------------------------------------
+
+# Operator id ("object.join") -> implementation; anything else is logged and does nothing
+OPERATORS = {}
+
+
+def operator(idname):
+    def register(func):
+        OPERATORS[idname] = func
+        return func
+    return register
+
+
+class _BPyOpsSubModOp:
+    """One operator, called like Blender's: bpy.ops.object.select_all(action='SELECT')."""
+
+    def __init__(self, module, func):
+        self._module = module
+        self._func = func
+
+    def idname_py(self):
+        return f"{self._module}.{self._func}"
+
+    def idname(self):
+        return f"{self._module.upper()}_OT_{self._func}"
+
+    def poll(self, *args):
+        return True
+
+    def __call__(self, *args, **kwargs):
+        PLAN["operations"].append({"op": self.idname_py(), "args": _plain(kwargs)})
+        implementation = OPERATORS.get(self.idname_py())
+        if implementation is not None:
+            implementation(**kwargs)
+        return {'FINISHED'}
+
+
+class _BPyOpsSubMod:
+    def __init__(self, module):
+        self._module = module
+
+    def __getattr__(self, func):
+        if func.startswith("__"):
+            raise AttributeError(func)
+        return _BPyOpsSubModOp(self._module, func)
+
+
+class _BPyOps:
+    def __getattr__(self, module):
+        if module.startswith("__"):
+            raise AttributeError(module)
+        return _BPyOpsSubMod(module)
+
+
+def _selected():
+    return context.selected_objects
+
+
+def _add_object(name, object_data, location=(0.0, 0.0, 0.0), rotation=(0.0, 0.0, 0.0), **kwargs):
+    """Add an object at the given transform as the only selected, active object."""
+    for obj in data.objects:
+        obj.select_set(False)
+    obj = data.objects.new(name, object_data)
+    obj.location = location
+    obj.rotation_euler = rotation
+    obj.select_set(True)
+    context.view_layer.objects.active = obj
+    return obj
+
+
+def _add_mesh(name, half_extents, **kwargs):
+    mesh = data.meshes.new(name)
+    mesh._bounds = (Vector(-np.asarray(half_extents)), Vector(half_extents))
+    return _add_object(name, mesh, **kwargs)
+
+
+@operator("mesh.primitive_cube_add")
+def _cube_add(size=2.0, **kwargs):
+    _add_mesh("Cube", [size / 2] * 3, **kwargs)
+
+
+@operator("mesh.primitive_cylinder_add")
+def _cylinder_add(radius=1.0, depth=2.0, **kwargs):
+    _add_mesh("Cylinder", (radius, radius, depth / 2), **kwargs)
+
+
+@operator("mesh.primitive_cone_add")
+def _cone_add(radius1=1.0, radius2=0.0, depth=2.0, **kwargs):
+    radius = max(radius1, radius2)
+    _add_mesh("Cone", (radius, radius, depth / 2), **kwargs)
+
+
+@operator("mesh.primitive_uv_sphere_add")
+def _uv_sphere_add(radius=1.0, **kwargs):
+    _add_mesh("Sphere", (radius, radius, radius), **kwargs)
+
+
+@operator("mesh.primitive_torus_add")
+def _torus_add(major_radius=1.0, minor_radius=0.25, **kwargs):
+    radius = major_radius + minor_radius
+    _add_mesh("Torus", (radius, radius, minor_radius), **kwargs)
+
+
+@operator("curve.primitive_bezier_curve_add")
+def _bezier_curve_add(radius=1.0, **kwargs):
+    curve = data.curves.new("BezierCurve", type='CURVE')
+    curve.splines.append(Spline(type='BEZIER', bezier_points=[
+        BezierPoint(co=(-radius, 0, 0), handle_left=(-1.5 * radius, -0.5 * radius, 0),
+                    handle_right=(-0.5 * radius, 0.5 * radius, 0)),
+        BezierPoint(co=(radius, 0, 0), handle_left=(0, 0, 0), handle_right=(2 * radius, 0, 0)),
+    ]))
+    _add_object("BezierCurve", curve, **kwargs)
+
+
+@operator("curve.primitive_bezier_circle_add")
+def _bezier_circle_add(radius=1.0, **kwargs):
+    curve = data.curves.new("BezierCircle", type='CURVE')
+    handle = radius * 0.5523  # Cubic approximation of a quarter circle
+    points = []
+    for angle in (0, 90, 180, 270):
+        c, s = math.cos(math.radians(angle)), math.sin(math.radians(angle))
+        points.append(BezierPoint(co=(radius * c, radius * s, 0),
+                                  handle_left=(radius * c + handle * s, radius * s - handle * c, 0),
+                                  handle_right=(radius * c - handle * s, radius * s + handle * c, 0)))
+    curve.splines.append(Spline(type='BEZIER', bezier_points=points, use_cyclic_u=True))
+    _add_object("BezierCircle", curve, **kwargs)
+
+
+@operator("object.light_add")
+def _light_add(type='POINT', **kwargs):
+    name = type.title()
+    _add_object(name, data.lights.new(name, type=type), **kwargs)
+
+
+@operator("object.camera_add")
+def _camera_add(**kwargs):
+    _add_object("Camera", data.cameras.new("Camera"), **kwargs)
+
+
+@operator("object.select_all")
+def _select_all(action='TOGGLE'):
+    objects = list(data.objects)
+    if action == 'TOGGLE':
+        action = 'DESELECT' if any(obj.select_get() for obj in objects) else 'SELECT'
+    for obj in objects:
+        obj.select_set(not obj.select_get() if action == 'INVERT' else action == 'SELECT')
+
+
+@operator("object.delete")
+def _delete(use_global=False, confirm=False):
+    for obj in _selected():
+        data.objects.remove(obj)
+
+
+def _transform_points(matrix, points):
+    points = np.asarray(points, dtype=np.float64)
+    return points @ matrix[:3, :3].T + matrix[:3, 3]
+
+
+def _set_bounds(data_block, corners):
+    data_block._bounds = (Vector(np.min(corners, axis=0)), Vector(np.max(corners, axis=0)))
+
+
+@operator("object.transform_apply")
+def _transform_apply(location=True, rotation=True, scale=True, **kwargs):
+    """Bake the chosen transform components into the data and reset them on the object."""
+    for obj in _selected():
+        matrix = transform_matrix(obj.location if location else (0, 0, 0),
+                                  obj.rotation_euler if rotation else (0, 0, 0),
+                                  obj.scale if scale else (1, 1, 1))
+        if isinstance(obj.data, Curve):
+            for spline in obj.data.splines:
+                for point in spline.bezier_points:
+                    for attribute in ("co", "handle_left", "handle_right"):
+                        setattr(point, attribute, _transform_points(matrix, getattr(point, attribute)))
+        elif isinstance(obj.data, Mesh):
+            _set_bounds(obj.data, _transform_points(matrix, [tuple(c) for c in obj.bound_box]))
+        if location:
+            obj.location = (0.0, 0.0, 0.0)
+        if rotation:
+            obj.rotation_euler = (0.0, 0.0, 0.0)
+        if scale:
+            obj.scale = (1.0, 1.0, 1.0)
+
+
+@operator("object.convert")
+def _convert(target='MESH', **kwargs):
+    """Turn selected curves into meshes with the curve's bounds and materials, keeping the objects."""
+    for obj in _selected():
+        if isinstance(obj.data, Curve) and target == 'MESH':
+            mesh = data.meshes.new(obj.data.name)
+            mesh._bounds = obj.data._bounds
+            mesh.materials = list(obj.data.materials)
+            obj.data = mesh
+
+
+@operator("object.join")
+def _join():
+    """Merge the selected meshes into the active one: bounds unioned, materials appended."""
+    active = context.active_object
+    others = [obj for obj in _selected() if obj is not active and isinstance(obj.data, Mesh)]
+    to_local = np.linalg.inv(np.array(active.matrix_world))
+    corners = [tuple(c) for c in active.bound_box]
+    for obj in others:
+        corners.extend(_transform_points(to_local @ np.array(obj.matrix_world), [tuple(c) for c in obj.bound_box]))
+        active.data.materials.extend(m for m in obj.data.materials if m not in active.data.materials)
+        data.objects.remove(obj)
+    _set_bounds(active.data, corners)
+
+
+@operator("object.origin_set")
+def _origin_set(type='GEOMETRY_ORIGIN', center='MEDIAN'):
+    """Move the origin of selected meshes to their bounds center (all centers coincide for a box)."""
+    if type not in ('ORIGIN_GEOMETRY', 'ORIGIN_CENTER_OF_MASS', 'ORIGIN_CENTER_OF_VOLUME'):
+        return
+    for obj in _selected():
+        if isinstance(obj.data, Mesh):
+            low, high = obj.data._bounds
+            middle = (np.asarray(low) + np.asarray(high)) / 2
+            obj.data._bounds = (Vector(np.asarray(low) - middle), Vector(np.asarray(high) - middle))
+            obj.location = _transform_points(np.array(obj.matrix_world), middle)
+
+
+@operator("object.shade_smooth")
+def _shade_smooth(**kwargs):
+    for obj in _selected():
+        if isinstance(obj.data, Mesh):
+            obj.data._shading = 'SMOOTH'
+
+
+@operator("object.shade_flat")
+def _shade_flat(**kwargs):
+    for obj in _selected():
+        if isinstance(obj.data, Mesh):
+            obj.data._shading = 'FLAT'
+
+
+def _render_size(render):
+    """Output size in pixels, cropped to the border when Blender would crop."""
+    scale = render.resolution_percentage / 100
+    width, height = int(render.resolution_x * scale), int(render.resolution_y * scale)
+    if render.use_border and render.use_crop_to_border:
+        width = max(1, round((render.border_max_x - render.border_min_x) * width))
+        height = max(1, round((render.border_max_y - render.border_min_y) * height))
+    return width, height
+
+
+def _write_image(path, pixels, file_format):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if file_format in ('OPEN_EXR', 'OPEN_EXR_MULTILAYER'):
+        write_exr(path, pixels)
+    else:
+        write_png(path, pixels)
+
+
+def _composite(scene, frame, image):
+    """
+    Run the compositor's outputs: File Output slots are written and the Viewer image is
+    filled. Returns the files written and whether the Viewer was.
+    """
+    if not scene.use_nodes or scene.node_tree is None:
+        return [], False
+    links = {link.to_socket: link.from_socket for link in scene.node_tree.links}
+    passes = np.zeros_like(image)
+    passes[..., 3] = 1.0
+    written, viewed = [], False
+    for node in scene.node_tree.nodes:
+        if node.type == 'OUTPUT_FILE':
+            for socket in node.inputs:
+                source = links.get(socket)
+                if source is None:
+                    continue
+                path = os.path.join(node.base_path, f"{socket.name}{frame:04d}"
+                                    + IMAGE_EXTENSIONS.get(node.format.file_format, ""))
+                _write_image(path, image if source.name == "Image" else passes, node.format.file_format)
+                written.append(path)
+        elif node.type == 'VIEWER' and node.inputs["Image"] in links:
+            height, width = image.shape[:2]
+            viewer = data.images.get("Viewer Node") or data.images.new("Viewer Node", width, height, alpha=True,
+                                                                      float_buffer=True)
+            viewer._resize(width, height, image[::-1])
+            viewed = True
+    return written, viewed
+
+
+@operator("render.render")
+def _render(animation=False, write_still=False, **kwargs):
+    """
+    Run the render handlers for each frame and write what Blender would have, with blank
+    placeholder pixels at the output resolution: the frames or still in the output
+    format, the compositor's File Output slots and its Viewer image. Renders that wrote
+    files are recorded as outputs.
+    """
+    scene = context.scene
+    render = scene.render
+    frames = range(scene.frame_start, scene.frame_end + 1, scene.frame_step) if animation else [scene.frame_current]
+    file_format = render.image_settings.file_format
+    width, height = _render_size(render)
+    image = np.zeros((height, width, 4), dtype=np.float32)
+    image[..., 3] = 0.0 if render.film_transparent else 1.0
+    passes, viewed = [], False
+    for frame in frames:
+        if animation:
+            scene.frame_set(frame)
+        for handler in list(app.handlers.render_pre):
+            handler(scene, None)
+        written, viewer = _composite(scene, scene.frame_current, image)
+        passes += written
+        viewed = viewed or viewer
+        if file_format in IMAGE_EXTENSIONS and animation:
+            _write_image(render.filepath + f"{frame:04d}" + IMAGE_EXTENSIONS[file_format], image, file_format)
+        elif file_format in IMAGE_EXTENSIONS and write_still:
+            _write_image(render.filepath, image, file_format)
+        for handler in list(app.handlers.render_post):
+            handler(scene, None)
+    if not (animation or write_still or passes or viewed):
+        return
+
+    if file_format == 'FFMPEG':
+        kind, path = "video", render.filepath
+    elif animation:
+        kind, path = "frames", render.filepath + "####" + IMAGE_EXTENSIONS.get(file_format, "")
+    elif write_still:
+        kind, path = "still", render.filepath
+    else:
+        kind, path = "passes" if passes else "viewer", None
+    output = {
+        "type": kind,
+        "path": path,
+        "frames": [frames[0], frames[-1]],
+        "render": {
+            "engine": render.engine,
+            "resolution": [width, height],
+            "fps": render.fps,
+            "file_format": file_format,
+            "film_transparent": render.film_transparent,
+        },
+        "scene": scene_snapshot(),
+    }
+    if passes:
+        output["passes"] = passes
+    PLAN["outputs"].append(output)
+
+
+@operator("export_scene.gltf")
+def _gltf(filepath="", use_selection=False, export_format='GLB', **kwargs):
+    """Record a glTF export of the selected (or all) objects; no file is written."""
+    objects = _selected() if use_selection else list(data.objects)
+    PLAN["outputs"].append({
+        "type": export_format.lower(),
+        "path": filepath,
+        "settings": _plain(kwargs),
+        "scene": scene_snapshot(objects),
+    })
+
+
+# ---------------------------------------------------------------------------
+# Plan
+# ---------------------------------------------------------------------------
+
+def _object_snapshot(obj):
+    snapshot = {
+        "name": obj.name,
+        "type": obj.type,
+        "location": _plain(obj.location),
+        "rotation_euler": _plain(obj.rotation_euler),
+        "scale": _plain(obj.scale),
+        "modifiers": [_properties(modifier) for modifier in obj.modifiers],
+    }
+    if isinstance(obj.data, (Mesh, Curve)):
+        snapshot["materials"] = _plain(obj.data.materials)
+        snapshot["bounds"] = _plain(obj.data._bounds)
+    if isinstance(obj.data, Mesh):
+        snapshot["shading"] = obj.data._shading
+    elif isinstance(obj.data, (Light, Camera)):
+        snapshot["data"] = {key: value for key, value in _properties(obj.data).items()
+                            if key not in ("name", "animation_data", "use_fake_user")}
+    return snapshot
+
+
+def _material_snapshot(material):
+    snapshot = {"diffuse_color": _plain(material.diffuse_color), "use_nodes": material.use_nodes}
+    if material.node_tree is not None:
+        tree = material.node_tree
+        snapshot["nodes"] = {
+            node.name: {
+                "type": node.type,
+                "inputs": {socket.name: _plain(socket.default_value) for socket in node.inputs
+                           if hasattr(socket, "default_value") and not socket.is_linked},
+                **{key: value for key, value in _properties(node).items()
+                   if key not in ("bl_idname", "type", "name", "label", "location", "inputs", "outputs")},
+            }
+            for node in tree.nodes
+        }
+        snapshot["links"] = [[link.from_node.name, link.from_socket.name, link.to_node.name,
+                              link.to_node.inputs._sockets.index(link.to_socket)] for link in tree.links]
+    return snapshot
+
+
+def _keyframes_snapshot(owners):
+    keyframes = []
+    for id_type, name, owner in owners:
+        action = owner.animation_data.action if owner.animation_data else None
+        for fcurve in action.fcurves if action else []:
+            points = list(fcurve.keyframe_points)
+            keyframes.append({
+                "id": name,
+                "id_type": id_type,
+                "data_path": fcurve.data_path,
+                "index": fcurve.array_index,
+                "keys": [_plain(point.co) for point in points],
+                "interpolation": sorted({point.interpolation for point in points}),
+            })
+    return keyframes
+
+
+def scene_snapshot(objects=None):
+    """The objects (all, by default), the materials they use and their keyframes, as plain JSON."""
+    objects = list(data.objects) if objects is None else objects
+    materials = []
+    for obj in objects:
+        for material in getattr(obj.data, "materials", []):
+            if material is not None and material not in materials:
+                materials.append(material)
+    owners = [('OBJECT', obj.name, obj) for obj in objects]
+    owners += [('MATERIAL', material.name, material.node_tree) for material in materials if material.node_tree]
+    return {
+        "frames": [context.scene.frame_start, context.scene.frame_end],
+        "camera": context.scene.camera.name if context.scene.camera else None,
+        "objects": [_object_snapshot(obj) for obj in objects],
+        "materials": {material.name: _material_snapshot(material) for material in materials},
+        "keyframes": _keyframes_snapshot(owners),
+    }
+
+
+def plan():
+    """Everything recorded so far: operator calls, outputs with their scenes and the current scene."""
+    return {"operations": list(PLAN["operations"]), "outputs": list(PLAN["outputs"]), "scene": scene_snapshot()}
+
+
+def reset():
+    """Start a new session: empty data, a fresh scene and context, and an empty plan."""
+    global data, context, app
+    data = BlendData()
+    context = Context()
+    app = App()
+    PLAN["operations"].clear()
+    PLAN["outputs"].clear()
+
+
+ops = _BPyOps()
+data = context = app = None
+reset()
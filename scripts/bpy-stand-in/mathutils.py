@@ -0,0 +1,102 @@
+"""
+Dry-run stand-in for mathutils
+==============================
+The Vector, Color, Euler and Matrix types the bpy stand-in hands out, backed by
+plain lists so scripts can index, assign and convert them like Blender's own.
+"""
+
+import numbers
+
+import numpy as np
+
+
+def _component(index):
+    return property(lambda self: self[index], lambda self, value: self.__setitem__(index, float(value)))
+
+
+class Vector(list):
+    """A mutable float sequence with the accessors and arithmetic of mathutils.Vector."""
+
+    x, y, z, w = (_component(i) for i in range(4))
+
+    def __init__(self, values=(0.0, 0.0, 0.0)):
+        super().__init__(float(value) for value in values)
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            super().__setitem__(index, [float(v) for v in value])
+        else:
+            super().__setitem__(index, float(value))
+
+    def __add__(self, other):
+        return type(self)(a + b for a, b in zip(self, other))
+
+    def __sub__(self, other):
+        return type(self)(a - b for a, b in zip(self, other))
+
+    def __mul__(self, other):
+        if isinstance(other, numbers.Real):
+            return type(self)(a * other for a in self)
+        return type(self)(a * b for a, b in zip(self, other))
+
+    __rmul__ = __mul__
+
+    def __neg__(self):
+        return type(self)(-a for a in self)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({tuple(self)})"
+
+    @property
+    def length(self):
+        return float(np.linalg.norm(self))
+
+    def dot(self, other):
+        return sum(a * b for a, b in zip(self, other))
+
+    def copy(self):
+        return type(self)(self)
+
+    def to_tuple(self, precision=-1):
+        return tuple(self if precision < 0 else (round(v, precision) for v in self))
+
+
+class Color(Vector):
+    """An RGB color."""
+
+    r, g, b = (_component(i) for i in range(3))
+
+    def __init__(self, values=(0.0, 0.0, 0.0)):
+        super().__init__(values)
+
+
+class Euler(Vector):
+    """XYZ rotation angles in radians."""
+
+    order = 'XYZ'
+
+
+class Matrix(list):
+    """A square matrix stored as a list of row Vectors."""
+
+    def __init__(self, rows=((1, 0, 0, 0), (0, 1, 0, 0), (0, 0, 1, 0), (0, 0, 0, 1))):
+        super().__init__(Vector(row) for row in rows)
+
+    @classmethod
+    def Identity(cls, size):
+        return cls(np.identity(size))
+
+    def __matmul__(self, other):
+        if isinstance(other, Matrix):
+            return Matrix(np.array(self) @ np.array(other))
+        vector = np.append(np.asarray(other, dtype=np.float64), 1.0)[:len(self)]
+        return Vector((np.array(self) @ vector)[:len(other)])
+
+    def inverted(self):
+        return Matrix(np.linalg.inv(np.array(self)))
+
+    def transposed(self):
+        return Matrix(np.array(self).T)
+
+    def to_translation(self):
+        return Vector(row[3] for row in self[:3])
@@ -6,6 +6,74 @@ Creates glass button hover/click animations and exports them as Lottie-compatibl
 
 Usage:
     /Applications/Blender.app/Contents/MacOS/Blender --background --python create-button-animations.py
+    /Applications/Blender.app/Contents/MacOS/Blender --background --python create-button-animations.py -- --profile preview
+
+Render profiles (--profile):
+    preview    - Workbench at half resolution, for checking layout and timing in seconds
+    draft      - Eevee, for checking motion with approximate glass shading
+    production - Cycles, the full glass look used for the shipped assets (default)
+    adaptive   - Cycles with adaptive sampling and OpenImageDenoise; add --time-limit to cap seconds per frame
+
+Every render writes render-stats.json (per-frame time and samples) next to its frames.
+
+Render options:
+    --synthesize     Path-trace only the distinct key poses of the hover and press buttons
+                     and composite the other frames from their passes, validated against
+                     true renders (synthesis.json in the frames directory)
+
+    --half-rate      Path-trace every other frame (and every keyed frame) and interpolate the
+                     rest from the Vector pass, checked against sparse true renders
+    --crop-border    Path-trace only each frame's projected object bounds plus a margin; the
+                     PNGs keep the full transparent canvas
+    --stream         Capture frames in memory from the compositor Viewer image and hand them
+                     to the atlas/delta/animated encoders and ffmpeg directly; add --no-png
+                     to skip archiving the PNG sequence
+    --theme NAME     Record light-group, emission and material-index passes (Cycles) and
+                     write recolored frames (<name>_frames_<theme>/) and Lottie files
+                     (<name>.<theme>.json) for each named palette in THEMES
+
+Post-processing (render command):
+    --dpr SCALE      Render once at the largest of the given device pixel ratios and derive
+                     each density (<frames dir>@2x/ ...) by premultiplied, linear-light
+                     downsampling, with a srcset manifest in <name>.srcset.json; the frame
+                     set the other options read is the largest density
+    --sprite-sheet   Trim the shared transparent margin and pack each frame set into one
+                     atlas (<name>.atlas.png, plus WebP/AVIF when cwebp/avifenc are installed)
+                     with a JSON frame map of offsets and durations
+    --delta-patches  Store only the regions that change between frames: <name>.delta.png
+                     holds the patches and <name>.delta.json the compositing manifest
+    --easings        Export every easing as CSS linear() custom properties (easings.css) and
+                     as Lottie bezier keyframes with error bounds (easings.json)
+    --optimize-lottie-runtime
+                     Rewrite costly Lottie constructs (rectangle masks, uniform gradients,
+                     static layers) into cheaper equivalents; every written Lottie gets a
+                     runtime cost score in lottie-cost-report.json, and --lottie-cost-gate
+                     fails the run when one exceeds --lottie-cost-budget
+    --css            Compile each Lottie into CSS @keyframes (<name>.css) and Web Animations
+                     API keyframes (<name>.waapi.json), reporting unsupported features
+    --optimize-png   Recompress the frame PNGs in parallel with the smallest zlib level, filter
+                     and strategy, without metadata; --png-quantize also tries a shared RGBA
+                     palette, kept per frame when SSIM >= --png-min-ssim
+                     (png-optimization.json in the frames directory)
+    --encode-motion  Encode animated AVIF/WebP/APNG at the highest quality that fits
+                     --motion-budget bytes (AVIF/WebP need avifenc/img2webp) and record the
+                     chosen settings in motion-encoding-report.json
+
+Commands:
+    render (default) - Render frames and write Lottie JSON for every animation
+    tune             - Render representative frames over a grid of Cycles settings, score them
+                       against a high-sample reference (SSIM/PSNR) and store the cheapest passing
+                       settings in button-render-profiles.json for that animation and profile
+    serve            - Keep Blender warm and render single frames on request over local HTTP
+                       (http://127.0.0.1:8765/ has a scrubbing page; --port, --cache-mb), caching
+                       PNGs in an LRU keyed by the scene state at each frame
+    Use --only NAME to limit render or tune to some animations.
+
+Animation specs:
+    Every animation is a declarative spec (ANIMATION_SPECS) of materials, objects, Lottie
+    layers and keyframed tracks with easings; one compiler builds the Blender scene and the
+    Lottie layers from it. --spec FILE adds the specs in a JSON file (one spec or a list),
+    all validated before the first is built and compiled in the same Blender session.
 
 Animations created:
     1. Glass Button Hover - Subtle glow intensifies, slight lift (3D feel)
@@ -13,17 +81,49 @@ Animations created:
     3. CTA Button Shine - Animated light sweep across button surface
     4. Icon Morph - Smooth transition between two states
 
+Tracing:
+    BLENDER_TRACE=trace.json blender --background --python create-button-animations.py
+    records every bpy.ops call and pipeline stage as a Chrome/Perfetto trace (open it in
+    ui.perfetto.dev or chrome://tracing) and prints the most expensive entries at exit;
+    the tracer lives in pipeline_trace.py, shared with generate-pen-models.py.
+
 Color scheme:
     - Teal: #6a8c8c
     - Sky Blue: #8caec4
 """
 
 import bpy
+import argparse
+import collections
+import concurrent.futures
+import functools
+import gzip
+import hashlib
+import http.server
+import itertools
 import math
 import json
 import os
+import re
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.parse
+import zlib
+import numpy as np
 from mathutils import Vector, Color
 
+try:
+    import brotli
+except ImportError:  # Optional, only used for the Lottie size report
+    brotli = None
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from pipeline_trace import traced  # noqa: E402  (BLENDER_TRACE profiling)
+
 # Configuration
 OUTPUT_DIR = "/Users/zacharydemillo/Desktop/WEBSITE PROJECT/public/animations/"
 FPS = 60
@@ -33,6 +133,203 @@ TEAL = (0.416, 0.549, 0.549, 1.0)  # #6a8c8c
 SKY_BLUE = (0.549, 0.682, 0.769, 1.0)  # #8caec4
 GLASS_BASE = (0.9, 0.95, 1.0, 0.3)  # Slightly blue-tinted glass
 
+# Theme palettes for --theme, keyed by the palette role each scene color above plays.
+# Themed variants are recolored from recorded passes rather than re-rendered.
+PALETTE_ROLES = {"teal": TEAL, "sky_blue": SKY_BLUE, "glass": GLASS_BASE}
+THEMES = {
+    "default": {"teal": "#6a8c8c", "sky_blue": "#8caec4", "glass": "#e6f2ff"},
+    "dark": {"teal": "#3d5c5c", "sky_blue": "#4f6f8a", "glass": "#8fa3b8"},
+    "warm": {"teal": "#8c6a5a", "sky_blue": "#c4a08c", "glass": "#fff2e6"},
+}
+
+# Render profiles, selectable per run with --profile. Each profile renders into
+# its own cached frame set, so a quick preview never overwrites production frames.
+RENDER_PROFILES = {
+    "preview": {
+        "engine": "BLENDER_WORKBENCH",
+        "samples": 8,  # Workbench anti-aliasing samples
+        "resolution_percentage": 50,
+        "webm": False,
+    },
+    "draft": {
+        "engine": "BLENDER_EEVEE",
+        "samples": 16,
+        "resolution_percentage": 100,
+        "webm": False,
+    },
+    "production": {
+        "engine": "CYCLES",
+        "samples": 64,  # Lower for faster render, still good quality
+        "max_bounces": 12,
+        "diffuse_bounces": 4,
+        "glossy_bounces": 4,
+        "transmission_bounces": 12,
+        "denoiser": "OPENIMAGEDENOISE",
+        "adaptive_threshold": 0.01,  # Blender's default noise threshold
+        "adaptive_min_samples": 0,
+        "time_limit": 0,
+        "resolution_percentage": 100,
+        "webm": True,
+    },
+    # Most pixels are empty transparent film and converge almost immediately, while
+    # refractive edges stay noisy. Adaptive sampling spends samples where the noise
+    # is and the denoiser cleans up the rest, so the ceiling can sit well above 64.
+    "adaptive": {
+        "engine": "CYCLES",
+        "samples": 256,
+        "max_bounces": 12,
+        "diffuse_bounces": 4,
+        "glossy_bounces": 4,
+        "transmission_bounces": 12,
+        "denoiser": "OPENIMAGEDENOISE",
+        "adaptive_threshold": 0.05,
+        "adaptive_min_samples": 16,
+        "time_limit": 0,  # Seconds per frame, 0 for no cap (see --time-limit)
+        "resolution_percentage": 100,
+        "webm": True,
+    },
+}
+DEFAULT_RENDER_PROFILE = "production"
+
+# Per-animation profile overrides written by the "tune" command: {animation: {profile: settings}}
+TUNED_PROFILES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "button-render-profiles.json")
+
+# Settings explored by the "tune" command. "bounces" sets both the total and the
+# transmission bounce limits, which are the ones that matter for glass.
+TUNING_GRID = {
+    "samples": (16, 32, 64, 128),
+    "adaptive_threshold": (0.01, 0.05, 0.1),
+    "denoiser": (None, "OPENIMAGEDENOISE"),
+    "bounces": (4, 8, 12),
+}
+TUNING_REFERENCE = {"samples": 1024, "adaptive_threshold": None, "denoiser": "OPENIMAGEDENOISE"}
+TUNING_FRAMES = 3
+TUNING_MIN_SSIM = 0.98
+TUNING_MIN_PSNR = 38.0  # dB
+
+# Largest deviation allowed when reducing sampled F-curves to Lottie keyframes, in
+# canvas pixels, scale percent, degrees and 0-1 color units respectively
+LOTTIE_FIT_TOLERANCE = {"position": 0.25, "scale": 0.25, "rotation": 0.25, "color": 0.004}
+
+# Decimal places kept in written Lottie files (see --lottie-precision)
+LOTTIE_PRECISION = 2
+# Compressed bytes a single Lottie file may take before the size report flags it.
+# Lottie files load on first paint, so they are held to a tight budget.
+LOTTIE_SIZE_BUDGET = 4 * 1024
+LOTTIE_SIZE_REPORT = "lottie-size-report.json"
+# Runtime cost model for lottie-web (see lottie_runtime_cost): weight per item the SVG and
+# canvas renderers redo every frame, and the score a file may reach before it is flagged.
+# Masks and gradient opacity stops each add an offscreen or SVG mask pass, so they dominate.
+LOTTIE_COST_WEIGHTS = {
+    "layer": 1.0,
+    "shape": 0.5,
+    "fill": 0.5,
+    "gradient": 3.0,
+    "gradient_stop": 0.25,
+    "gradient_opacity": 3.0,
+    "mask": 6.0,
+    "mask_vertex": 0.1,
+    "animated_property": 0.25,
+}
+LOTTIE_COST_BUDGET = 20.0
+LOTTIE_COST_REPORT = "lottie-cost-report.json"
+# Transform values lottie-web substitutes when the property is missing
+LOTTIE_TRANSFORM_DEFAULTS = {"a": [0, 0, 0], "s": [100, 100, 100], "o": 100, "r": 0}
+
+# Pass-based synthesis (--synthesize) for animations whose frames differ only by a rigid
+# lift/scale and the glass/emission mix: each distinct key pose is path-traced once into
+# Combined and Emit passes, and every frame is composited from them in NumPy. Frames are
+# checked against true renders and the whole set is rendered normally if any check fails.
+SYNTHESIS_OBJECTS = {"glass-button-hover": "GlassButton", "glass-button-press": "GlassButtonPress"}
+SYNTHESIS_KEY_MIX = 0.5  # Mix shader factor used for key pose renders
+SYNTHESIS_KEY_STRENGTH = 1.0  # Emission strength used for key pose renders
+SYNTHESIS_VALIDATION_FRAMES = 3
+SYNTHESIS_MIN_SSIM = 0.97
+SYNTHESIS_MIN_PSNR = 35.0
+
+# Border rendering (--crop-border): pixels of margin kept around the projected object
+# bounds, at 100% resolution
+CROP_MARGIN = 8
+
+# Delta encoding (--delta-patches and APNG frames): changes are found on a grid of
+# DELTA_TILE pixel tiles, and split regions are merged into one rectangle when they
+# cover more than DELTA_MERGE_RATIO of it anyway
+DELTA_TILE = 8
+DELTA_MERGE_RATIO = 0.8
+
+# Half-rate rendering (--half-rate): every other frame is path-traced and the ones in
+# between are interpolated along the Vector pass; one frame per validation run is also
+# rendered for real, and runs that miss the thresholds are rendered in full
+HALF_RATE_VALIDATION_FRAMES = 4
+HALF_RATE_MIN_SSIM = 0.97
+HALF_RATE_MIN_PSNR = 35.0
+
+# Preview server (serve command): local port and the byte budget of its frame cache
+SERVE_PORT = 8765
+SERVE_CACHE_BYTES = 256 * 1024 * 1024
+
+# Resolution ladder (--dpr): device pixel ratios derived from one render at the largest
+DPR_SCALES = (1, 2, 3)
+
+# Sprite-sheet atlas output (--sprite-sheet). WebP and AVIF need the cwebp and avifenc
+# command line tools; the PNG atlas is always written.
+ATLAS_FORMATS = ("webp", "avif")
+ATLAS_QUALITY = {"webp": 90, "avif": 70}
+ATLAS_MAX_SIZE = 16383  # WebP's dimension limit
+
+# Frame PNG optimization (--optimize-png): every frame is re-encoded with each zlib level,
+# filter (None picks one per row) and strategy below and the smallest result kept.
+# --png-quantize also tries one shared palette per frame set, kept per frame only at or
+# above PNG_QUANTIZE_MIN_SSIM.
+PNG_OPTIMIZE_LEVELS = (6, 9)
+PNG_OPTIMIZE_FILTERS = (None, 0, 1, 2, 3, 4)
+PNG_OPTIMIZE_STRATEGIES = (zlib.Z_DEFAULT_STRATEGY, zlib.Z_FILTERED, zlib.Z_RLE)
+PNG_STRATEGY_NAMES = {zlib.Z_DEFAULT_STRATEGY: "default", zlib.Z_FILTERED: "filtered", zlib.Z_RLE: "rle"}
+PNG_PALETTE_COLORS = 256
+PNG_PALETTE_SAMPLES = 250000
+PNG_PALETTE_WEIGHTS = np.sqrt([0.299, 0.587, 0.114])  # Rec. 601 luma shares
+PNG_QUANTIZE_MIN_SSIM = 0.99
+PNG_OPTIMIZE_REPORT = "png-optimization.json"
+
+# Animated image output (--encode-motion). Quality is binary-searched per format for the
+# highest setting whose file fits MOTION_BUDGET; the smallest result that still meets its
+# format's minimum quality is recommended. APNG quality posterizes color (100 = lossless).
+MOTION_FORMATS = ("avif", "webp", "apng")
+MOTION_BUDGET = 150 * 1024
+MOTION_QUALITY_RANGE = {"avif": (0, 100), "webp": (0, 100), "apng": (0, 100)}
+MOTION_MIN_QUALITY = {"avif": 50, "webp": 60, "apng": 40}
+MOTION_REPORT = "motion-encoding-report.json"
+
+# CSS/WAAPI output (--css): eases become cubic-bezier() or, with --css-easing linear,
+# linear() stop lists simplified to within CSS_LINEAR_TOLERANCE of the curve
+CSS_EASING = "cubic-bezier"
+CSS_EASING_SAMPLES = 65
+CSS_LINEAR_TOLERANCE = 0.002
+
+# Easing tables: cached lookup resolution, and the Lottie approximation tolerance as a
+# fraction of the eased value's range
+EASING_LUT_RESOLUTION = 256
+EASING_LOTTIE_TOLERANCE = 0.005
+
+# Button families written as one Lottie file each with --bundle-lottie. Members play
+# one after another on a single timeline; each segment (an inclusive Blender frame
+# range within its animation) becomes a named marker a page can play on demand.
+LOTTIE_BUNDLES = {
+    "button": {
+        "glass-button-hover": {"hover-in": (1, 15), "hover-out": (30, 45)},
+        "glass-button-press": {"press": (1, 30)},
+        "cta-button-shine": {"shine": (1, 60)},
+    },
+    "icon": {
+        "icon-morph": {"morph": (1, 45)},
+    },
+}
+
+# Eevee was renamed during the 4.x series; try each identifier in turn
+ENGINE_IDENTIFIERS = {
+    "BLENDER_EEVEE": ("BLENDER_EEVEE_NEXT", "BLENDER_EEVEE"),
+}
+
 
 def hex_to_rgb(hex_color):
     """Convert hex color to RGB tuple (0-1 range)."""
@@ -43,8 +340,12 @@ def hex_to_rgb(hex_color):
     return (r, g, b, 1.0)
 
 
+@traced
 def clear_scene():
-    """Remove all objects from the scene."""
+    """
+    Remove all objects from the scene and reset its compositor and render passes, then
+    every datablock nothing uses any more.
+    """
     bpy.ops.object.select_all(action='SELECT')
     bpy.ops.object.delete(use_global=False)
 
@@ -56,17 +357,84 @@ def clear_scene():
     for action in bpy.data.actions:
         bpy.data.actions.remove(action)
 
+    # Compositor nodes and render passes the last export switched on
+    scene = bpy.context.scene
+    if scene.node_tree is not None:
+        scene.node_tree.nodes.clear()
+    scene.use_nodes = False
+    for view_layer in scene.view_layers:
+        view_layer.use_pass_vector = False
+        view_layer.use_pass_emit = False
+        view_layer.use_pass_material_index = False
+
+    # Meshes, lights, cameras and images left without users
+    bpy.data.orphans_purge(do_local_ids=True, do_linked_ids=True, do_recursive=True)
+
+
+def set_render_engine(scene, engine):
+    """Select a render engine, accounting for identifiers that differ between Blender versions."""
+    for identifier in ENGINE_IDENTIFIERS.get(engine, (engine,)):
+        try:
+            scene.render.engine = identifier
+            return identifier
+        except TypeError:
+            continue
+    raise ValueError(f"Render engine {engine} is not available in this Blender build")
+
+
+def get_render_profile(profile, name=None, overrides=None):
+    """
+    Return a profile's settings with any tuned overrides for the named animation applied,
+    then the per-run overrides (such as --time-limit).
+    """
+    settings = dict(RENDER_PROFILES[profile])
+    if name and os.path.exists(TUNED_PROFILES_PATH):
+        with open(TUNED_PROFILES_PATH) as f:
+            settings.update(json.load(f).get(name, {}).get(profile, {}))
+    settings.update(overrides or {})
+    return settings
+
+
+def apply_render_profile(scene, settings):
+    """Apply the engine, sampling, bounce and denoiser settings of a render profile."""
+    engine = set_render_engine(scene, settings["engine"])
+
+    if engine == 'CYCLES':
+        scene.cycles.device = 'CPU'  # Use CPU for compatibility
+        scene.cycles.samples = settings["samples"]
+        scene.cycles.max_bounces = settings["max_bounces"]
+        scene.cycles.diffuse_bounces = settings["diffuse_bounces"]
+        scene.cycles.glossy_bounces = settings["glossy_bounces"]
+        scene.cycles.transmission_bounces = settings["transmission_bounces"]
+        scene.cycles.use_denoising = settings["denoiser"] is not None
+        if settings["denoiser"]:
+            scene.cycles.denoiser = settings["denoiser"]
+            scene.cycles.denoising_input_passes = 'RGB_ALBEDO_NORMAL'
+        scene.cycles.use_adaptive_sampling = settings["adaptive_threshold"] is not None
+        if settings["adaptive_threshold"] is not None:
+            scene.cycles.adaptive_threshold = settings["adaptive_threshold"]
+            scene.cycles.adaptive_min_samples = settings["adaptive_min_samples"]
+        scene.cycles.time_limit = settings["time_limit"]
+    elif engine == 'BLENDER_WORKBENCH':
+        scene.display.render_aa = str(settings["samples"])
+        scene.display.shading.light = 'STUDIO'
+        scene.display.shading.color_type = 'MATERIAL'
+    else:
+        scene.eevee.taa_render_samples = settings["samples"]
+        if hasattr(scene.eevee, "use_raytracing"):
+            scene.eevee.use_raytracing = True  # Needed for glass refraction in Eevee Next
+
 
-def setup_render_settings(frame_count):
+@traced
+def setup_render_settings(frame_count, profile=DEFAULT_RENDER_PROFILE, name=None, profile_overrides=None):
     """Configure render settings for web animation export."""
+    settings = get_render_profile(profile, name, profile_overrides)
     scene = bpy.context.scene
-    scene.render.engine = 'CYCLES'
-    scene.cycles.device = 'CPU'  # Use CPU for compatibility
-    scene.cycles.samples = 64  # Lower for faster render, still good quality
+    apply_render_profile(scene, settings)
 
     scene.render.resolution_x = 256
     scene.render.resolution_y = 128
-    scene.render.resolution_percentage = 100
+    scene.render.resolution_percentage = settings["resolution_percentage"]
     scene.render.film_transparent = True  # Transparent background
 
     scene.frame_start = 1
@@ -82,6 +450,7 @@ def create_glass_material(name, base_color=GLASS_BASE, emission_strength=0.0):
     """Create a premium glass material with optional emission."""
     mat = bpy.data.materials.new(name=name)
     mat.use_nodes = True
+    mat.diffuse_color = (*base_color[:3], 1.0)  # Shown by the Workbench preview profile
     nodes = mat.node_tree.nodes
     links = mat.node_tree.links
 
@@ -178,193 +547,207 @@ def setup_camera():
     return camera
 
 
-def ease_in_out_cubic(t):
-    """Cubic ease-in-out function for smooth animations."""
-    if t < 0.5:
-        return 4 * t * t * t
-    else:
-        return 1 - pow(-2 * t + 2, 3) / 2
-
-
-def ease_out_elastic(t):
-    """Elastic ease-out for bouncy effects."""
-    c4 = (2 * math.pi) / 3
-    if t == 0:
-        return 0
-    elif t == 1:
-        return 1
-    else:
-        return pow(2, -10 * t) * math.sin((t * 10 - 0.75) * c4) + 1
-
-
-def create_glass_button_hover_animation():
-    """
-    Animation 1: Glass Button Hover
-    - Subtle glow intensifies
-    - Slight lift (3D feel)
-    - 45 frames at 60fps (0.75 seconds)
-    """
-    print("Creating Glass Button Hover animation...")
-    clear_scene()
-
-    frame_count = 45
-    setup_render_settings(frame_count)
+def ease_linear(t):
+    """Identity easing."""
+    return np.asarray(t, dtype=np.float64)
 
-    # Create button
-    button = create_button_mesh()
-    button.name = "GlassButton"
 
-    # Create animated glass material
-    mat = create_glass_material("GlassHoverMaterial", emission_strength=0.0)
-    button.data.materials.append(mat)
-
-    # Get emission node for animation
-    emission_node = mat.node_tree.nodes.get("Emission")
-    mix_node = mat.node_tree.nodes.get("Mix Shader")
-
-    # Setup lighting and camera
-    setup_lighting()
-    setup_camera()
-
-    # Animate: Hover in (frames 1-15), Hold (15-30), Hover out (30-45)
-    # Position animation (lift effect)
-    button.location.z = 0
-    button.keyframe_insert(data_path="location", frame=1, index=2)
-
-    button.location.z = 0.15  # Lifted
-    button.keyframe_insert(data_path="location", frame=15, index=2)
-    button.keyframe_insert(data_path="location", frame=30, index=2)
-
-    button.location.z = 0
-    button.keyframe_insert(data_path="location", frame=45, index=2)
-
-    # Emission animation (glow intensifies)
-    emission_node.inputs['Strength'].default_value = 0.0
-    emission_node.inputs['Strength'].keyframe_insert(data_path="default_value", frame=1)
-
-    emission_node.inputs['Strength'].default_value = 0.8
-    emission_node.inputs['Strength'].keyframe_insert(data_path="default_value", frame=15)
-    emission_node.inputs['Strength'].keyframe_insert(data_path="default_value", frame=30)
-
-    emission_node.inputs['Strength'].default_value = 0.0
-    emission_node.inputs['Strength'].keyframe_insert(data_path="default_value", frame=45)
-
-    # Mix factor animation (more glass to emission blend)
-    mix_node.inputs[0].default_value = 0.1
-    mix_node.inputs[0].keyframe_insert(data_path="default_value", frame=1)
+def ease_in_out_cubic(t):
+    """Cubic ease-in-out function for smooth animations; accepts scalars or arrays."""
+    t = np.asarray(t, dtype=np.float64)
+    return np.where(t < 0.5, 4 * t ** 3, 1 - (-2 * t + 2) ** 3 / 2)
 
-    mix_node.inputs[0].default_value = 0.4
-    mix_node.inputs[0].keyframe_insert(data_path="default_value", frame=15)
-    mix_node.inputs[0].keyframe_insert(data_path="default_value", frame=30)
 
-    mix_node.inputs[0].default_value = 0.1
-    mix_node.inputs[0].keyframe_insert(data_path="default_value", frame=45)
+def ease_in_out_sine(t):
+    """Sine ease-in-out."""
+    return (1 - np.cos(np.pi * np.asarray(t, dtype=np.float64))) / 2
 
-    # Set easing on all keyframes
-    for fc in button.animation_data.action.fcurves:
-        for kf in fc.keyframe_points:
-            kf.interpolation = 'BEZIER'
-            kf.easing = 'EASE_IN_OUT'
 
-    # Export
-    export_animation("glass-button-hover", frame_count)
-    generate_lottie_json("glass-button-hover", frame_count, "hover")
+def ease_out_back(t):
+    """Ease-out that overshoots by about 10% before settling."""
+    c1 = 1.70158
+    c3 = c1 + 1
+    t = np.asarray(t, dtype=np.float64)
+    return 1 + c3 * (t - 1) ** 3 + c1 * (t - 1) ** 2
 
 
-def create_glass_button_press_animation():
+def ease_out_elastic(t):
+    """Elastic ease-out for bouncy effects; accepts scalars or arrays."""
+    c4 = (2 * math.pi) / 3
+    t = np.asarray(t, dtype=np.float64)
+    with np.errstate(over='ignore'):
+        eased = 2.0 ** (-10 * t) * np.sin((t * 10 - 0.75) * c4) + 1
+    return np.where(t <= 0, 0.0, np.where(t >= 1, 1.0, eased))
+
+
+def ease_out_bounce(t):
+    """Bounce ease-out: three decaying bounces after the first landing."""
+    n1, d1 = 7.5625, 2.75
+    t = np.asarray(t, dtype=np.float64)
+    return np.select(
+        [t < 1 / d1, t < 2 / d1, t < 2.5 / d1],
+        [n1 * t ** 2, n1 * (t - 1.5 / d1) ** 2 + 0.75, n1 * (t - 2.25 / d1) ** 2 + 0.9375],
+        n1 * (t - 2.625 / d1) ** 2 + 0.984375,
+    )
+
+
+# Easing name -> vectorized function of progress in [0, 1]
+EASINGS = {
+    "linear": ease_linear,
+    "ease-in-out-cubic": ease_in_out_cubic,
+    "ease-in-out-sine": ease_in_out_sine,
+    "ease-out-back": ease_out_back,
+    "ease-out-elastic": ease_out_elastic,
+    "ease-out-bounce": ease_out_bounce,
+}
+
+
+@functools.lru_cache(maxsize=None)
+def easing_lut(name, resolution=EASING_LUT_RESOLUTION):
+    """Read-only table of an easing sampled at resolution + 1 evenly spaced points."""
+    table = EASINGS[name](np.linspace(0.0, 1.0, resolution + 1))
+    table.flags.writeable = False
+    return table
+
+
+def evaluate_easing(name, t, resolution=None):
     """
-    Animation 2: Glass Button Press
-    - Quick compress and bounce back
-    - 30 frames at 60fps (0.5 seconds)
+    Evaluate an easing over an array of progress values, exactly or (with a
+    resolution) by linear interpolation in its cached lookup table.
     """
-    print("Creating Glass Button Press animation...")
-    clear_scene()
+    t = np.clip(np.asarray(t, dtype=np.float64), 0.0, 1.0)
+    if resolution is None:
+        return EASINGS[name](t)
+    return np.interp(t, np.linspace(0.0, 1.0, resolution + 1), easing_lut(name, resolution))
 
-    frame_count = 30
-    setup_render_settings(frame_count)
 
-    # Create button
-    button = create_button_mesh()
-    button.name = "GlassButtonPress"
+def easing_css(name, tolerance=CSS_LINEAR_TOLERANCE):
+    """CSS linear() stops that follow an easing to within tolerance."""
+    x = np.linspace(0.0, 1.0, EASING_LUT_RESOLUTION + 1)
+    return css_linear_easing(*simplify_stops(x, easing_lut(name), tolerance))
 
-    # Create glass material with teal tint
-    mat = create_glass_material("GlassPressedMaterial", base_color=(*TEAL[:3], 0.4))
-    button.data.materials.append(mat)
 
-    emission_node = mat.node_tree.nodes.get("Emission")
+def evaluate_lottie_ease(keyframes, t):
+    """
+    Evaluate Lottie keyframes produced by fit_lottie_keyframes at times t. Their time
+    handles sit at 1/3 and 2/3, where the bezier's x equals its parameter, so no
+    root finding is needed.
+    """
+    times = np.array([key["t"] for key in keyframes], dtype=np.float64)
+    t = np.asarray(t, dtype=np.float64)
+    result = np.empty_like(t)
+    for key, start, end in zip(keyframes, times, times[1:]):
+        inside = (t >= start) & (t <= end)
+        u = (t[inside] - start) / (end - start)
+        a, b = key["s"][0], key.get("e", key["s"])[0]
+        if key.get("h"):
+            progress = np.where(u < 1, 0.0, 1.0)
+        else:
+            out_y, in_y = key["o"]["y"], key["i"]["y"]
+            progress = 3 * (1 - u) ** 2 * u * out_y + 3 * (1 - u) * u ** 2 * in_y + u ** 3
+        result[inside] = a + (b - a) * progress
+    return result
+
+
+def easing_lottie_keyframes(name, start_frame, end_frame, start_value, end_value, tolerance):
+    """
+    Lottie keyframes for an eased transition between two values, approximated by as few
+    bezier segments as fit within tolerance. Returns the keyframes (frame times) and the
+    largest error measured against the exact easing at 8x the frame sampling.
+    """
+    span = end_frame - start_frame
+    progress = np.linspace(0.0, 1.0, span + 1)
+    values = start_value + (end_value - start_value) * EASINGS[name](progress)
+    keyframes = fit_lottie_keyframes(values[:, None], tolerance)
+    for key in keyframes:
+        key["t"] += start_frame
 
-    # Setup
-    setup_lighting()
-    setup_camera()
-
-    # Animation keyframes
-    # Press down (frames 1-8)
-    button.scale = (1.0, 1.0, 1.0)
-    button.keyframe_insert(data_path="scale", frame=1)
-    button.location.z = 0
-    button.keyframe_insert(data_path="location", frame=1, index=2)
-
-    # Compressed state (frame 8)
-    button.scale = (1.05, 1.05, 0.7)  # Squash
-    button.keyframe_insert(data_path="scale", frame=8)
-    button.location.z = -0.05
-    button.keyframe_insert(data_path="location", frame=8, index=2)
-
-    # Bounce overshoot (frame 15)
-    button.scale = (0.97, 0.97, 1.08)  # Stretch
-    button.keyframe_insert(data_path="scale", frame=15)
-    button.location.z = 0.08
-    button.keyframe_insert(data_path="location", frame=15, index=2)
-
-    # Settle bounce (frame 22)
-    button.scale = (1.01, 1.01, 0.98)
-    button.keyframe_insert(data_path="scale", frame=22)
-    button.location.z = -0.02
-    button.keyframe_insert(data_path="location", frame=22, index=2)
-
-    # Rest position (frame 30)
-    button.scale = (1.0, 1.0, 1.0)
-    button.keyframe_insert(data_path="scale", frame=30)
-    button.location.z = 0
-    button.keyframe_insert(data_path="location", frame=30, index=2)
-
-    # Flash on press
-    emission_node.inputs['Strength'].default_value = 0.0
-    emission_node.inputs['Strength'].keyframe_insert(data_path="default_value", frame=1)
-
-    emission_node.inputs['Strength'].default_value = 1.5
-    emission_node.inputs['Strength'].keyframe_insert(data_path="default_value", frame=8)
-
-    emission_node.inputs['Strength'].default_value = 0.3
-    emission_node.inputs['Strength'].keyframe_insert(data_path="default_value", frame=15)
-
-    emission_node.inputs['Strength'].default_value = 0.0
-    emission_node.inputs['Strength'].keyframe_insert(data_path="default_value", frame=30)
+    dense = np.linspace(0.0, 1.0, span * 8 + 1)
+    exact = start_value + (end_value - start_value) * EASINGS[name](dense)
+    error = float(np.abs(evaluate_lottie_ease(keyframes, start_frame + dense * span) - exact).max())
+    return keyframes, error
 
-    # Export
-    export_animation("glass-button-press", frame_count)
-    generate_lottie_json("glass-button-press", frame_count, "press")
 
+@traced
+def bake_easing(id_data, data_path, index, start_frame, end_frame, start_value, end_value, easing):
+    """
+    Key an eased transition on every frame of a property in one bulk write.
 
-def create_cta_button_shine_animation():
+    Keys already inside the range are replaced. The new keys are written with
+    keyframe_points.foreach_set and interpolate linearly, so Blender plays back exactly
+    the sampled easing (elastic and bounce included) instead of its own per-key
+    interpolation.
     """
-    Animation 3: CTA Button Shine
-    - Animated light sweep across button surface
-    - 60 frames at 60fps (1 second)
+    animation = id_data.animation_data or id_data.animation_data_create()
+    if animation.action is None:
+        animation.action = bpy.data.actions.new(f"{id_data.name}Action")
+    fcurves = animation.action.fcurves
+    fcurve = fcurves.find(data_path, index=index) or fcurves.new(data_path, index=index)
+
+    points = fcurve.keyframe_points
+    for point in reversed(list(points)):
+        if start_frame <= point.co[0] <= end_frame:
+            points.remove(point)
+
+    frames = np.arange(start_frame, end_frame + 1, dtype=np.float32)
+    values = start_value + (end_value - start_value) * evaluate_easing(
+        easing, (frames - start_frame) / max(end_frame - start_frame, 1))
+    first = len(points)
+    points.add(len(frames))
+    co = np.empty(len(points) * 2, dtype=np.float32)
+    points.foreach_get("co", co)
+    co[first * 2::2] = frames
+    co[first * 2 + 1::2] = values
+    points.foreach_set("co", co)
+    # New keys get handles on their own coordinates; keys outside the range keep theirs
+    handles = np.empty_like(co)
+    for attribute in ("handle_left", "handle_right"):
+        points.foreach_get(attribute, handles)
+        handles[first * 2:] = co[first * 2:]
+        points.foreach_set(attribute, handles)
+    for point in points[first:]:
+        point.interpolation = 'LINEAR'
+    fcurve.update()
+    return fcurve
+
+
+@traced
+def write_easing_tables(tolerance=EASING_LOTTIE_TOLERANCE):
     """
-    print("Creating CTA Button Shine animation...")
-    clear_scene()
+    Export every easing for the web: easings.css holds CSS custom properties with
+    linear() stop lists, easings.json the same stops plus Lottie bezier approximations
+    over 0-100 with their measured error bounds.
+    """
+    table = {}
+    lines = [":root {"]
+    for name in EASINGS:
+        css = easing_css(name)
+        keyframes, error = easing_lottie_keyframes(name, 0, 60, 0.0, 100.0, tolerance * 100)
+        table[name] = {
+            "css": css,
+            "lottie": {"frames": 60, "keyframes": keyframes, "max_error": round(error / 100, 5)},
+        }
+        lines.append(f"  --{name}: {css};")
+    lines.append("}")
+
+    with open(os.path.join(OUTPUT_DIR, "easings.css"), 'w') as f:
+        f.write("\n".join(lines) + "\n")
+    with open(os.path.join(OUTPUT_DIR, "easings.json"), 'w') as f:
+        json.dump(table, f, indent=2)
+    print(f"  Wrote {len(table)} easings to easings.css and easings.json")
+    return table
 
-    frame_count = 60
-    setup_render_settings(frame_count)
 
-    # Create button
-    button = create_button_mesh(width=2.5, height=0.7, depth=0.25)
-    button.name = "CTAButton"
+def create_shine_material(name):
+    """
+    Create the CTA glass whose emission is masked by a sharp gradient band.
 
-    # Create gradient glass material
-    mat = bpy.data.materials.new(name="CTAShineGlass")
+    The band position is the Mapping node's Location, which specs animate to sweep the
+    shine across the button.
+    """
+    mat = bpy.data.materials.new(name=name)
     mat.use_nodes = True
+    mat.diffuse_color = TEAL
     nodes = mat.node_tree.nodes
     links = mat.node_tree.links
     nodes.clear()
@@ -419,149 +802,504 @@ def create_cta_button_shine_animation():
     links.new(emission.outputs['Emission'], mix_shader.inputs[2])
     links.new(mix_shader.outputs['Shader'], output.inputs['Surface'])
 
-    button.data.materials.append(mat)
+    return mat
+
+
+def create_bar_mesh(scale):
+    """Create a box with its scale applied, used for icon strokes."""
+    bpy.ops.mesh.primitive_cube_add(size=1, location=(0, 0, 0))
+    bar = bpy.context.active_object
+    bar.scale = scale
+    bpy.ops.object.transform_apply(scale=True)
+    return bar
+
+
+# Declarative animation specs, one per animation. A spec names its materials, its
+# objects (mesh, material and Lottie layer) and keyframed tracks; build_spec_scene
+# compiles it into a Blender scene and generate_lottie_json into Lottie layers sampled
+# from that scene. Track values use the property's units, except rotation_euler which
+# is in degrees. A track's easing is "bezier" (Blender's default keyframes) or an
+# EASINGS name, baked per frame between consecutive keys. More specs can be loaded
+# from JSON files with --spec.
+ANIMATION_SPECS = [
+    {
+        "name": "glass-button-hover",
+        "title": "Glass Button Hover",  # Subtle glow intensifies, slight lift (0.75 seconds)
+        "frames": 45,
+        "materials": {"GlassHoverMaterial": {"type": "glass", "emission_strength": 0.0}},
+        "objects": [{
+            "name": "GlassButton",
+            "mesh": {"type": "button"},
+            "material": "GlassHoverMaterial",
+            "layer": {"nm": "Button", "fill_opacity": 80, "rest_color": "teal"},
+        }],
+        "tracks": [
+            # Hover in (frames 1-15), hold (15-30), hover out (30-45)
+            {"object": "GlassButton", "path": "location", "index": 2,
+             "keys": [[1, 0.0], [15, 0.15], [30, 0.15], [45, 0.0]]},
+            # Glow intensifies, with more glass to emission blend
+            {"material": "GlassHoverMaterial", "socket": ["Emission", "Strength"],
+             "keys": [[1, 0.0], [15, 0.8], [30, 0.8], [45, 0.0]]},
+            {"material": "GlassHoverMaterial", "socket": ["Mix Shader", 0],
+             "keys": [[1, 0.1], [15, 0.4], [30, 0.4], [45, 0.1]]},
+        ],
+    },
+    {
+        "name": "glass-button-press",
+        "title": "Glass Button Press",  # Quick compress and bounce back (0.5 seconds)
+        "frames": 30,
+        "materials": {"GlassPressedMaterial": {"type": "glass", "base_color": ["teal", 0.4]}},
+        "objects": [{
+            "name": "GlassButtonPress",
+            "mesh": {"type": "button"},
+            "material": "GlassPressedMaterial",
+            "layer": {"nm": "Button", "fill_opacity": 85, "rest_color": "teal"},
+        }],
+        "tracks": [
+            # Press down, squash (8), stretch overshoot (15), settle (22), rest (30)
+            {"object": "GlassButtonPress", "path": "scale",
+             "keys": [[1, [1.0, 1.0, 1.0]], [8, [1.05, 1.05, 0.7]], [15, [0.97, 0.97, 1.08]],
+                      [22, [1.01, 1.01, 0.98]], [30, [1.0, 1.0, 1.0]]]},
+            {"object": "GlassButtonPress", "path": "location", "index": 2,
+             "keys": [[1, 0.0], [8, -0.05], [15, 0.08], [22, -0.02], [30, 0.0]]},
+            # Flash on press
+            {"material": "GlassPressedMaterial", "socket": ["Emission", "Strength"],
+             "keys": [[1, 0.0], [8, 1.5], [15, 0.3], [30, 0.0]]},
+        ],
+    },
+    {
+        "name": "cta-button-shine",
+        "title": "CTA Button Shine",  # Light sweep across the button surface (1 second)
+        "frames": 60,
+        "materials": {"CTAShineGlass": {"type": "shine"}},
+        "objects": [{
+            "name": "CTAButton",
+            "mesh": {"type": "button", "width": 2.5, "height": 0.7, "depth": 0.25},
+            "material": "CTAShineGlass",
+            "layer": {"nm": "Button", "fill_opacity": 80, "rest_color": "teal"},
+        }],
+        "overlays": [{"type": "shine", "object": "CTAButton", "nm": "Shine"}],
+        "tracks": [
+            # Sweep the shine band from off left to off right: the band sits at
+            # (stop - location) / scale, so it moves against the Mapping location
+            {"material": "CTAShineGlass", "socket": ["Mapping", "Location"],
+             "keys": [[1, [2.0, 0.0, 0.0]], [60, [-2.0, 0.0, 0.0]]]},
+        ],
+    },
+    {
+        "name": "icon-morph",
+        "title": "Icon Morph",  # Plus spins and morphs into a checkmark (0.75 seconds)
+        "frames": 45,
+        "camera": {"location": [0, -4, 1], "rotation": [80, 0, 0]},
+        "materials": {
+            "IconGlass": {"type": "glass", "base_color": ["sky_blue", 0.6], "emission_strength": 0.3},
+        },
+        "objects": [{
+            "name": "HorizontalBar",  # Becomes the short arm of the check
+            "mesh": {"type": "bar", "scale": [0.8, 0.15, 0.1]},
+            "material": "IconGlass",
+            "layer": {"nm": "HBar", "shape": "Bar", "fill_opacity": 90, "radius": 4},
+        }, {
+            "name": "VerticalBar",  # Becomes the long arm of the check
+            "mesh": {"type": "bar", "scale": [0.15, 0.8, 0.1]},
+            "material": "IconGlass",
+            "layer": {"nm": "VBar", "shape": "Bar", "fill_opacity": 90, "radius": 4},
+        }],
+        "tracks": [
+            # Spin and shrink (frame 15), form the check (30), hold (45)
+            {"object": "HorizontalBar", "path": "rotation_euler",
+             "keys": [[1, [0, 0, 0]], [15, [0, 0, 180]], [30, [0, 0, -45]], [45, [0, 0, -45]]]},
+            {"object": "HorizontalBar", "path": "location",
+             "keys": [[1, [0.0, 0.0, 0.0]], [30, [-0.2, -0.1, 0.0]], [45, [-0.2, -0.1, 0.0]]]},
+            {"object": "HorizontalBar", "path": "scale",
+             "keys": [[1, [1.0, 1.0, 1.0]], [15, [0.5, 0.5, 0.5]], [30, [0.5, 1.0, 1.0]], [45, [0.5, 1.0, 1.0]]]},
+            {"object": "VerticalBar", "path": "rotation_euler",
+             "keys": [[1, [0, 0, 0]], [15, [0, 0, 180]], [30, [0, 0, 45]], [45, [0, 0, 45]]]},
+            {"object": "VerticalBar", "path": "location",
+             "keys": [[1, [0.0, 0.0, 0.0]], [30, [0.25, 0.15, 0.0]], [45, [0.25, 0.15, 0.0]]]},
+            {"object": "VerticalBar", "path": "scale",
+             "keys": [[1, [1.0, 1.0, 1.0]], [15, [0.5, 0.5, 0.5]], [30, [1.2, 1.0, 1.0]], [45, [1.2, 1.0, 1.0]]]},
+            # Emission pulse during the morph
+            {"material": "IconGlass", "socket": ["Emission", "Strength"],
+             "keys": [[1, 0.3], [15, 1.5], [30, 0.8], [45, 0.3]]},
+        ],
+    },
+]
+
+SPEC_MESH_TYPES = ("button", "bar")
+SPEC_MATERIAL_TYPES = ("glass", "shine")
+SPEC_OVERLAY_TYPES = ("shine",)
+
+
+def spec_color(value):
+    """Resolve a spec color: a hex string, a [palette role, alpha] pair or an RGBA list."""
+    if isinstance(value, str):
+        return hex_to_rgb(value)
+    if isinstance(value[0], str):
+        return (*PALETTE_ROLES[value[0]][:3], value[1])
+    return tuple(value)
+
+
+def validate_spec(spec):
+    """Check an animation spec's structure and references before anything is built."""
+    problems = [f"missing '{key}'" for key in ("name", "frames", "objects") if key not in spec]
+    materials = spec.get("materials", {})
+    objects = {obj.get("name") for obj in spec.get("objects", [])}
+    frame_count = spec.get("frames", 0)
+
+    for name, material in materials.items():
+        if material.get("type") not in SPEC_MATERIAL_TYPES:
+            problems.append(f"material {name} has unknown type {material.get('type')!r}")
+    for obj in spec.get("objects", []):
+        if obj.get("mesh", {}).get("type") not in SPEC_MESH_TYPES:
+            problems.append(f"object {obj.get('name')} has unknown mesh type {obj.get('mesh', {}).get('type')!r}")
+        if obj.get("material") not in materials:
+            problems.append(f"object {obj.get('name')} uses undefined material {obj.get('material')!r}")
+        if "layer" not in obj:
+            problems.append(f"object {obj.get('name')} has no Lottie layer")
+    for overlay in spec.get("overlays", []):
+        if overlay.get("type") not in SPEC_OVERLAY_TYPES or overlay.get("object") not in objects:
+            problems.append(f"overlay {overlay.get('nm')} needs a known type and object")
+    for number, track in enumerate(spec.get("tracks", []), 1):
+        if track.get("object") not in objects and track.get("material") not in materials:
+            problems.append(f"track {number} targets no defined object or material")
+        if track.get("easing", "bezier") not in ("bezier", *EASINGS):
+            problems.append(f"track {number} has unknown easing {track.get('easing')!r}")
+        frames = [key[0] for key in track.get("keys", [])]
+        if len(frames) < 2 or frames != sorted(frames) or frames[0] < 1 or frames[-1] > frame_count:
+            problems.append(f"track {number} needs two or more ordered keys within frames 1-{frame_count}")
+    if problems:
+        raise ValueError(f"Animation spec {spec.get('name', '?')}: " + "; ".join(problems))
+    return spec
+
+
+def load_animation_specs(path):
+    """Load and validate the animation specs in a JSON file (one spec or a list of them)."""
+    with open(path) as f:
+        specs = json.load(f)
+    return [validate_spec(spec) for spec in (specs if isinstance(specs, list) else [specs])]
+
+
+def spec_track_target(track, objects, materials):
+    """
+    Resolve a track to (owner, attribute, id_data, data_path): the RNA struct and
+    attribute keyframe_insert works on, and the datablock and path its F-curve lives on.
+    """
+    if "socket" in track:
+        node_tree = materials[track["material"]].node_tree
+        node_name, socket = track["socket"]
+        owner = node_tree.nodes[node_name].inputs[socket]
+        return owner, "default_value", node_tree, owner.path_from_id("default_value")
+    obj = objects[track["object"]]
+    return obj, track["path"], obj, track["path"]
+
+
+def apply_spec_track(track, objects, materials):
+    """Keyframe one spec track, with Blender keyframes or a baked easing between keys."""
+    owner, attribute, id_data, data_path = spec_track_target(track, objects, materials)
+    index = track.get("index", -1)
+    keys = track["keys"]
+    if attribute == "rotation_euler":
+        keys = [[frame, np.radians(value).tolist()] for frame, value in keys]
+
+    def set_value(value):
+        if index >= 0:
+            getattr(owner, attribute)[index] = value
+        else:
+            setattr(owner, attribute, value)
+
+    easing = track.get("easing", "bezier")
+    if easing == "bezier":
+        for frame, value in keys:
+            set_value(value)
+            owner.keyframe_insert(data_path=attribute, frame=frame, index=index)
+        return
+
+    set_value(keys[0][1])
+    vector = isinstance(keys[0][1], list)
+    components = range(len(keys[0][1])) if vector and index < 0 else [max(index, 0)]
+    for (start, a), (end, b) in zip(keys, keys[1:]):
+        for component in components:
+            start_value, end_value = (a[component], b[component]) if vector else (a, b)
+            bake_easing(id_data, data_path, component, start, end, start_value, end_value, easing)
+
+
+@traced
+def build_spec_scene(spec, profile=DEFAULT_RENDER_PROFILE, profile_overrides=None):
+    """
+    Compile an animation spec into the current Blender scene: render settings, materials,
+    objects, studio lighting, camera and keyframes. Returns the frame count.
+    """
+    print(f"Creating {spec.get('title', spec['name'])} animation...")
+    clear_scene()
+
+    frame_count = spec["frames"]
+    setup_render_settings(frame_count, profile, spec["name"], profile_overrides)
+
+    materials = {}
+    for name, material in spec.get("materials", {}).items():
+        if material["type"] == "shine":
+            materials[name] = create_shine_material(name)
+        else:
+            base_color = spec_color(material["base_color"]) if "base_color" in material else GLASS_BASE
+            materials[name] = create_glass_material(name, base_color, material.get("emission_strength", 0.0))
+
+    objects = {}
+    for obj_spec in spec["objects"]:
+        mesh = dict(obj_spec["mesh"])
+        if mesh.pop("type") == "bar":
+            obj = create_bar_mesh(mesh["scale"])
+        else:
+            obj = create_button_mesh(**mesh)
+        obj.name = obj_spec["name"]
+        obj.data.materials.append(materials[obj_spec["material"]])
+        objects[obj.name] = obj
 
-    # Setup
     setup_lighting()
-    setup_camera()
+    camera = setup_camera()
+    if "camera" in spec:
+        camera.location = spec["camera"]["location"]
+        camera.rotation_euler = [math.radians(angle) for angle in spec["camera"]["rotation"]]
 
-    # Animate shine sweep via mapping location
-    # Start off left
-    mapping.inputs['Location'].default_value = (-2.0, 0, 0)
-    mapping.inputs['Location'].keyframe_insert(data_path="default_value", frame=1)
+    for track in spec.get("tracks", []):
+        apply_spec_track(track, objects, materials)
+    return frame_count
 
-    # Sweep across
-    mapping.inputs['Location'].default_value = (2.0, 0, 0)
-    mapping.inputs['Location'].keyframe_insert(data_path="default_value", frame=60)
 
-    # Export
-    export_animation("cta-button-shine", frame_count)
-    generate_lottie_json("cta-button-shine", frame_count, "shine")
+# Animation name -> spec
+ANIMATIONS = {spec["name"]: validate_spec(spec) for spec in ANIMATION_SPECS}
 
 
-def create_icon_morph_animation():
+@traced
+def create_animation(name, profile=DEFAULT_RENDER_PROFILE, lottie_precision=LOTTIE_PRECISION, pretty_lottie=False,
+                     synthesize=False, themes=(), crop_border=False, stream=False, write_pngs=True,
+                     half_rate=False, optimize_runtime=False, render_scale=1, cost_budget=LOTTIE_COST_BUDGET,
+                     profile_overrides=None):
     """
-    Animation 4: Icon Morph
-    - Smooth transition between two states (plus to check)
-    - 45 frames at 60fps (0.75 seconds)
+    Build an animation's scene, then export its frames and Lottie JSON.
+
+    profile_overrides replaces render profile settings for this run only.
+    Returns the Lottie document and, when frames were streamed, the frame array.
     """
-    print("Creating Icon Morph animation...")
-    clear_scene()
+    spec = ANIMATIONS[name]
+    frame_count = build_spec_scene(spec, profile, profile_overrides)
 
-    frame_count = 45
-    setup_render_settings(frame_count)
+    # Export
+    frames = export_animation(name, frame_count, profile, synthesize, bool(themes), crop_border, stream, write_pngs,
+                              half_rate, render_scale, profile_overrides)
+    lottie = generate_lottie_json(name, frame_count, spec, lottie_precision, pretty_lottie, optimize_runtime,
+                                  cost_budget)
+
+    # Themed variants come from the recorded passes and the Lottie just written
+    passes_manifest = os.path.join(frames_dir_for(name, profile), "passes", "theme-passes.json")
+    for theme in themes:
+        if os.path.exists(passes_manifest):
+            recolor_frames(name, theme, profile)
+        write_lottie(recolor_lottie(lottie, theme), os.path.join(OUTPUT_DIR, f"{name}.{theme}.json"),
+                     lottie_precision, pretty_lottie, cost_budget)
+    return lottie, frames
+
+
+class RenderStatsRecorder:
+    """Record per-frame render time and sample count through Blender's render handlers."""
+
+    SAMPLE_PATTERN = re.compile(r"Sample (\d+)/(\d+)")
+
+    def __init__(self):
+        self.frames = []
+        self._started = None
+        self._samples = None
+
+    def __enter__(self):
+        bpy.app.handlers.render_pre.append(self.on_render_pre)
+        bpy.app.handlers.render_stats.append(self.on_render_stats)
+        bpy.app.handlers.render_post.append(self.on_render_post)
+        return self
+
+    def __exit__(self, *exc):
+        bpy.app.handlers.render_pre.remove(self.on_render_pre)
+        bpy.app.handlers.render_stats.remove(self.on_render_stats)
+        bpy.app.handlers.render_post.remove(self.on_render_post)
+
+    def on_render_pre(self, scene, *args):
+        self._started = time.perf_counter()
+        self._samples = None
+
+    def on_render_stats(self, stats, *args):
+        # Cycles reports progress as "Sample N/M"; the last report is what the frame used
+        match = self.SAMPLE_PATTERN.search(str(stats))
+        if match:
+            self._samples = int(match.group(1))
+
+    def on_render_post(self, scene, *args):
+        self.frames.append({
+            "frame": scene.frame_current,
+            "seconds": round(time.perf_counter() - self._started, 3),
+            "samples": self._samples,
+        })
+
+    def summary(self):
+        """Return average time and samples per frame across the recorded frames."""
+        seconds = [f["seconds"] for f in self.frames]
+        samples = [f["samples"] for f in self.frames if f["samples"] is not None]
+        return {
+            "frames": len(self.frames),
+            "total_seconds": round(sum(seconds), 3),
+            "mean_seconds": round(sum(seconds) / len(seconds), 3) if seconds else None,
+            "mean_samples": round(sum(samples) / len(samples), 1) if samples else None,
+        }
 
-    # Create plus icon (two crossing bars)
-    bpy.ops.mesh.primitive_cube_add(size=1, location=(0, 0, 0))
-    h_bar = bpy.context.active_object
-    h_bar.name = "HorizontalBar"
-    h_bar.scale = (0.8, 0.15, 0.1)
-    bpy.ops.object.transform_apply(scale=True)
+    def write(self, path, profile, settings):
+        """Write the per-frame records and their summary as JSON."""
+        with open(path, 'w') as f:
+            json.dump({
+                "profile": profile,
+                "settings": settings,
+                "summary": self.summary(),
+                "frames": self.frames,
+            }, f, indent=2)
 
-    bpy.ops.mesh.primitive_cube_add(size=1, location=(0, 0, 0))
-    v_bar = bpy.context.active_object
-    v_bar.name = "VerticalBar"
-    v_bar.scale = (0.15, 0.8, 0.1)
-    bpy.ops.object.transform_apply(scale=True)
 
-    # Create glass material for icon
-    mat = create_glass_material("IconGlass", base_color=(*SKY_BLUE[:3], 0.6), emission_strength=0.3)
-    h_bar.data.materials.append(mat)
-    v_bar.data.materials.append(mat)
+def frames_dir_for(name, profile=DEFAULT_RENDER_PROFILE):
+    """Return the PNG sequence directory for an animation rendered with a profile."""
+    if profile == DEFAULT_RENDER_PROFILE:
+        return os.path.join(OUTPUT_DIR, name + "_frames")
+    return os.path.join(OUTPUT_DIR, f"{name}_frames_{profile}")
 
-    emission_node = mat.node_tree.nodes.get("Emission")
 
-    # Setup
-    setup_lighting()
-    camera = setup_camera()
-    camera.location = (0, -4, 1)
-    camera.rotation_euler = (math.radians(80), 0, 0)
-
-    # Animation: Plus rotates and morphs to checkmark shape
-    # Frame 1: Plus icon
-    h_bar.rotation_euler = (0, 0, 0)
-    h_bar.keyframe_insert(data_path="rotation_euler", frame=1)
-    h_bar.location = (0, 0, 0)
-    h_bar.keyframe_insert(data_path="location", frame=1)
-    h_bar.scale = (1, 1, 1)
-    h_bar.keyframe_insert(data_path="scale", frame=1)
-
-    v_bar.rotation_euler = (0, 0, 0)
-    v_bar.keyframe_insert(data_path="rotation_euler", frame=1)
-    v_bar.location = (0, 0, 0)
-    v_bar.keyframe_insert(data_path="location", frame=1)
-    v_bar.scale = (1, 1, 1)
-    v_bar.keyframe_insert(data_path="scale", frame=1)
-
-    # Frame 15: Spin and scale down (transition)
-    h_bar.rotation_euler = (0, 0, math.radians(180))
-    h_bar.keyframe_insert(data_path="rotation_euler", frame=15)
-    h_bar.scale = (0.5, 0.5, 0.5)
-    h_bar.keyframe_insert(data_path="scale", frame=15)
-
-    v_bar.rotation_euler = (0, 0, math.radians(180))
-    v_bar.keyframe_insert(data_path="rotation_euler", frame=15)
-    v_bar.scale = (0.5, 0.5, 0.5)
-    v_bar.keyframe_insert(data_path="scale", frame=15)
-
-    # Frame 30-45: Transform to checkmark
-    # Horizontal bar becomes short arm of check
-    h_bar.rotation_euler = (0, 0, math.radians(-45))
-    h_bar.keyframe_insert(data_path="rotation_euler", frame=30)
-    h_bar.location = (-0.2, -0.1, 0)
-    h_bar.keyframe_insert(data_path="location", frame=30)
-    h_bar.scale = (0.5, 1, 1)
-    h_bar.keyframe_insert(data_path="scale", frame=30)
-
-    # Vertical bar becomes long arm of check
-    v_bar.rotation_euler = (0, 0, math.radians(45))
-    v_bar.keyframe_insert(data_path="rotation_euler", frame=30)
-    v_bar.location = (0.25, 0.15, 0)
-    v_bar.keyframe_insert(data_path="location", frame=30)
-    v_bar.scale = (1.2, 1, 1)
-    v_bar.keyframe_insert(data_path="scale", frame=30)
-
-    # Hold final position
-    h_bar.keyframe_insert(data_path="rotation_euler", frame=45)
-    h_bar.keyframe_insert(data_path="location", frame=45)
-    h_bar.keyframe_insert(data_path="scale", frame=45)
-
-    v_bar.keyframe_insert(data_path="rotation_euler", frame=45)
-    v_bar.keyframe_insert(data_path="location", frame=45)
-    v_bar.keyframe_insert(data_path="scale", frame=45)
-
-    # Emission pulse during morph
-    emission_node.inputs['Strength'].default_value = 0.3
-    emission_node.inputs['Strength'].keyframe_insert(data_path="default_value", frame=1)
-
-    emission_node.inputs['Strength'].default_value = 1.5
-    emission_node.inputs['Strength'].keyframe_insert(data_path="default_value", frame=15)
-
-    emission_node.inputs['Strength'].default_value = 0.8
-    emission_node.inputs['Strength'].keyframe_insert(data_path="default_value", frame=30)
-
-    emission_node.inputs['Strength'].default_value = 0.3
-    emission_node.inputs['Strength'].keyframe_insert(data_path="default_value", frame=45)
+def output_base(name, profile=DEFAULT_RENDER_PROFILE):
+    """Path prefix for derived outputs of a frame set, suffixed like its frames directory."""
+    suffix = "" if profile == DEFAULT_RENDER_PROFILE else f"_{profile}"
+    return os.path.join(OUTPUT_DIR, name + suffix)
 
-    # Export
-    export_animation("icon-morph", frame_count)
-    generate_lottie_json("icon-morph", frame_count, "morph")
 
+def render_cache_key(name, frame_count, profile, mode="render", profile_overrides=None):
+    """
+    Hash everything that affects a frame set: this script, the animation spec, the
+    profile settings and whether the frames were rendered or synthesized.
+    """
+    digest = hashlib.sha1()
+    with open(os.path.abspath(__file__), 'rb') as f:
+        digest.update(f.read())
+    settings = get_render_profile(profile, name, profile_overrides)
+    digest.update(json.dumps([name, frame_count, profile, settings, mode, ANIMATIONS.get(name)],
+                             sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def is_frame_cache_valid(frames_dir, frame_count, cache_key):
+    """Check whether a frame set was rendered with the same cache key and is complete."""
+    cache_path = os.path.join(frames_dir, ".render-cache.json")
+    if not os.path.exists(cache_path):
+        return False
+    with open(cache_path) as f:
+        if json.load(f).get("key") != cache_key:
+            return False
+    return all(
+        os.path.exists(os.path.join(frames_dir, f"frame_{frame:04d}.png"))
+        for frame in range(1, frame_count + 1)
+    )
+
+
+@traced
+def export_animation(name, frame_count, profile=DEFAULT_RENDER_PROFILE, synthesize=False, theme_passes=False,
+                     crop_border=False, stream=False, write_pngs=True, half_rate=False, render_scale=1,
+                     profile_overrides=None):
+    """
+    Export animation as PNG sequence (can be converted to video/Lottie).
+
+    render_scale multiplies the profile's resolution, for deriving a DPR ladder from one
+    render at the top density.
 
-def export_animation(name, frame_count):
-    """Export animation as PNG sequence (can be converted to video/Lottie)."""
+    With stream set, frames are captured in memory as they render and returned as a
+    (frames, height, width, 4) uint8 array; PNGs are then only written when write_pngs
+    is set, and WebM is piped to ffmpeg instead of rendering the animation again.
+    Otherwise None is returned and later stages read the PNG sequence.
+    """
     output_path = os.path.join(OUTPUT_DIR, name)
 
     # Create directory for frames
-    frames_dir = output_path + "_frames"
+    frames_dir = frames_dir_for(name, profile)
     os.makedirs(frames_dir, exist_ok=True)
 
+    settings = get_render_profile(profile, name, profile_overrides)
+    cycles = settings["engine"] == 'CYCLES'
+    if theme_passes and not cycles:
+        print(f"  Note: theme passes skipped (light groups need Cycles, {profile} is not a Cycles profile)")
+    theme_passes = theme_passes and cycles
+    synthesize = synthesize and not stream and not theme_passes and name in SYNTHESIS_OBJECTS and cycles
+    if half_rate and theme_passes:
+        print("  Note: half-rate rendering skipped (theme passes need every frame path-traced)")
+    half_rate = half_rate and not stream and not synthesize and not theme_passes and cycles
+    mode = "synthesize" if synthesize else "render+theme-passes" if theme_passes else "render"
+    if half_rate:
+        mode += "+half-rate"
+    if render_scale != 1:
+        mode += f"@{density_label(render_scale)}"
+        bpy.context.scene.render.resolution_percentage = round(
+            settings["resolution_percentage"] * render_scale)
+    cache_key = render_cache_key(name, frame_count, profile, mode, profile_overrides)
+    if is_frame_cache_valid(frames_dir, frame_count, cache_key):
+        print(f"  Using cached {profile} frames in: {frames_dir}")
+        return
+
+    if synthesize:
+        if synthesize_frames(name, frame_count, frames_dir):
+            with open(os.path.join(frames_dir, ".render-cache.json"), 'w') as f:
+                json.dump({"key": cache_key, "profile": profile, "frame_count": frame_count}, f)
+            print(f"  Exported synthesized PNG sequence to: {frames_dir}")
+            return
+        cache_key = render_cache_key(name, frame_count, profile, profile_overrides=profile_overrides)
+
+    if theme_passes:
+        passes_dir = os.path.join(frames_dir, "passes")
+        os.makedirs(passes_dir, exist_ok=True)
+        setup_theme_passes(bpy.context.scene, passes_dir)
+
+    webm = settings["webm"]
+    frame_stream = None
+    if stream:
+        scene = bpy.context.scene
+        sinks = [PngSequenceSink(frames_dir)] if write_pngs else []
+        if webm and shutil.which("ffmpeg"):
+            sinks.append(FfmpegSink(output_path + ".webm", *render_size(scene)))
+        elif webm:
+            print("  Note: WebM export skipped (ffmpeg not found)")
+        frame_stream = FrameStream(scene, frame_count, sinks)
+
     # Export PNG sequence
     bpy.context.scene.render.filepath = os.path.join(frames_dir, "frame_")
-    bpy.ops.render.render(animation=True)
+    with RenderStatsRecorder() as stats:
+        if half_rate:
+            borders = render_borders(bpy.context.scene, frame_count) if crop_border else None
+            render_half_rate(frame_count, frames_dir, borders)
+        elif crop_border:
+            render_cropped_frames(frame_count, frames_dir, stream=frame_stream)
+        elif frame_stream:
+            render_frames_individually(frame_count, frames_dir, stream=frame_stream)
+        else:
+            bpy.ops.render.render(animation=True)
+    if frame_stream:
+        frame_stream.close()
+    stats.write(os.path.join(frames_dir, "render-stats.json"), profile, settings)
+
+    summary = stats.summary()
+    samples = f" and {summary['mean_samples']} samples" if summary["mean_samples"] is not None else ""
+    print(f"  Rendered {summary['frames']} frames: {summary['mean_seconds']}s{samples} per frame on average")
+
+    if frame_stream and not write_pngs:
+        return frame_stream.frames
+
+    with open(os.path.join(frames_dir, ".render-cache.json"), 'w') as f:
+        json.dump({"key": cache_key, "profile": profile, "frame_count": frame_count}, f)
 
     print(f"  Exported PNG sequence to: {frames_dir}")
 
+    if frame_stream:
+        return frame_stream.frames
+    if not webm:
+        return
+
     # Try to export as video (WebM for web use)
     try:
         bpy.context.scene.render.image_settings.file_format = 'FFMPEG'
@@ -575,16 +1313,20 @@ def export_animation(name, frame_count):
         print(f"  Note: WebM export skipped ({e})")
 
 
-def generate_lottie_json(name, frame_count, animation_type):
+@traced
+def generate_lottie_json(name, frame_count, spec, precision=LOTTIE_PRECISION, pretty=False, optimize_runtime=False,
+                         cost_budget=LOTTIE_COST_BUDGET):
     """
     Generate a Lottie-compatible JSON file for the animation.
 
-    This creates a simplified Lottie animation that can be used directly
-    or as a template. For full Blender-to-Lottie conversion, consider:
-    - Using the io_export_lottie addon
-    - Converting the PNG sequence with tools like lottie-web
-    - Using After Effects with Bodymovin
+    Layer structure (shapes, names, fill opacity) comes from the layers and overlays of
+    the animation spec, while every animated value is converted from the F-curves of the
+    scene that was just built, so the vector version follows the rendered animation.
+    With optimize_runtime the layers are rewritten by optimize_lottie_runtime first.
     """
+    scene = bpy.context.scene
+    bpy.context.view_layer.update()  # Camera matrices are stale until the depsgraph updates
+    projection = camera_projection(scene.camera)
 
     # Base Lottie structure
     lottie = {
@@ -600,380 +1342,3216 @@ def generate_lottie_json(name, frame_count, animation_type):
         "layers": []
     }
 
-    # Create shape layer based on animation type
-    if animation_type == "hover":
-        lottie["layers"] = create_hover_lottie_layer(frame_count)
-    elif animation_type == "press":
-        lottie["layers"] = create_press_lottie_layer(frame_count)
-    elif animation_type == "shine":
-        lottie["layers"] = create_shine_lottie_layer(frame_count)
-    elif animation_type == "morph":
-        lottie["layers"] = create_morph_lottie_layer(frame_count)
+    # One shape layer per spec object, then overlays such as the CTA shine
+    tracks = {}
+    for obj_spec in spec["objects"]:
+        rest_color = obj_spec["layer"].get("rest_color")
+        tracks[obj_spec["name"]] = object_lottie_track(
+            bpy.data.objects[obj_spec["name"]], frame_count, projection,
+            rest_color=PALETTE_ROLES[rest_color] if rest_color else None)
+        lottie["layers"].append(create_object_lottie_layer(
+            frame_count, len(lottie["layers"]) + 1, obj_spec["layer"], tracks[obj_spec["name"]]))
+    for overlay in spec.get("overlays", []):
+        shine = shine_lottie_track(bpy.data.objects[overlay["object"]], frame_count, projection)
+        lottie["layers"].append(create_shine_lottie_layer(
+            frame_count, len(lottie["layers"]) + 1, overlay, tracks[overlay["object"]], shine))
+
+    if optimize_runtime:
+        lottie, changes = optimize_lottie_runtime(lottie)
+        for change in changes:
+            print(f"  Runtime rewrite: {change}")
 
     # Write Lottie JSON
     output_path = os.path.join(OUTPUT_DIR, f"{name}.json")
-    with open(output_path, 'w') as f:
-        json.dump(lottie, f, indent=2)
+    write_lottie(lottie, output_path, precision, pretty, cost_budget)
 
     print(f"  Generated Lottie JSON: {output_path}")
+    return lottie
 
 
-def create_hover_lottie_layer(frame_count):
-    """Create Lottie layers for hover animation."""
-    return [{
+def concatenate_lottie_property(segments, default):
+    """
+    Join per-animation Lottie properties into one property on a bundle timeline.
+
+    segments is a list of (offset, property) pairs in timeline order; a property of
+    None means the layer is absent from that animation and holds the default value.
+    """
+    keyframes = []
+    for offset, prop in segments:
+        if prop is None:
+            keyframes.append({"t": offset, "s": default if isinstance(default, list) else [default], "h": 1})
+        elif prop["a"]:
+            shifted = [dict(keyframe, t=keyframe["t"] + offset) for keyframe in prop["k"]]
+            shifted[-1]["h"] = 1  # Hold the final value until the next animation starts
+            keyframes.extend(shifted)
+        else:
+            keyframes.append({"t": offset, "s": prop["k"] if isinstance(prop["k"], list) else [prop["k"]], "h": 1})
+
+    if all("h" in keyframe and keyframe["s"] == keyframes[0]["s"] for keyframe in keyframes):
+        static = keyframes[0]["s"]
+        return {"a": 0, "k": static if isinstance(default, list) else static[0]}
+    return {"a": 1, "k": keyframes}
+
+
+def build_lottie_bundle(family, lotties):
+    """
+    Combine a button family's Lottie animations into one file with marker segments.
+
+    Layers that draw the same shape in several animations (hover and press both draw
+    ButtonShape) are written once as a precomp in "assets". The precomp's paint and the
+    layer's transform are concatenated across the bundle timeline, so every
+    interaction plays from the same layer and is hidden outside its own segments.
+    """
+    members = LOTTIE_BUNDLES[family]
+    first = lotties[next(iter(members))]
+    width, height = first["w"], first["h"]
+    center = [width / 2, height / 2, 0]
+
+    offsets = {}
+    markers = []
+    total = 0
+    for name, segments in members.items():
+        offsets[name] = total
+        for marker, (start, end) in segments.items():
+            markers.append({"tm": total + start - 1, "cm": marker, "dr": end - start})
+        total += lotties[name]["op"]
+
+    # Group layers by what they draw; paints are excluded since they are concatenated
+    groups = {}
+    for name in members:
+        for layer in lotties[name]["layers"]:
+            geometry = [shape for shape in layer["shapes"] if shape["ty"] not in ("fl", "gf")]
+            paints = [shape["ty"] for shape in layer["shapes"] if shape["ty"] in ("fl", "gf")]
+            key = json.dumps([layer["nm"], geometry, paints, layer.get("masksProperties")], sort_keys=True)
+            groups.setdefault(key, {})[name] = layer
+
+    assets = []
+    layers = []
+    for index, group in enumerate(groups.values(), start=1):
+        template = next(iter(group.values()))
+
+        def concatenate(getter, default):
+            return concatenate_lottie_property(
+                [(offsets[name], getter(group[name]) if name in group else None) for name in members],
+                default
+            )
+
+        shapes = []
+        for position, shape in enumerate(template["shapes"]):
+            shape = dict(shape)
+            if shape["ty"] in ("fl", "gf"):
+                for key in ("c", "o"):
+                    if key in shape:
+                        shape[key] = concatenate(lambda layer: layer["shapes"][position][key], shape[key]["k"]
+                                                 if not shape[key]["a"] else shape[key]["k"][0]["s"])
+            shapes.append(shape)
+
+        asset_id = f"{family}-{template['nm'].lower()}-{index}"
+        inner = {
+            "ddd": 0, "ind": 1, "ty": 4, "nm": template["nm"], "sr": 1,
+            "ks": {"p": {"a": 0, "k": center}},  # Centered so the precomp bounds don't clip it
+            "shapes": shapes,
+            "ip": 0, "op": total, "st": 0,
+        }
+        if template.get("hasMask"):
+            inner["hasMask"] = True
+            inner["masksProperties"] = template["masksProperties"]
+        assets.append({"id": asset_id, "nm": template["nm"], "layers": [inner]})
+
+        transform = {"a": {"a": 0, "k": center}}
+        for key, default in (("p", center), ("s", [100, 100, 100]), ("r", 0)):
+            transform[key] = concatenate(
+                lambda layer: layer["ks"].get(key, {"a": 0, "k": LOTTIE_TRANSFORM_DEFAULTS.get(key, default)}),
+                default
+            )
+        transform["o"] = concatenate(lambda layer: layer["ks"].get("o", {"a": 0, "k": 100}), 0)
+        layers.append({
+            "ddd": 0, "ind": index, "ty": 0, "nm": template["nm"], "refId": asset_id, "sr": 1,
+            "ks": transform,
+            "w": width, "h": height,
+            "ip": 0, "op": total, "st": 0,
+        })
+
+    return {
+        "v": first["v"],
+        "fr": first["fr"],
+        "ip": 0,
+        "op": total,
+        "w": width,
+        "h": height,
+        "nm": family,
         "ddd": 0,
-        "ind": 1,
+        "assets": assets,
+        "layers": layers,
+        "markers": markers,
+    }
+
+
+@traced
+def write_lottie_bundles(lotties, precision=LOTTIE_PRECISION, pretty=False, cost_budget=LOTTIE_COST_BUDGET):
+    """Write one bundled Lottie file per button family whose animations were all generated."""
+    for family, members in LOTTIE_BUNDLES.items():
+        missing = [name for name in members if name not in lotties]
+        if missing:
+            print(f"  Note: {family} bundle skipped (not generated: {', '.join(missing)})")
+            continue
+        output_path = os.path.join(OUTPUT_DIR, f"{family}.bundle.json")
+        write_lottie(build_lottie_bundle(family, lotties), output_path, precision, pretty, cost_budget)
+        print(f"  Generated Lottie bundle: {output_path} (markers: "
+              f"{', '.join(marker for segments in members.values() for marker in segments)})")
+
+
+def lottie_version(version):
+    """Parse a Lottie "v" string into a comparable tuple."""
+    return tuple(int(part) for part in version.split("."))
+
+
+def optimize_lottie(lottie, precision=LOTTIE_PRECISION):
+    """
+    Return a compact copy of a Lottie document.
+
+    Numbers are rounded to the given decimals (whole numbers become ints), keyframe end
+    values are dropped where the format version lets players read the next keyframe's
+    start instead, and fields equal to the player defaults are removed.
+    """
+    strip_end_values = lottie_version(lottie.get("v", "0.0.0")) >= (5, 5, 0)
+
+    def walk(node, key=None):
+        if isinstance(node, float):
+            value = round(node, precision) + 0.0
+            return int(value) if value.is_integer() else value
+        if isinstance(node, list):
+            return [walk(item) for item in node]
+        if not isinstance(node, dict):
+            return node
+
+        node = {k: walk(v, k) for k, v in node.items()}
+        if strip_end_values and "t" in node and "s" in node and "ty" not in node:
+            node.pop("e", None)  # A keyframe, not a gradient fill's start/end points
+        if key == "ks":
+            for prop, default in LOTTIE_TRANSFORM_DEFAULTS.items():
+                if node.get(prop) == {"a": 0, "k": default}:
+                    del node[prop]
+        if node.get("ddd") == 0:
+            del node["ddd"]
+        if node.get("hasMask") is False:
+            del node["hasMask"]
+        return node
+
+    return walk(lottie)
+
+
+def update_report(report_path, key, entry):
+    """Merge one entry into a shared JSON report, keeping the other assets' entries."""
+    reports = {}
+    if os.path.exists(report_path):
+        with open(report_path) as f:
+            reports = json.load(f)
+    reports[key] = entry
+    with open(report_path, 'w') as f:
+        json.dump(reports, f, indent=2, sort_keys=True)
+
+
+def lottie_size_report(path, budget=LOTTIE_SIZE_BUDGET):
+    """Measure a written Lottie file raw, gzipped and (when available) brotli-compressed."""
+    with open(path, 'rb') as f:
+        raw = f.read()
+    report = {
+        "bytes": len(raw),
+        "gzip": len(gzip.compress(raw, compresslevel=9)),
+        "brotli": len(brotli.compress(raw, quality=11)) if brotli else None,
+        "budget": budget,
+    }
+    report["over_budget"] = min(v for v in (report["gzip"], report["brotli"]) if v is not None) > budget
+    return report
+
+
+@traced
+def write_lottie(lottie, path, precision=LOTTIE_PRECISION, pretty=False, cost_budget=LOTTIE_COST_BUDGET):
+    """
+    Write a Lottie document minified (or indented for debugging) and record its size and
+    its runtime cost against cost_budget.
+    """
+    with open(path, 'w') as f:
+        if pretty:
+            json.dump(lottie, f, indent=2)
+        else:
+            json.dump(optimize_lottie(lottie, precision), f, separators=(',', ':'))
+
+    report = lottie_size_report(path)
+    update_report(os.path.join(os.path.dirname(path), LOTTIE_SIZE_REPORT), os.path.basename(path), report)
+
+    brotli_size = f", {report['brotli']} B brotli" if report["brotli"] is not None else ""
+    print(f"  Lottie size: {report['bytes']} B raw, {report['gzip']} B gzip{brotli_size} "
+          f"(budget {report['budget']} B)")
+    if report["over_budget"]:
+        print(f"  Warning: {os.path.basename(path)} is over its compressed size budget")
+
+    cost = lottie_runtime_cost(lottie, cost_budget)
+    update_report(os.path.join(os.path.dirname(path), LOTTIE_COST_REPORT), os.path.basename(path), cost)
+    print(f"  Lottie runtime cost: {cost['score']} (budget {cost['budget']})")
+    for finding in cost["findings"]:
+        print(f"    {finding}")
+    return report
+
+
+def lottie_animated(node):
+    """Count the animated properties ({"a": 1, ...}) anywhere under a Lottie node."""
+    if isinstance(node, list):
+        return sum(lottie_animated(item) for item in node)
+    if not isinstance(node, dict):
+        return 0
+    return int(node.get("a") == 1 and "k" in node) + sum(lottie_animated(value) for value in node.values())
+
+
+def lottie_shapes(shapes):
+    """Yield shape items depth first, descending into groups."""
+    for shape in shapes:
+        yield shape
+        if shape.get("ty") == "gr":
+            yield from lottie_shapes(shape.get("it", []))
+
+
+def gradient_stops(shape):
+    """Return (color stop count, opacity stops as (position, alpha) pairs) of a gradient."""
+    count = shape["g"]["p"]
+    data = shape["g"]["k"]
+    values = data["k"] if not data.get("a") else data["k"][0]["s"]
+    opacity = values[count * 4:]
+    return count, list(zip(opacity[0::2], opacity[1::2]))
+
+
+def lottie_runtime_cost(lottie, budget=LOTTIE_COST_BUDGET):
+    """
+    Estimate the per-frame rendering cost of a Lottie document for lottie-web.
+
+    The score is a weighted count of what the SVG and canvas renderers redo every frame:
+    layers, drawn shapes, fills, gradients and their stops, masks and their vertices, and
+    animated properties (see LOTTIE_COST_WEIGHTS). Findings name the costly constructs
+    per layer so they can be rewritten or redesigned.
+    """
+    weights = LOTTIE_COST_WEIGHTS
+    counts = dict.fromkeys(weights, 0)
+    findings = []
+    layers = list(lottie.get("layers", []))
+    for asset in lottie.get("assets", []):
+        layers.extend(asset.get("layers", []))
+
+    for layer in layers:
+        name = layer.get("nm", layer.get("ind"))
+        counts["layer"] += 1
+        counts["animated_property"] += lottie_animated(layer)
+        masks = layer.get("masksProperties", []) if layer.get("hasMask", True) else []
+        if masks:
+            counts["mask"] += len(masks)
+            counts["mask_vertex"] += sum(len(mask["pt"]["k"]["v"]) if not mask["pt"].get("a")
+                                         else len(mask["pt"]["k"][0]["s"][0]["v"]) for mask in masks)
+            findings.append(f"{name}: {len(masks)} mask(s), an extra render pass each")
+        for shape in lottie_shapes(layer.get("shapes", [])):
+            kind = shape.get("ty")
+            if kind in ("rc", "el", "sh", "sr"):
+                counts["shape"] += 1
+            elif kind in ("fl", "st"):
+                counts["fill"] += 1
+            elif kind in ("gf", "gs"):
+                stops, opacity = gradient_stops(shape)
+                counts["gradient"] += 1
+                counts["gradient_stop"] += stops + len(opacity)
+                if opacity:
+                    counts["gradient_opacity"] += 1
+                    findings.append(f"{name}: gradient {shape.get('nm')} has opacity stops, drawn through an alpha mask")
+
+    score = sum(weights[key] * count for key, count in counts.items())
+    return {
+        "score": round(score, 2),
+        "counts": counts,
+        "findings": findings,
+        "budget": budget,
+        "over_budget": score > budget,
+    }
+
+
+def rect_mask_bounds(mask):
+    """Return (left, top, right, bottom) of a static, opaque, axis-aligned rectangle mask, else None."""
+    path = mask.get("pt", {})
+    if (mask.get("inv") or mask.get("mode", "a") not in ("a", "i") or path.get("a")
+            or mask.get("o", {"a": 0, "k": 100}) != {"a": 0, "k": 100}):
+        return None
+    shape = path["k"]
+    vertices = np.round(np.array(shape["v"], dtype=np.float64), 6)
+    if not shape.get("c") or len(vertices) != 4 or np.abs(np.array(shape["i"] + shape["o"])).max() > 0:
+        return None
+    xs, ys = np.unique(vertices[:, 0]), np.unique(vertices[:, 1])
+    corners = {(x, y) for x in xs for y in ys}
+    if len(xs) != 2 or len(ys) != 2 or {tuple(v) for v in vertices} != corners:
+        return None
+    return float(xs[0]), float(ys[0]), float(xs[1]), float(ys[1])
+
+
+def clip_layer_to_mask(layer):
+    """
+    Replace a rectangle mask with the rectangles it clips: when a layer draws only static,
+    square-cornered rectangles and fills, intersecting each rectangle with the mask gives
+    the same pixels without the mask pass. Returns whether the layer changed.
+    """
+    masks = layer.get("masksProperties", [])
+    if not layer.get("hasMask") or len(masks) != 1:
+        return False
+    bounds = rect_mask_bounds(masks[0])
+    shapes = layer.get("shapes", [])
+    if bounds is None or any(shape.get("ty") not in ("rc", "fl", "gf") for shape in shapes):
+        return False
+    rects = [shape for shape in shapes if shape["ty"] == "rc"]
+    if any(rect["s"].get("a") or rect["p"].get("a") or rect["r"].get("a") or rect["r"]["k"] for rect in rects):
+        return False
+
+    left, top, right, bottom = bounds
+    for rect in rects:
+        (x, y), (width, height) = rect["p"]["k"], rect["s"]["k"]
+        x0, x1 = max(x - width / 2, left), min(x + width / 2, right)
+        y0, y1 = max(y - height / 2, top), min(y + height / 2, bottom)
+        rect["s"] = {"a": 0, "k": [max(x1 - x0, 0.0), max(y1 - y0, 0.0)]}
+        rect["p"] = {"a": 0, "k": [(x0 + x1) / 2, (y0 + y1) / 2]}
+    layer["hasMask"] = False
+    del layer["masksProperties"]
+    return True
+
+
+def simplify_gradient(shape):
+    """
+    Drop opacity stops that are all opaque, and turn a gradient whose color stops are
+    identical into a solid fill. Returns the replacement shape (or the same one).
+    """
+    if shape.get("ty") != "gf" or shape["g"]["k"].get("a"):
+        return shape
+    count, opacity = gradient_stops(shape)
+    values = shape["g"]["k"]["k"]
+    if opacity and all(alpha == 1 for _, alpha in opacity):
+        shape["g"]["k"]["k"] = values = values[:count * 4]
+        opacity = []
+    colors = {tuple(values[i + 1:i + 4]) for i in range(0, count * 4, 4)}
+    if len(colors) == 1 and not opacity:
+        return {"ty": "fl", "c": {"a": 0, "k": [*colors.pop(), 1]}, "o": shape["o"], "r": shape.get("r", 1),
+                "nm": shape.get("nm")}
+    return shape
+
+
+def shape_group(layer):
+    """Wrap a layer's shapes in a group so its fills stay confined to its own paths."""
+    identity = {"ty": "tr", "p": {"a": 0, "k": [0, 0]}, "a": {"a": 0, "k": [0, 0]}, "s": {"a": 0, "k": [100, 100]},
+                "r": {"a": 0, "k": 0}, "o": {"a": 0, "k": 100}}
+    return {"ty": "gr", "nm": layer.get("nm"), "it": layer["shapes"] + [identity]}
+
+
+def merge_static_layers(layers):
+    """
+    Merge runs of adjacent static shape layers that share a transform and timing into one
+    layer of groups, front to back. Layers that are parented, matted, masked or animated
+    are left alone.
+    """
+    parents = {layer.get("parent") for layer in layers}
+
+    def mergeable(layer):
+        return (layer.get("ty") == 4 and not lottie_animated(layer) and not layer.get("hasMask")
+                and not {"parent", "tt", "td"} & layer.keys() and layer.get("ind") not in parents)
+
+    def timing(layer):
+        return [layer.get(key) for key in ("ks", "ip", "op", "st", "sr")]
+
+    merged = []
+    for layer in layers:
+        previous = merged[-1] if merged else None
+        if previous is not None and mergeable(previous) and mergeable(layer) and timing(previous) == timing(layer):
+            if not previous.get("merged"):
+                previous["shapes"] = [shape_group(previous)]
+                previous["merged"] = True
+            previous["shapes"].append(shape_group(layer))
+            previous["nm"] = f"{previous['nm']}+{layer['nm']}"
+        else:
+            merged.append(layer)
+    for layer in merged:
+        layer.pop("merged", None)
+    return merged
+
+
+def optimize_lottie_runtime(lottie):
+    """
+    Rewrite costly Lottie constructs into cheaper equivalents that draw the same frames:
+    drop hidden and fully transparent layers, clip rectangles by rectangle masks instead
+    of masking, simplify gradients and merge static layers. Returns the rewritten copy
+    and a list of the changes made.
+    """
+    lottie = json.loads(json.dumps(lottie))
+    changes = []
+    compositions = [lottie] + [asset for asset in lottie.get("assets", []) if "layers" in asset]
+    for composition in compositions:
+        kept = []
+        for layer in composition["layers"]:
+            name = layer.get("nm", layer.get("ind"))
+            if layer.get("hd") or layer.get("ks", {}).get("o") == {"a": 0, "k": 0}:
+                changes.append(f"{name}: removed invisible layer")
+                continue
+            if clip_layer_to_mask(layer):
+                changes.append(f"{name}: clipped shapes to the rectangle mask and dropped the mask")
+            for i, shape in enumerate(layer.get("shapes", [])):
+                before = json.dumps(shape)
+                layer["shapes"][i] = simplify_gradient(shape)
+                if json.dumps(layer["shapes"][i]) != before:
+                    changes.append(f"{name}: simplified gradient {shape.get('nm')}")
+            kept.append(layer)
+        count = len(kept)
+        composition["layers"] = merge_static_layers(kept)
+        if len(composition["layers"]) < count:
+            changes.append(f"merged {count - len(composition['layers'])} static layer(s) into their neighbours")
+    return lottie, changes
+
+
+def sample_property(id_data, data_path, index, static_value, frame_count):
+    """Evaluate an animated property at frames 1..frame_count, or repeat its value if not animated."""
+    fcurve = None
+    animation = getattr(id_data, "animation_data", None)
+    if animation and animation.action:
+        fcurve = animation.action.fcurves.find(data_path, index=index)
+    if fcurve is None:
+        return np.full(frame_count, float(static_value))
+    return np.array([fcurve.evaluate(frame) for frame in range(1, frame_count + 1)])
+
+
+def sample_socket(node_tree, socket, frame_count):
+    """Evaluate a shader socket's default value, which may be keyframed on the node tree."""
+    data_path = socket.path_from_id("default_value")
+    return sample_property(node_tree, data_path, 0, socket.default_value, frame_count)
+
+
+def sample_transform(obj, frame_count):
+    """Per-frame location, rotation (XYZ Euler) and scale of an object, each shaped (N, 3)."""
+    return tuple(
+        np.stack([
+            sample_property(obj, data_path, i, getattr(obj, data_path)[i], frame_count)
+            for i in range(3)
+        ], axis=1)
+        for data_path in ("location", "rotation_euler", "scale")
+    )
+
+
+def camera_projection(camera, width=256, height=128):
+    """Capture the camera parameters needed to project world points onto the Lottie canvas."""
+    data = camera.data
+    fit_width = data.sensor_fit == 'HORIZONTAL' or (data.sensor_fit == 'AUTO' and width >= height)
+    sensor = data.sensor_width if data.sensor_fit in ('AUTO', 'HORIZONTAL') else data.sensor_height
+    return {
+        "world_to_camera": np.array(camera.matrix_world.inverted()),
+        "focal": data.lens / sensor * (width if fit_width else height),  # In pixels
+        "shift": (data.shift_x * max(width, height), data.shift_y * max(width, height)),
+        "width": width,
+        "height": height,
+    }
+
+
+def project_points(points, projection):
+    """Project world-space points (..., 3) to canvas pixels (..., 2) with y pointing down."""
+    points = np.asarray(points, dtype=np.float64)
+    homogeneous = np.concatenate([points, np.ones(points.shape[:-1] + (1,))], axis=-1)
+    camera_space = homogeneous @ projection["world_to_camera"].T
+    depth = -camera_space[..., 2]  # Blender cameras look down -Z
+    x = projection["width"] / 2 + projection["shift"][0] + projection["focal"] * camera_space[..., 0] / depth
+    y = projection["height"] / 2 - projection["shift"][1] - projection["focal"] * camera_space[..., 1] / depth
+    return np.stack([x, y], axis=-1)
+
+
+def transform_matrices(location, rotation, scale):
+    """Build (N, 4, 4) world matrices from per-frame location, XYZ Euler rotation and scale."""
+    cx, cy, cz = np.cos(rotation).T
+    sx, sy, sz = np.sin(rotation).T
+    rot = np.empty((len(location), 3, 3))
+    rot[:, 0, 0] = cy * cz
+    rot[:, 0, 1] = sx * sy * cz - cx * sz
+    rot[:, 0, 2] = cx * sy * cz + sx * sz
+    rot[:, 1, 0] = cy * sz
+    rot[:, 1, 1] = sx * sy * sz + cx * cz
+    rot[:, 1, 2] = cx * sy * sz - sx * cz
+    rot[:, 2, 0] = -sy
+    rot[:, 2, 1] = sx * cy
+    rot[:, 2, 2] = cx * cy
+    matrices = np.zeros((len(location), 4, 4))
+    matrices[:, :3, :3] = rot * scale[:, None, :]
+    matrices[:, :3, 3] = location
+    matrices[:, 3, 3] = 1.0
+    return matrices
+
+
+def screen_track(matrices, corners, projection):
+    """
+    Follow an object's bounding box on screen.
+
+    The angle comes from the projected local X axis. The box is measured in that rotated
+    frame, so a spinning bar keeps its own length and thickness instead of growing an
+    axis-aligned bounding box. Returns centers (N, 2), angles in degrees (N,) and
+    extents (N, 2), all in canvas pixels.
+    """
+    world = np.einsum('nij,kj->nki', matrices[:, :3, :3], corners) + matrices[:, None, :3, 3]
+    screen = project_points(world, projection)
+    origin = project_points(matrices[:, :3, 3], projection)
+    axis = project_points(matrices[:, :3, 3] + matrices[:, :3, 0], projection) - origin
+    angles = np.unwrap(np.arctan2(axis[:, 1], axis[:, 0]))
+
+    cos, sin = np.cos(angles)[:, None], np.sin(angles)[:, None]
+    offset = screen - origin[:, None, :]
+    local = np.stack([offset[..., 0] * cos + offset[..., 1] * sin, offset[..., 1] * cos - offset[..., 0] * sin], axis=-1)
+    low, high = local.min(axis=1), local.max(axis=1)
+    middle = (low + high) / 2
+    centers = origin + np.stack([middle[:, 0] * cos[:, 0] - middle[:, 1] * sin[:, 0],
+                                 middle[:, 0] * sin[:, 0] + middle[:, 1] * cos[:, 0]], axis=-1)
+    return centers, np.degrees(angles), high - low
+
+
+def fit_segment_ease(values, start, end, tolerance):
+    """
+    Fit a Lottie bezier ease to the samples between two keyframes.
+
+    With the time handles fixed at 1/3 and 2/3 the curve is a cubic in normalized time,
+    so the two value handles come from a linear least-squares fit of the progress
+    along the segment. Returns (out_y, in_y, max_error).
+    """
+    segment = values[start:end + 1]
+    delta = segment[-1] - segment[0]
+    if np.sqrt(delta @ delta) <= tolerance:
+        # Ends within tolerance of where it started: progress normalized by such a small
+        # delta gives huge handles, so report the deviation and leave it to be held or split
+        return 0.0, 0.0, float(np.abs(segment - segment[0]).max())
+    u = np.linspace(0.0, 1.0, len(segment))
+    if len(segment) > 2:
+        progress = (segment - segment[0]) @ delta / (delta @ delta)
+        basis = np.stack([3 * (1 - u) ** 2 * u, 3 * (1 - u) * u ** 2], axis=1)
+        (out_y, in_y), *_ = np.linalg.lstsq(basis, progress - u ** 3, rcond=None)
+    else:
+        out_y, in_y = 1 / 3, 2 / 3
+    eased = 3 * (1 - u) ** 2 * u * out_y + 3 * (1 - u) * u ** 2 * in_y + u ** 3
+    error = np.abs(segment[0] + eased[:, None] * delta - segment).max()
+    return float(out_y), float(in_y), float(error)
+
+
+def segment_error(values, start, end, tolerance):
+    """Return the max error of a segment (zero for a hold) and its ease, if it needs one."""
+    segment = values[start:end + 1]
+    if np.abs(segment - segment[0]).max() <= tolerance:
+        return 0.0, None
+    out_y, in_y, error = fit_segment_ease(values, start, end, tolerance)
+    return error, (out_y, in_y)
+
+
+def fit_lottie_keyframes(values, tolerance):
+    """
+    Reduce per-frame samples (N, D) to the fewest Lottie keyframes within a tolerance.
+
+    Segments are split at their worst frame until every one fits, then keyframes are
+    dropped again wherever the merged neighbours still fit.
+    """
+    keys = [0, len(values) - 1]
+    changed = True
+    while changed:
+        changed = False
+        for a, b in list(zip(keys, keys[1:])):
+            error, _ = segment_error(values, a, b, tolerance)
+            if error > tolerance and b - a > 1:
+                segment = values[a:b + 1]
+                out_y, in_y, _ = fit_segment_ease(values, a, b, tolerance)
+                u = np.linspace(0.0, 1.0, len(segment))
+                eased = 3 * (1 - u) ** 2 * u * out_y + 3 * (1 - u) * u ** 2 * in_y + u ** 3
+                residual = np.abs(segment[0] + eased[:, None] * (segment[-1] - segment[0]) - segment).max(axis=1)
+                keys.append(a + 1 + int(np.argmax(residual[1:-1])))
+                changed = True
+        keys.sort()
+
+    i = 1
+    while i < len(keys) - 1:
+        if segment_error(values, keys[i - 1], keys[i + 1], tolerance)[0] <= tolerance:
+            del keys[i]
+        else:
+            i += 1
+
+    keyframes = []
+    for a, b in zip(keys, keys[1:]):
+        _, ease = segment_error(values, a, b, tolerance)
+        keyframe = {"t": a, "s": rounded(values[a])}
+        if ease is None:
+            keyframe["h"] = 1
+        else:
+            keyframe["e"] = rounded(values[b])
+            keyframe["o"] = {"x": 0.333, "y": rounded([ease[0]])[0]}
+            keyframe["i"] = {"x": 0.667, "y": rounded([ease[1]])[0]}
+        keyframes.append(keyframe)
+    keyframes.append({"t": keys[-1], "s": rounded(values[keys[-1]])})
+    return keyframes
+
+
+def rounded(values, digits=3):
+    """Round floats for JSON output, folding negative zero into zero."""
+    return [round(float(v), digits) + 0.0 for v in values]
+
+
+def lottie_property(values, tolerance):
+    """Build a Lottie property from per-frame samples: static if it never moves, keyframed otherwise."""
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim == 1:
+        values = values[:, None]
+    if np.abs(values - values[0]).max() <= tolerance:
+        static = rounded(values[0])
+        return {"a": 0, "k": static[0] if len(static) == 1 else static}
+    return {"a": 1, "k": fit_lottie_keyframes(values, tolerance)}
+
+
+def emission_glow(material, frame_count):
+    """Effective emission weight per frame: Strength times the mix factor feeding the emission."""
+    nodes = material.node_tree.nodes
+    emission = nodes.get("Emission")
+    mix = nodes.get("Mix Shader")
+    glow = sample_socket(material.node_tree, emission.inputs['Strength'], frame_count)
+    if mix is not None and not mix.inputs[0].is_linked:
+        glow = glow * sample_socket(material.node_tree, mix.inputs[0], frame_count)
+    return glow
+
+
+def object_lottie_track(obj, frame_count, projection, rest_color=None):
+    """
+    Convert an object's animation into Lottie transform and fill properties.
+
+    Transform channels are projected through the scene camera. The fill is tinted from
+    rest_color toward the material's emission color as the emission glow rises; without
+    a rest_color the fill is the emission color.
+    """
+    location, rotation, scale = sample_transform(obj, frame_count)
+    evaluated = obj.evaluated_get(bpy.context.evaluated_depsgraph_get())
+    corners = np.array([tuple(corner) for corner in evaluated.bound_box])
+    centers, angles, extents = screen_track(transform_matrices(location, rotation, scale), corners, projection)
+
+    material = obj.data.materials[0]
+    glow_color = np.array(material.node_tree.nodes["Emission"].inputs['Color'].default_value)
+    if rest_color is None:
+        rest_color = glow_color
+    glow = emission_glow(material, frame_count)
+    span = glow.max() - glow.min()
+    mix = (glow - glow.min()) / span if span > 1e-6 else np.zeros(frame_count)
+    colors = np.asarray(rest_color)[None, :] + (glow_color - np.asarray(rest_color))[None, :] * mix[:, None]
+
+    tolerance = LOTTIE_FIT_TOLERANCE
+    size = extents[0]
+    bevel = obj.modifiers.get("Bevel")
+    px_per_unit = size[0] / max(np.ptp(corners[:, 0]), 1e-6)
+    return {
+        "p": lottie_property(np.concatenate([centers, np.zeros((frame_count, 1))], axis=1), tolerance["position"]),
+        "r": lottie_property(angles, tolerance["rotation"]),
+        "s": lottie_property(np.concatenate([extents / size * 100, np.full((frame_count, 1), 100.0)], axis=1),
+                             tolerance["scale"]),
+        "c": lottie_property(colors, tolerance["color"]),
+        "size": rounded(size, 1),
+        "radius": round(float(bevel.width * px_per_unit), 1) if bevel else 0,
+    }
+
+
+def shine_lottie_track(obj, frame_count, projection):
+    """
+    Convert the CTA shine sweep, driven by the Mapping node's Location, into a screen position.
+
+    The gradient is brightest where the mapped X coordinate reaches the white color ramp
+    stop, so the band sits at object X = (stop - location) / scale.
+    """
+    node_tree = obj.data.materials[0].node_tree
+    mapping = next(node for node in node_tree.nodes if node.type == 'MAPPING')
+    ramp = next(node for node in node_tree.nodes if node.type == 'VALTORGB').color_ramp
+    stop = max(ramp.elements, key=lambda element: sum(element.color[:3])).position
+    location_x = sample_property(node_tree, mapping.inputs['Location'].path_from_id("default_value"), 0,
+                                 mapping.inputs['Location'].default_value[0], frame_count)
+    band_x = (stop - location_x) / mapping.inputs['Scale'].default_value[0]
+
+    location, rotation, scale = sample_transform(obj, frame_count)
+    matrices = transform_matrices(location, rotation, scale)
+    points = np.stack([band_x, np.zeros(frame_count), np.zeros(frame_count), np.ones(frame_count)], axis=1)
+    world = np.einsum('nij,nj->ni', matrices, points)[:, :3]
+    positions = np.concatenate([project_points(world, projection), np.zeros((frame_count, 1))], axis=1)
+    return {"p": lottie_property(positions, LOTTIE_FIT_TOLERANCE["position"])}
+
+
+def create_object_lottie_layer(frame_count, index, layer, track):
+    """Create the Lottie layer for one spec object: its rounded box, tracked and filled."""
+    return {
+        "ddd": 0,
+        "ind": index,
         "ty": 4,  # Shape layer
-        "nm": "Button",
+        "nm": layer["nm"],
         "sr": 1,
         "ks": {
             "o": {"a": 0, "k": 100},  # Opacity
-            "r": {"a": 0, "k": 0},  # Rotation
-            "p": {  # Position with animation
-                "a": 1,
-                "k": [
-                    {"t": 0, "s": [128, 64, 0], "e": [128, 56, 0], "i": {"x": 0.5, "y": 1}, "o": {"x": 0.5, "y": 0}},
-                    {"t": 15, "s": [128, 56, 0], "e": [128, 56, 0], "h": 1},
-                    {"t": 30, "s": [128, 56, 0], "e": [128, 64, 0], "i": {"x": 0.5, "y": 1}, "o": {"x": 0.5, "y": 0}},
-                    {"t": 45, "s": [128, 64, 0]}
-                ]
-            },
+            "r": track["r"],  # Rotation
+            "p": track["p"],  # Position
             "a": {"a": 0, "k": [0, 0, 0]},  # Anchor
-            "s": {"a": 0, "k": [100, 100, 100]}  # Scale
+            "s": track["s"]  # Scale (squash and stretch)
         },
         "shapes": [{
             "ty": "rc",  # Rectangle
             "d": 1,
-            "s": {"a": 0, "k": [180, 50]},  # Size
+            "s": {"a": 0, "k": track["size"]},  # Size
             "p": {"a": 0, "k": [0, 0]},
-            "r": {"a": 0, "k": 12},  # Rounded corners
-            "nm": "ButtonShape"
+            "r": {"a": 0, "k": layer.get("radius", track["radius"])},  # Rounded corners
+            "nm": layer.get("shape", "ButtonShape")
         }, {
             "ty": "fl",  # Fill
-            "c": {
-                "a": 1,
-                "k": [
-                    {"t": 0, "s": [0.416, 0.549, 0.549, 1], "e": [0.549, 0.682, 0.769, 1]},
-                    {"t": 15, "s": [0.549, 0.682, 0.769, 1]},
-                    {"t": 30, "s": [0.549, 0.682, 0.769, 1], "e": [0.416, 0.549, 0.549, 1]},
-                    {"t": 45, "s": [0.416, 0.549, 0.549, 1]}
-                ]
-            },
-            "o": {"a": 0, "k": 80},
+            "c": track["c"],  # Tint follows the emission glow
+            "o": {"a": 0, "k": layer["fill_opacity"]},
             "nm": "Fill"
         }],
         "ip": 0,
         "op": frame_count,
         "st": 0
-    }]
+    }
 
 
-def create_press_lottie_layer(frame_count):
-    """Create Lottie layers for press animation."""
-    return [{
+def create_shine_lottie_layer(frame_count, index, overlay, button, shine):
+    """Create the shine overlay layer, masked to the button it sweeps across."""
+    half_width, half_height = button["size"][0] / 2, button["size"][1] / 2
+    return {
         "ddd": 0,
-        "ind": 1,
+        "ind": index,
         "ty": 4,
-        "nm": "Button",
+        "nm": overlay["nm"],
         "sr": 1,
         "ks": {
-            "o": {"a": 0, "k": 100},
-            "r": {"a": 0, "k": 0},
-            "p": {"a": 0, "k": [128, 64, 0]},
+            "o": {"a": 0, "k": 60},
+            "r": {"a": 0, "k": -20},
+            "p": shine["p"],  # Sweep follows the Mapping node location
             "a": {"a": 0, "k": [0, 0, 0]},
-            "s": {
-                "a": 1,
-                "k": [
-                    {"t": 0, "s": [100, 100, 100], "e": [105, 85, 100]},
-                    {"t": 8, "s": [105, 85, 100], "e": [97, 108, 100], "i": {"x": 0.3, "y": 1}, "o": {"x": 0.7, "y": 0}},
-                    {"t": 15, "s": [97, 108, 100], "e": [101, 98, 100]},
-                    {"t": 22, "s": [101, 98, 100], "e": [100, 100, 100]},
-                    {"t": 30, "s": [100, 100, 100]}
-                ]
-            }
+            "s": {"a": 0, "k": [100, 100, 100]}
         },
         "shapes": [{
             "ty": "rc",
             "d": 1,
-            "s": {"a": 0, "k": [180, 50]},
+            "s": {"a": 0, "k": [30, 100]},
             "p": {"a": 0, "k": [0, 0]},
-            "r": {"a": 0, "k": 12},
-            "nm": "ButtonShape"
+            "r": {"a": 0, "k": 0},
+            "nm": "ShineShape"
         }, {
-            "ty": "fl",
-            "c": {
-                "a": 1,
-                "k": [
-                    {"t": 0, "s": [0.416, 0.549, 0.549, 1]},
-                    {"t": 8, "s": [0.549, 0.682, 0.769, 1]},
-                    {"t": 30, "s": [0.416, 0.549, 0.549, 1]}
-                ]
+            "ty": "gf",  # Gradient fill
+            "o": {"a": 0, "k": 100},
+            "r": 1,
+            "s": {"a": 0, "k": [-15, 0]},
+            "e": {"a": 0, "k": [15, 0]},
+            "t": 1,
+            "g": {
+                "p": 3,
+                "k": {
+                    "a": 0,
+                    "k": [0, 1, 1, 1, 0.5, 1, 1, 1, 1, 1, 1, 1, 0, 0, 0.8, 1, 0]
+                }
             },
-            "o": {"a": 0, "k": 85},
-            "nm": "Fill"
+            "nm": "ShineGradient"
         }],
         "ip": 0,
         "op": frame_count,
-        "st": 0
-    }]
-
-
-def create_shine_lottie_layer(frame_count):
-    """Create Lottie layers for shine animation."""
-    return [
-        # Background button
-        {
-            "ddd": 0,
-            "ind": 1,
-            "ty": 4,
-            "nm": "Button",
-            "sr": 1,
-            "ks": {
-                "o": {"a": 0, "k": 100},
-                "r": {"a": 0, "k": 0},
-                "p": {"a": 0, "k": [128, 64, 0]},
-                "a": {"a": 0, "k": [0, 0, 0]},
-                "s": {"a": 0, "k": [100, 100, 100]}
-            },
-            "shapes": [{
-                "ty": "rc",
-                "d": 1,
-                "s": {"a": 0, "k": [200, 55]},
-                "p": {"a": 0, "k": [0, 0]},
-                "r": {"a": 0, "k": 14},
-                "nm": "ButtonShape"
-            }, {
-                "ty": "fl",
-                "c": {"a": 0, "k": [0.416, 0.549, 0.549, 1]},
-                "o": {"a": 0, "k": 80},
-                "nm": "Fill"
-            }],
-            "ip": 0,
-            "op": frame_count,
-            "st": 0
-        },
-        # Shine overlay
-        {
-            "ddd": 0,
-            "ind": 2,
-            "ty": 4,
-            "nm": "Shine",
-            "sr": 1,
-            "ks": {
-                "o": {"a": 0, "k": 60},
-                "r": {"a": 0, "k": -20},
-                "p": {
-                    "a": 1,
-                    "k": [
-                        {"t": 0, "s": [-50, 64, 0], "e": [306, 64, 0], "i": {"x": 0.5, "y": 1}, "o": {"x": 0.5, "y": 0}},
-                        {"t": 60, "s": [306, 64, 0]}
-                    ]
-                },
-                "a": {"a": 0, "k": [0, 0, 0]},
-                "s": {"a": 0, "k": [100, 100, 100]}
+        "st": 0,
+        "hasMask": True,
+        "masksProperties": [{
+            "inv": False,
+            "mode": "i",
+            "pt": {
+                "a": 0,
+                "k": {
+                    "c": True,
+                    "v": [[-half_width, -half_height], [half_width, -half_height],
+                          [half_width, half_height], [-half_width, half_height]],
+                    "i": [[0, 0], [0, 0], [0, 0], [0, 0]],
+                    "o": [[0, 0], [0, 0], [0, 0], [0, 0]]
+                }
             },
-            "shapes": [{
-                "ty": "rc",
-                "d": 1,
-                "s": {"a": 0, "k": [30, 100]},
-                "p": {"a": 0, "k": [0, 0]},
-                "r": {"a": 0, "k": 0},
-                "nm": "ShineShape"
-            }, {
-                "ty": "gf",  # Gradient fill
-                "o": {"a": 0, "k": 100},
-                "r": 1,
-                "s": {"a": 0, "k": [-15, 0]},
-                "e": {"a": 0, "k": [15, 0]},
-                "t": 1,
-                "g": {
-                    "p": 3,
-                    "k": {
-                        "a": 0,
-                        "k": [0, 1, 1, 1, 0.5, 1, 1, 1, 1, 1, 1, 1, 0, 0, 0.8, 1, 0]
-                    }
-                },
-                "nm": "ShineGradient"
-            }],
-            "ip": 0,
-            "op": frame_count,
-            "st": 0,
-            "hasMask": True,
-            "masksProperties": [{
-                "inv": False,
-                "mode": "i",
-                "pt": {
-                    "a": 0,
-                    "k": {
-                        "c": True,
-                        "v": [[-100, -27.5], [100, -27.5], [100, 27.5], [-100, 27.5]],
-                        "i": [[0, 0], [0, 0], [0, 0], [0, 0]],
-                        "o": [[0, 0], [0, 0], [0, 0], [0, 0]]
-                    }
-                },
-                "o": {"a": 0, "k": 100}
-            }]
+            "o": {"a": 0, "k": 100}
+        }]
+    }
+
+
+def load_image_pixels(path):
+    """Load an image through Blender as a top-down float32 RGBA array."""
+    image = bpy.data.images.load(path, check_existing=False)
+    width, height = image.size
+    pixels = np.empty(width * height * 4, dtype=np.float32)
+    image.pixels.foreach_get(pixels)
+    bpy.data.images.remove(image)
+    return pixels.reshape(height, width, 4)[::-1]
+
+
+def render_frame_to_array(frame, filepath):
+    """Render a single frame of the current scene to a PNG and return its pixels."""
+    scene = bpy.context.scene
+    scene.frame_set(frame)
+    scene.render.filepath = filepath
+    bpy.ops.render.render(write_still=True)
+    return load_image_pixels(filepath)
+
+
+def premultiplied(image):
+    """Premultiply RGB by alpha so transparent pixels compare equal regardless of their color."""
+    return np.concatenate([image[..., :3] * image[..., 3:4], image[..., 3:4]], axis=-1)
+
+
+def box_filter(image, radius):
+    """Mean over a square window around each pixel, using a summed-area table."""
+    size = 2 * radius + 1
+    padded = np.pad(image, ((radius + 1, radius), (radius + 1, radius), (0, 0)), mode='edge')
+    table = padded.cumsum(axis=0).cumsum(axis=1)
+    total = table[size:, size:] - table[:-size, size:] - table[size:, :-size] + table[:-size, :-size]
+    return total / (size * size)
+
+
+def image_ssim(a, b, radius=3):
+    """Mean structural similarity of two float images in the 0-1 range."""
+    c1, c2 = 0.01 ** 2, 0.03 ** 2
+    a = a.astype(np.float64)
+    b = b.astype(np.float64)
+    mu_a = box_filter(a, radius)
+    mu_b = box_filter(b, radius)
+    var_a = box_filter(a * a, radius) - mu_a * mu_a
+    var_b = box_filter(b * b, radius) - mu_b * mu_b
+    covariance = box_filter(a * b, radius) - mu_a * mu_b
+    ssim = ((2 * mu_a * mu_b + c1) * (2 * covariance + c2)) / ((mu_a ** 2 + mu_b ** 2 + c1) * (var_a + var_b + c2))
+    return float(ssim.mean())
+
+
+def image_psnr(a, b):
+    """Peak signal-to-noise ratio of two float images in the 0-1 range, in dB."""
+    mse = float(np.mean((a.astype(np.float64) - b.astype(np.float64)) ** 2))
+    if mse == 0:
+        return float("inf")
+    return 10 * math.log10(1.0 / mse)
+
+
+def representative_frames(frame_count, count=TUNING_FRAMES):
+    """Pick frames halfway between keyframes, where motion and emission change the most."""
+    keys = sorted(keyed_frames(frame_count))
+    midpoints = sorted({(a + b) // 2 for a, b in zip(keys, keys[1:]) if b - a > 1}) or [max(1, frame_count // 2)]
+    picks = np.linspace(0, len(midpoints) - 1, min(count, len(midpoints))).round().astype(int)
+    return [midpoints[i] for i in sorted(set(picks))]
+
+
+def tuning_configurations():
+    """Yield every combination of the settings in TUNING_GRID as profile overrides."""
+    grid = TUNING_GRID
+    for samples, threshold, denoiser, bounces in itertools.product(
+            grid["samples"], grid["adaptive_threshold"], grid["denoiser"], grid["bounces"]):
+        yield {
+            "samples": samples,
+            "adaptive_threshold": threshold,
+            "denoiser": denoiser,
+            "max_bounces": bounces,
+            "transmission_bounces": bounces,
         }
+
+
+@traced
+def tune_animation(name, profile=DEFAULT_RENDER_PROFILE, frame_samples=TUNING_FRAMES,
+                   min_ssim=TUNING_MIN_SSIM, min_psnr=TUNING_MIN_PSNR):
+    """
+    Find the cheapest Cycles settings for an animation that still match a reference render.
+
+    Representative frames are rendered once at reference quality and then at every
+    configuration in TUNING_GRID. A configuration passes when every frame meets both
+    the SSIM and PSNR thresholds; the passing configuration with the lowest mean render
+    time per frame is written into the animation's entry in TUNED_PROFILES_PATH.
+    """
+    base = RENDER_PROFILES[profile]
+    if base["engine"] != 'CYCLES':
+        raise ValueError(f"Only Cycles profiles can be tuned, {profile} uses {base['engine']}")
+
+    frame_count = build_spec_scene(ANIMATIONS[name], profile)
+    scene = bpy.context.scene
+    frames = representative_frames(frame_count, frame_samples)
+    workdir = tempfile.mkdtemp(prefix=f"{name}-tune-")
+    print(f"  Tuning {name} on frames {frames}")
+
+    def render_configuration(config, label):
+        apply_render_profile(scene, dict(base, **config))
+        started = time.perf_counter()
+        images = [
+            premultiplied(render_frame_to_array(frame, os.path.join(workdir, f"{label}_{frame:04d}.png")))
+            for frame in frames
+        ]
+        return images, (time.perf_counter() - started) / len(frames)
+
+    try:
+        reference, reference_seconds = render_configuration(TUNING_REFERENCE, "reference")
+        candidates = []
+        for index, config in enumerate(tuning_configurations()):
+            images, seconds = render_configuration(config, f"candidate{index:03d}")
+            candidates.append({
+                "settings": config,
+                "seconds": round(seconds, 3),
+                "ssim": round(min(image_ssim(a, b) for a, b in zip(images, reference)), 5),
+                "psnr": round(min(image_psnr(a, b) for a, b in zip(images, reference)), 2),
+            })
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    candidates.sort(key=lambda c: c["seconds"])
+    passing = [c for c in candidates if c["ssim"] >= min_ssim and c["psnr"] >= min_psnr]
+
+    report_path = os.path.join(OUTPUT_DIR, f"{name}.tuning.json")
+    with open(report_path, 'w') as f:
+        json.dump({
+            "profile": profile,
+            "frames": frames,
+            "reference": {"settings": TUNING_REFERENCE, "seconds": round(reference_seconds, 3)},
+            "thresholds": {"ssim": min_ssim, "psnr": min_psnr},
+            "candidates": candidates,
+        }, f, indent=2)
+    print(f"  Wrote tuning report: {report_path}")
+
+    if not passing:
+        print(f"  No configuration met SSIM >= {min_ssim} and PSNR >= {min_psnr}; profile left unchanged")
+        return None
+
+    best = passing[0]
+    overrides = {}
+    if os.path.exists(TUNED_PROFILES_PATH):
+        with open(TUNED_PROFILES_PATH) as f:
+            overrides = json.load(f)
+    overrides.setdefault(name, {})[profile] = best["settings"]
+    with open(TUNED_PROFILES_PATH, 'w') as f:
+        json.dump(overrides, f, indent=2, sort_keys=True)
+
+    print(f"  Selected {best['settings']}: {best['seconds']}s per frame "
+          f"(reference {reference_seconds:.2f}s), SSIM {best['ssim']}, PSNR {best['psnr']} dB")
+    return best
+
+
+def compositor_render_layers(scene, clear=False):
+    """Enable compositing and return the node tree and its Render Layers node, creating them as needed."""
+    scene.use_nodes = True
+    tree = scene.node_tree
+    if clear:
+        tree.nodes.clear()
+    layers = next((node for node in tree.nodes if node.type == 'R_LAYERS'), None)
+    if layers is None:
+        layers = tree.nodes.new('CompositorNodeRLayers')
+    if not any(node.type == 'COMPOSITE' for node in tree.nodes):
+        tree.links.new(layers.outputs['Image'], tree.nodes.new('CompositorNodeComposite').inputs['Image'])
+    return tree, layers
+
+
+def add_pass_file_output(scene, directory, sockets, clear=False):
+    """
+    Write Render Layers outputs ({file prefix: socket name}) to per-frame 32-bit OpenEXR
+    files named <prefix>_####.exr.
+
+    Each pass gets its own file rather than sharing a multilayer EXR, since
+    bpy.data.images only exposes one layer of a multilayer file.
+    """
+    tree, layers = compositor_render_layers(scene, clear)
+    output = tree.nodes.new('CompositorNodeOutputFile')
+    output.base_path = directory
+    output.format.file_format = 'OPEN_EXR'
+    output.format.color_depth = '32'
+    output.format.color_mode = 'RGBA'
+    output.file_slots.clear()
+    for prefix, socket in sockets.items():
+        output.file_slots.new(prefix + "_")
+        tree.links.new(layers.outputs[socket], output.inputs[prefix + "_"])
+    return output
+
+
+def render_size(scene):
+    """Output resolution in pixels after the render percentage is applied."""
+    percentage = scene.render.resolution_percentage / 100
+    return int(scene.render.resolution_x * percentage), int(scene.render.resolution_y * percentage)
+
+
+def object_screen_bounds(obj, frame_count, projection):
+    """Per-frame screen bounding boxes (N, 4) as x0, y0, x1, y1 pixels of an object's evaluated bounds."""
+    evaluated = obj.evaluated_get(bpy.context.evaluated_depsgraph_get())
+    corners = np.array([tuple(corner) for corner in evaluated.bound_box])
+    matrices = transform_matrices(*sample_transform(obj, frame_count))
+    world = np.einsum('nij,kj->nki', matrices[:, :3, :3], corners) + matrices[:, None, :3, 3]
+    screen = project_points(world, projection)
+    return np.concatenate([screen.min(axis=1), screen.max(axis=1)], axis=1)
+
+
+def render_borders(scene, frame_count, margin=CROP_MARGIN):
+    """
+    Per-frame render regions (N, 4) in whole output pixels covering every mesh object.
+
+    Object bounds come from their F-curves projected through the scene camera, so no
+    frame has to be evaluated; the margin absorbs the pixel filter, bevels that sit
+    outside the un-modified bounds and glow.
+    """
+    bpy.context.view_layer.update()
+    width, height = render_size(scene)
+    projection = camera_projection(scene.camera, width, height)
+    bounds = np.stack([
+        object_screen_bounds(obj, frame_count, projection)
+        for obj in scene.objects if obj.type == 'MESH'
+    ])
+    borders = np.concatenate([bounds[..., :2].min(axis=0), bounds[..., 2:].max(axis=0)], axis=1)
+    pad = margin * scene.render.resolution_percentage / 100
+    borders = np.concatenate([np.floor(borders[:, :2] - pad), np.ceil(borders[:, 2:] + pad)], axis=1)
+    return np.clip(borders, 0, [width, height, width, height]).astype(int)
+
+
+class FrameStream:
+    """
+    Capture rendered frames straight from the compositor's Viewer image.
+
+    The render result is converted to straight alpha and to the display encoding of the
+    scene's view transform inside the compositor, read with pixels.foreach_get into one
+    reused float buffer and quantized into a preallocated (frames, height, width, 4)
+    uint8 array. Each frame is then handed to the sinks, so no PNG has to be encoded
+    and decoded again before other encoders see it.
+    """
+
+    # OCIO colorspaces that bake each view transform into display-referred sRGB values
+    VIEW_COLORSPACES = {"Standard": "sRGB", "Filmic": "Filmic sRGB", "AgX": "AgX Base sRGB"}
+
+    def __init__(self, scene, frame_count, sinks=()):
+        self.width, self.height = render_size(scene)
+        self.frames = np.empty((frame_count, self.height, self.width, 4), dtype=np.uint8)
+        self.sinks = list(sinks)
+        self._buffer = np.empty(self.width * self.height * 4, dtype=np.float32)
+        self._image = self._buffer.reshape(self.height, self.width, 4)[::-1]
+        self._connect_viewer(scene)
+
+    def _connect_viewer(self, scene):
+        tree, layers = compositor_render_layers(scene)
+
+        straight = tree.nodes.new('CompositorNodePremulKey')
+        straight.mapping = 'PREMUL_TO_STRAIGHT'
+        display = tree.nodes.new('CompositorNodeConvertColorSpace')
+        try:
+            display.from_color_space = 'Linear Rec.709'
+        except TypeError:  # Colorspace name before Blender 4.0
+            display.from_color_space = 'Linear'
+        display.to_color_space = self.VIEW_COLORSPACES.get(scene.view_settings.view_transform, 'sRGB')
+        viewer = tree.nodes.new('CompositorNodeViewer')
+        viewer.use_alpha = True
+        tree.links.new(layers.outputs['Image'], straight.inputs['Image'])
+        tree.links.new(straight.outputs['Image'], display.inputs['Image'])
+        tree.links.new(display.outputs['Image'], viewer.inputs['Image'])
+        tree.nodes.active = viewer
+        self._tree = tree
+        self._nodes = [straight, display, viewer]
+
+    def capture(self, frame):
+        """Copy the Viewer image of the render that just finished into the frame array."""
+        bpy.data.images['Viewer Node'].pixels.foreach_get(self._buffer)
+        np.clip(self._buffer, 0.0, 1.0, out=self._buffer)
+        self._buffer *= 255
+        np.rint(self._buffer, out=self._buffer)
+        pixels = self.frames[frame - 1]
+        pixels[...] = self._image  # Flips Blender's bottom-up rows while casting
+        for sink in self.sinks:
+            sink.write(frame, pixels)
+
+    def close(self):
+        """Close the sinks and take the capture nodes back out of the compositor."""
+        for sink in self.sinks:
+            sink.close()
+        for node in self._nodes:
+            self._tree.nodes.remove(node)
+
+
+class PngSequenceSink:
+    """Archive streamed frames as frame_####.png files."""
+
+    def __init__(self, frames_dir, level=6):
+        self.frames_dir = frames_dir
+        self.level = level
+
+    def write(self, frame, pixels):
+        write_png(os.path.join(self.frames_dir, f"frame_{frame:04d}.png"), pixels, level=self.level)
+
+    def close(self):
+        pass
+
+
+class FfmpegSink:
+    """Pipe streamed frames as raw RGBA into an ffmpeg process encoding VP9 WebM with alpha."""
+
+    def __init__(self, path, width, height, fps=FPS):
+        self.path = path
+        self.process = subprocess.Popen([
+            "ffmpeg", "-loglevel", "error", "-y",
+            "-f", "rawvideo", "-pix_fmt", "rgba", "-s", f"{width}x{height}", "-r", str(fps), "-i", "-",
+            "-c:v", "libvpx-vp9", "-pix_fmt", "yuva420p", "-b:v", "0", "-crf", "32", path,
+        ], stdin=subprocess.PIPE)
+
+    def write(self, frame, pixels):
+        self.process.stdin.write(pixels.data)
+
+    def close(self):
+        self.process.stdin.close()
+        if self.process.wait() != 0:
+            raise RuntimeError(f"ffmpeg exited with status {self.process.returncode} writing {self.path}")
+        print(f"  Exported WebM video to: {self.path}")
+
+
+@traced
+def render_frames_individually(frame_count, frames_dir, borders=None, stream=None, frames=None):
+    """
+    Render one frame at a time, optionally limited to per-frame border regions (N, 4)
+    in output pixels, writing PNGs or feeding a FrameStream. frames restricts the
+    render to a subset of 1..frame_count.
+    """
+    scene = bpy.context.scene
+    render = scene.render
+    width, height = render_size(scene)
+    if borders is not None:
+        render.use_border = True
+        render.use_crop_to_border = False  # Keep the full transparent canvas
+    try:
+        for frame in frames or range(1, frame_count + 1):
+            if borders is not None:
+                x0, y0, x1, y1 = borders[frame - 1]
+                if x1 <= x0 or y1 <= y0:
+                    x0, y0, x1, y1 = 0, 0, width, height  # Nothing on screen; render it all to be safe
+                render.border_min_x, render.border_max_x = x0 / width, x1 / width
+                render.border_min_y, render.border_max_y = 1 - y1 / height, 1 - y0 / height  # Blender's y points up
+            scene.frame_set(frame)
+            if stream is None:
+                render.filepath = os.path.join(frames_dir, f"frame_{frame:04d}.png")
+                bpy.ops.render.render(write_still=True)
+            else:
+                bpy.ops.render.render()
+                stream.capture(frame)
+    finally:
+        render.use_border = False
+
+
+def keyed_frames(frame_count):
+    """Every frame that holds a keyframe in any action of the scene."""
+    return {
+        int(round(point.co.x))
+        for action in bpy.data.actions
+        for fcurve in action.fcurves
+        for point in fcurve.keyframe_points
+    } & set(range(1, frame_count + 1))
+
+
+def load_png_frame(path):
+    """Load a PNG frame as premultiplied float RGBA (top-down), for interpolation and comparison."""
+    return premultiplied(load_image_pixels(path))
+
+
+def interpolate_frame(previous, following, flow_next, flow_previous):
+    """
+    Motion-compensated in-between of two premultiplied frames one frame either side.
+
+    flow_next is the previous frame's motion toward the frame being built and
+    flow_previous the following frame's motion back toward it, both (H, W, 2) in
+    top-down pixels; each neighbour is warped along its flow and the two are averaged,
+    which also carries emission changes halfway.
+    """
+    return 0.5 * (warp_by_flow(previous, flow_next) + warp_by_flow(following, flow_previous))
+
+
+def vector_pass_flow(path):
+    """
+    Read a Vector pass EXR as (motion to previous frame, motion to next frame), each
+    (H, W, 2) in top-down pixel units. Blender stores the previous-frame vector in XY
+    and the next-frame vector in ZW, with Y pointing up.
+    """
+    vectors = load_image_pixels(path).astype(np.float64)
+    flip = np.array([1.0, -1.0])
+    return vectors[..., 0:2] * flip, vectors[..., 2:4] * flip
+
+
+def to_straight_uint8(pixels):
+    """Unpremultiply a float RGBA frame and quantize it for PNG output."""
+    alpha = pixels[..., 3:4]
+    rgb = np.divide(pixels[..., :3], alpha, out=np.zeros_like(pixels[..., :3]), where=alpha > 1e-6)
+    return np.round(np.clip(np.concatenate([rgb, alpha], axis=-1), 0, 1) * 255).astype(np.uint8)
+
+
+@traced
+def render_half_rate(frame_count, frames_dir, borders=None, validation_frames=HALF_RATE_VALIDATION_FRAMES,
+                     min_ssim=HALF_RATE_MIN_SSIM, min_psnr=HALF_RATE_MIN_PSNR):
+    """
+    Path-trace every other frame (plus every keyed frame and the last one) and build the
+    rest from their neighbours with the Cycles Vector pass.
+
+    The in-between frames are split into validation_frames runs; the middle frame of
+    each run is also rendered for real, and a run whose check misses the SSIM/PSNR
+    thresholds is rendered in full. Results go to half-rate.json in frames_dir.
+    """
+    scene = bpy.context.scene
+    motion_blur = scene.render.use_motion_blur
+    scene.render.use_motion_blur = False  # The Vector pass needs motion blur off
+    scene.view_layers[0].use_pass_vector = True
+    workdir = tempfile.mkdtemp(prefix="half-rate-")
+    vector_output = add_pass_file_output(scene, workdir, {"vector": 'Vector'})
+
+    rendered = sorted(set(range(1, frame_count + 1, 2)) | keyed_frames(frame_count) | {frame_count})
+    between = [frame for frame in range(1, frame_count + 1) if frame not in rendered]
+    try:
+        try:
+            render_frames_individually(frame_count, frames_dir, borders, frames=rendered)
+        finally:
+            # Validation and fallback frames render without the Vector pass
+            scene.node_tree.nodes.remove(vector_output)
+            scene.view_layers[0].use_pass_vector = False
+            scene.render.use_motion_blur = motion_blur
+
+        started = time.perf_counter()
+        for frame in between:
+            previous = load_png_frame(os.path.join(frames_dir, f"frame_{frame - 1:04d}.png"))
+            following = load_png_frame(os.path.join(frames_dir, f"frame_{frame + 1:04d}.png"))
+            _, flow_next = vector_pass_flow(os.path.join(workdir, f"vector_{frame - 1:04d}.exr"))
+            flow_previous, _ = vector_pass_flow(os.path.join(workdir, f"vector_{frame + 1:04d}.exr"))
+            pixels = interpolate_frame(previous, following, flow_next, flow_previous)
+            write_png(os.path.join(frames_dir, f"frame_{frame:04d}.png"), to_straight_uint8(pixels))
+        interpolate_seconds = time.perf_counter() - started
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    checks = []
+    fallback = []
+    runs = [list(run) for run in np.array_split(between, min(validation_frames, len(between)))] if between else []
+    for run in runs:
+        frame = run[len(run) // 2]
+        frame_path = os.path.join(frames_dir, f"frame_{frame:04d}.png")
+        interpolated = load_png_frame(frame_path)
+        render_frames_individually(frame_count, frames_dir, borders, frames=[frame])
+        reference = load_png_frame(frame_path)
+        check = {
+            "frame": int(frame),
+            "ssim": round(image_ssim(interpolated, reference), 5),
+            "psnr": round(image_psnr(interpolated, reference), 2),
+        }
+        check["passed"] = check["ssim"] >= min_ssim and check["psnr"] >= min_psnr
+        checks.append(check)
+        if not check["passed"]:
+            fallback.extend(int(f) for f in run if f != frame)
+
+    if fallback:
+        print(f"  Interpolation missed SSIM >= {min_ssim} or PSNR >= {min_psnr} near frames "
+              f"{[c['frame'] for c in checks if not c['passed']]}; rendering {len(fallback)} more frames")
+        render_frames_individually(frame_count, frames_dir, borders, frames=fallback)
+
+    rendered_count = len(rendered) + len(runs) + len(fallback)
+    validated = {check["frame"] for check in checks}
+    with open(os.path.join(frames_dir, "half-rate.json"), 'w') as f:
+        json.dump({
+            "rendered": rendered,
+            "interpolated": [frame for frame in between if frame not in fallback and frame not in validated],
+            "fallback": fallback,
+            "interpolate_seconds": round(interpolate_seconds, 3),
+            "thresholds": {"ssim": min_ssim, "psnr": min_psnr},
+            "validation": checks,
+            "path_traced": rendered_count,
+        }, f, indent=2)
+    print(f"  Half-rate rendering path-traced {rendered_count} of {frame_count} frames")
+    return rendered_count
+
+
+@traced
+def render_cropped_frames(frame_count, frames_dir, margin=CROP_MARGIN, stream=None):
+    """
+    Render each frame with border rendering limited to the animated objects plus a
+    margin. Crop-to-border stays off, so every PNG keeps the full transparent canvas.
+    """
+    scene = bpy.context.scene
+    width, height = render_size(scene)
+    borders = render_borders(scene, frame_count, margin)
+    render_frames_individually(frame_count, frames_dir, borders, stream)
+
+    area = float(np.prod(np.maximum(borders[:, 2:] - borders[:, :2], 0), axis=1).sum())
+    fraction = area / (frame_count * width * height)
+    print(f"  Border rendering covered {fraction:.0%} of the canvas pixels")
+    return fraction
+
+
+def fit_affine(source, target):
+    """Least-squares 2D affine (2, 3) mapping source points (N, 2) onto target points."""
+    design = np.concatenate([source, np.ones((len(source), 1))], axis=1)
+    solution, *_ = np.linalg.lstsq(design, target, rcond=None)
+    return solution.T
+
+
+def warp_affine(image, matrix):
+    """
+    Resample an image through a 2D affine transform with bilinear filtering.
+
+    matrix maps source pixel coordinates to output pixel coordinates; pixels that map
+    from outside the source stay transparent.
+    """
+    height, width = image.shape[:2]
+    inverse = np.linalg.inv(np.vstack([matrix, [0, 0, 1]]))[:2]
+    ys, xs = np.mgrid[0:height, 0:width] + 0.5
+    sx = inverse[0, 0] * xs + inverse[0, 1] * ys + inverse[0, 2] - 0.5
+    sy = inverse[1, 0] * xs + inverse[1, 1] * ys + inverse[1, 2] - 0.5
+    return sample_bilinear(image, sx, sy)
+
+
+def warp_by_flow(image, flow):
+    """Backward-warp an image: each output pixel takes the image at its position minus flow (H, W, 2)."""
+    height, width = image.shape[:2]
+    ys, xs = np.mgrid[0:height, 0:width].astype(np.float64)
+    return sample_bilinear(image, xs - flow[..., 0], ys - flow[..., 1])
+
+
+def sample_bilinear(image, sx, sy):
+    """Sample an image at fractional pixel indices with bilinear filtering; outside is transparent."""
+    height, width = image.shape[:2]
+    x0, y0 = np.floor(sx).astype(int), np.floor(sy).astype(int)
+    fx, fy = (sx - x0)[..., None], (sy - y0)[..., None]
+    padded = np.pad(image, ((1, 1), (1, 1), (0, 0)))
+
+    def tap(x, y):
+        return padded[np.clip(y + 1, 0, height + 1), np.clip(x + 1, 0, width + 1)]
+
+    top = tap(x0, y0) * (1 - fx) + tap(x0 + 1, y0) * fx
+    bottom = tap(x0, y0 + 1) * (1 - fx) + tap(x0 + 1, y0 + 1) * fx
+    return top * (1 - fy) + bottom * fy
+
+
+def key_poses(obj, frame_count):
+    """
+    Frames at which the object's transform is keyed, with repeated poses dropped, and
+    for every frame the index of the key pose closest to it.
+    """
+    location, _, scale = sample_transform(obj, frame_count)
+    pose = np.concatenate([location, scale], axis=1)
+    keyed = sorted({
+        int(round(point.co.x))
+        for fcurve in obj.animation_data.action.fcurves
+        if fcurve.data_path in ("location", "scale")
+        for point in fcurve.keyframe_points
+    } & set(range(1, frame_count + 1)))
+
+    keys = []
+    for frame in keyed:
+        if not any(np.allclose(pose[frame - 1], pose[key - 1], atol=1e-6) for key in keys):
+            keys.append(frame)
+    distance = np.abs(pose[:, None, :] - pose[[key - 1 for key in keys]][None, :, :]).sum(axis=2)
+    return keys, distance.argmin(axis=1)
+
+
+def render_pose_passes(frame, directory):
+    """
+    Path-trace one frame and return its Combined (premultiplied RGBA) and Emit (RGB)
+    passes as linear float arrays.
+
+    The passes go through a compositor File Output node (see add_pass_file_output).
+    """
+    scene = bpy.context.scene
+    scene.view_layers[0].use_pass_emit = True
+    add_pass_file_output(scene, directory, {"combined": 'Image', "emit": 'Emit'}, clear=True)
+
+    scene.frame_set(frame)
+    bpy.ops.render.render()
+    scene.use_nodes = False
+    combined = load_image_pixels(os.path.join(directory, f"combined_{frame:04d}.exr"))
+    emit = load_image_pixels(os.path.join(directory, f"emit_{frame:04d}.exr"))[..., :3]
+    return combined, emit
+
+
+def save_linear_frame(pixels, path):
+    """Write a linear premultiplied RGBA array as a PNG through the scene's color management."""
+    height, width = pixels.shape[:2]
+    image = bpy.data.images.new("SynthesizedFrame", width, height, alpha=True, float_buffer=True)
+    image.alpha_mode = 'PREMUL'
+    image.pixels.foreach_set(np.ascontiguousarray(pixels[::-1], dtype=np.float32).ravel())
+    image.save_render(path, scene=bpy.context.scene)
+    bpy.data.images.remove(image)
+
+
+@traced
+def synthesize_frames(name, frame_count, frames_dir, validation_frames=SYNTHESIS_VALIDATION_FRAMES,
+                      min_ssim=SYNTHESIS_MIN_SSIM, min_psnr=SYNTHESIS_MIN_PSNR):
+    """
+    Build a frame set from a few key pose renders instead of path-tracing every frame.
+
+    The glass material is Mix(Glass, Emission), so radiance is linear in the mix factor
+    and emission strength. With key poses rendered at a fixed factor and strength, the
+    Emit pass gives unit emission and Combined minus Emit gives the glass term; each frame
+    re-weights those by its own factor and strength, then warps the nearest key pose by
+    the 2D affine that maps its projected bounding box onto the frame's. A few frames are
+    rendered for real and compared, and False is returned when any misses the thresholds.
+    """
+    scene = bpy.context.scene
+    obj = bpy.data.objects[SYNTHESIS_OBJECTS[name]]
+    node_tree = obj.data.materials[0].node_tree
+    mix_socket = node_tree.nodes["Mix Shader"].inputs[0]
+    strength_socket = node_tree.nodes["Emission"].inputs['Strength']
+    mix = sample_socket(node_tree, mix_socket, frame_count)
+    strength = sample_socket(node_tree, strength_socket, frame_count)
+
+    bpy.context.view_layer.update()
+    width, height = render_size(scene)
+    projection = camera_projection(scene.camera, width, height)
+    evaluated = obj.evaluated_get(bpy.context.evaluated_depsgraph_get())
+    corners = np.array([tuple(corner) for corner in evaluated.bound_box])
+    matrices = transform_matrices(*sample_transform(obj, frame_count))
+    screen = project_points(np.einsum('nij,kj->nki', matrices[:, :3, :3], corners) + matrices[:, None, :3, 3],
+                            projection)
+    keys, nearest = key_poses(obj, frame_count)
+
+    workdir = tempfile.mkdtemp(prefix=f"{name}-synthesis-")
+    try:
+        # Key poses are rendered with the material animation detached
+        started = time.perf_counter()
+        material_action = node_tree.animation_data.action
+        node_tree.animation_data.action = None
+        mix_socket.default_value = SYNTHESIS_KEY_MIX
+        strength_socket.default_value = SYNTHESIS_KEY_STRENGTH
+        passes = []
+        try:
+            for key in keys:
+                combined, emit = render_pose_passes(key, workdir)
+                glass = combined.copy()
+                glass[..., :3] = (combined[..., :3] - emit) / (1 - SYNTHESIS_KEY_MIX)
+                passes.append((glass, emit / (SYNTHESIS_KEY_MIX * SYNTHESIS_KEY_STRENGTH)))
+        finally:
+            node_tree.animation_data.action = material_action
+        render_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for frame in range(1, frame_count + 1):
+            i = frame - 1
+            key = keys[nearest[i]]
+            glass, emission = passes[nearest[i]]
+            pixels = glass * np.array([1 - mix[i]] * 3 + [1.0], dtype=np.float32)
+            pixels[..., :3] += emission * (mix[i] * strength[i])
+            if frame != key:
+                pixels = warp_affine(pixels, fit_affine(screen[key - 1], screen[i]))
+            save_linear_frame(pixels, os.path.join(frames_dir, f"frame_{frame:04d}.png"))
+        composite_seconds = time.perf_counter() - started
+
+        checks = []
+        for frame in representative_frames(frame_count, validation_frames):
+            reference_path = os.path.join(workdir, f"reference_{frame:04d}.png")
+            frame_path = os.path.join(frames_dir, f"frame_{frame:04d}.png")
+            reference = premultiplied(render_frame_to_array(frame, reference_path))
+            synthesized = premultiplied(load_image_pixels(frame_path))
+            checks.append({
+                "frame": frame,
+                "ssim": round(image_ssim(synthesized, reference), 5),
+                "psnr": round(image_psnr(synthesized, reference), 2),
+            })
+            shutil.copyfile(reference_path, frame_path)  # A true render is worth keeping
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    passed = all(c["ssim"] >= min_ssim and c["psnr"] >= min_psnr for c in checks)
+    with open(os.path.join(frames_dir, "synthesis.json"), 'w') as f:
+        json.dump({
+            "key_frames": keys,
+            "key_render_seconds": round(render_seconds, 3),
+            "composite_seconds": round(composite_seconds, 3),
+            "thresholds": {"ssim": min_ssim, "psnr": min_psnr},
+            "validation": checks,
+            "passed": passed,
+        }, f, indent=2)
+
+    print(f"  Synthesized {frame_count} frames from {len(keys)} key poses "
+          f"({render_seconds:.1f}s rendering, {composite_seconds:.2f}s compositing)")
+    if not passed:
+        print(f"  Synthesis missed SSIM >= {min_ssim} or PSNR >= {min_psnr}; rendering every frame instead")
+    return passed
+
+
+def palette_role(color, tolerance=0.01):
+    """Name of the theme palette color an RGB(A) value was built from, if any."""
+    for role, value in PALETTE_ROLES.items():
+        if np.allclose(np.asarray(color)[:3], value[:3], atol=tolerance):
+            return role
+    return None
+
+
+def theme_palette(theme):
+    """Resolve a theme to per-role RGB arrays, falling back to the scene colors for missing roles."""
+    palette = {role: np.array(value[:3]) for role, value in PALETTE_ROLES.items()}
+    for role, hex_color in THEMES[theme].items():
+        palette[role] = np.array(hex_to_rgb(hex_color)[:3])
+    return palette
+
+
+def setup_theme_passes(scene, directory):
+    """
+    Route the Cycles passes needed for recoloring to per-frame OpenEXR files.
+
+    Each scene light gets its own light group, each material a pass index, and a
+    manifest records which palette role tints every light and material, so
+    recolor_frames() can rebuild a frame for any palette without rendering.
+    """
+    view_layer = scene.view_layers[0]
+    view_layer.use_pass_emit = True
+    view_layer.use_pass_material_index = True
+
+    lightgroups = {}
+    for obj in scene.objects:
+        if obj.type == 'LIGHT':
+            group = obj.name.lower()
+            if group not in view_layer.lightgroups:
+                view_layer.lightgroups.add(name=group)
+            obj.lightgroup = group
+            lightgroups[group] = palette_role(obj.data.color)
+
+    materials = {}
+    for index, material in enumerate(bpy.data.materials, start=1):
+        material.pass_index = index
+        nodes = material.node_tree.nodes if material.use_nodes else []
+        glass = next((n for n in nodes if n.type == 'BSDF_GLASS'), None)
+        emission = next((n for n in nodes if n.type == 'EMISSION'), None)
+        materials[index] = {
+            "name": material.name,
+            "tint": palette_role(glass.inputs['Color'].default_value) if glass else None,
+            "emission": palette_role(emission.inputs['Color'].default_value) if emission else None,
+        }
+
+    sockets = {"combined": 'Image', "emit": 'Emit', "index": 'IndexMA'}
+    sockets.update({f"light_{group}": f"Combined_{group}" for group in lightgroups})
+    add_pass_file_output(scene, directory, sockets, clear=True)
+
+    with open(os.path.join(directory, "theme-passes.json"), 'w') as f:
+        json.dump({
+            "lightgroups": lightgroups,
+            "materials": materials,
+            "palette": {role: list(value[:3]) for role, value in PALETTE_ROLES.items()},
+        }, f, indent=2)
+
+
+@traced
+def recolor_frames(name, theme, profile=DEFAULT_RENDER_PROFILE):
+    """
+    Build a themed frame set from the recorded passes with per-pixel vectorized math.
+
+    Light group contributions scale exactly with their light's color. Emission scales
+    with the emission color, and glass tint is applied as a first-order ratio per
+    material index. Whatever the light groups and Emit pass do not account for (world
+    light, emission seen through the glass) is kept as is.
+    """
+    frames_dir = frames_dir_for(name, profile)
+    passes_dir = os.path.join(frames_dir, "passes")
+    with open(os.path.join(passes_dir, "theme-passes.json")) as f:
+        manifest = json.load(f)
+    old = {role: np.array(value) for role, value in manifest["palette"].items()}
+    new = theme_palette(theme)
+
+    def ratio(role):
+        return new[role] / np.maximum(old[role], 1e-6) if role else np.ones(3)
+
+    light_ratio = {group: ratio(role) for group, role in manifest["lightgroups"].items()}
+    material_count = max(map(int, manifest["materials"]), default=0) + 1
+    tint_ratio = np.ones((material_count, 3))
+    emission_ratio = np.ones((material_count, 3))
+    for index, material in manifest["materials"].items():
+        tint_ratio[int(index)] = ratio(material["tint"])
+        emission_ratio[int(index)] = ratio(material["emission"])
+
+    output_dir = f"{frames_dir}_{theme}"
+    os.makedirs(output_dir, exist_ok=True)
+    frame_count = len(frame_files(frames_dir))
+    for frame in range(1, frame_count + 1):
+        def load_pass(slot):
+            return load_image_pixels(os.path.join(passes_dir, f"{slot}_{frame:04d}.exr"))
+
+        combined = load_pass("combined")
+        emit = load_pass("emit")[..., :3]
+        index = np.clip(np.round(load_pass("index")[..., 0]).astype(int), 0, material_count - 1)
+        pixels = combined.copy()
+        pixels[..., :3] -= emit
+        pixels[..., :3] += emit * emission_ratio[index]
+        for group, scale in light_ratio.items():
+            light = load_pass(f"light_{group}")[..., :3]
+            pixels[..., :3] += light * (scale * tint_ratio[index] - 1)
+        save_linear_frame(pixels, os.path.join(output_dir, f"frame_{frame:04d}.png"))
+
+    print(f"  Recolored {frame_count} frames for the {theme} theme: {output_dir}")
+    return output_dir
+
+
+def recolor_value(color, mapping):
+    """
+    Map one RGB(A) color onto a new palette.
+
+    A color lying on the segment between two palette colors (the Lottie fills blend
+    from a rest color toward the glow color) keeps its position along that segment.
+    Colors that match no palette color or segment are returned unchanged.
+    """
+    rgb = np.asarray(color[:3], dtype=float)
+    for (old_a, new_a), (old_b, new_b) in itertools.product(mapping, repeat=2):
+        span = old_b - old_a
+        length = float(span @ span)
+        t = float((rgb - old_a) @ span / length) if length > 1e-12 else 0.0
+        if 0 <= t <= 1 and np.allclose(old_a + t * span, rgb, atol=0.004):
+            return rounded(new_a + t * (new_b - new_a)) + [float(v) for v in color[3:]]
+    return list(color)
+
+
+def recolor_lottie(lottie, theme):
+    """Return a copy of a Lottie document with fill and stroke colors moved onto a theme palette."""
+    new = theme_palette(theme)
+    mapping = [(np.array(value[:3]), new[role]) for role, value in PALETTE_ROLES.items()]
+
+    def walk(node):
+        if isinstance(node, list):
+            return [walk(item) for item in node]
+        if not isinstance(node, dict):
+            return node
+        node = {key: walk(value) for key, value in node.items()}
+        if node.get("ty") in ("fl", "st") and isinstance(node.get("c"), dict):
+            color = dict(node["c"])
+            if color.get("a"):
+                color["k"] = [
+                    dict(key, **{end: recolor_value(key[end], mapping) for end in ("s", "e") if end in key})
+                    for key in color["k"]
+                ]
+            else:
+                color["k"] = recolor_value(color["k"], mapping)
+            node["c"] = color
+        return node
+
+    themed = walk(lottie)
+    themed["nm"] = f"{lottie.get('nm', '')}-{theme}"
+    return themed
+
+
+def sample_cubic_bezier(x1, y1, x2, y2, count=CSS_EASING_SAMPLES):
+    """Sample a CSS/Lottie ease curve from (0, 0) to (1, 1) at evenly spaced curve parameters, as (x, y) arrays."""
+    u = np.linspace(0.0, 1.0, count)
+    x = 3 * (1 - u) ** 2 * u * x1 + 3 * (1 - u) * u ** 2 * x2 + u ** 3
+    y = 3 * (1 - u) ** 2 * u * y1 + 3 * (1 - u) * u ** 2 * y2 + u ** 3
+    return x, y
+
+
+def simplify_stops(x, y, tolerance=CSS_LINEAR_TOLERANCE):
+    """
+    Fewest points of a sampled curve whose piecewise-linear interpolation stays within
+    tolerance of every sample (Ramer-Douglas-Peucker on the vertical error).
+    """
+    keep = [0, len(x) - 1]
+    stack = [(0, len(x) - 1)]
+    while stack:
+        a, b = stack.pop()
+        if b - a < 2:
+            continue
+        inner = np.arange(a + 1, b)
+        span = x[b] - x[a]
+        t = (x[inner] - x[a]) / span if span > 1e-12 else np.zeros(len(inner))
+        error = np.abs(y[a] + t * (y[b] - y[a]) - y[inner])
+        worst = int(np.argmax(error))
+        if error[worst] > tolerance:
+            split = int(inner[worst])
+            keep.append(split)
+            stack += [(a, split), (split, b)]
+    keep.sort()
+    return x[keep], y[keep]
+
+
+def css_linear_easing(x, y):
+    """Format easing stops as a CSS linear() function."""
+    stops = [f"{round(float(value), 4):g} {round(float(at) * 100, 2):g}%" for at, value in zip(x, y)]
+    return f"linear({', '.join(stops)})"
+
+
+def css_keyframe_easing(keyframe, mode, report):
+    """CSS timing function for the segment that starts at a Lottie keyframe."""
+    if keyframe.get("h"):
+        return "steps(1, end)"
+    if "o" not in keyframe or "i" not in keyframe:
+        return "linear"
+    handles = []
+    for handle in (keyframe["o"], keyframe["i"]):
+        for axis in ("x", "y"):
+            value = handle[axis]
+            if isinstance(value, list):
+                if max(value) - min(value) > 1e-6:
+                    report("per-dimension easing", "approximated with the first dimension's curve")
+                value = value[0]
+            handles.append(float(value))
+    x1, y1, x2, y2 = handles
+    if mode == "linear":
+        return css_linear_easing(*simplify_stops(*sample_cubic_bezier(x1, y1, x2, y2)))
+    return f"cubic-bezier({x1:g}, {y1:g}, {x2:g}, {y2:g})"
+
+
+def css_rgba(color, alpha=1.0):
+    """Format a 0-1 Lottie color as CSS rgba()."""
+    r, g, b = (int(round(float(channel) * 255)) for channel in color[:3])
+    return f"rgba({r}, {g}, {b}, {round(float(alpha), 3):g})"
+
+
+def css_track(prop, format_value, op, mode, report):
+    """
+    Convert a Lottie property to CSS keyframes as [(offset, value, easing)], or None if
+    it is static. Explicit 0% and 100% keyframes are added so CSS never falls back to
+    the element's un-animated style.
+    """
+    if not prop.get("a"):
+        return None
+    keys = prop["k"]
+    track = []
+    for index, keyframe in enumerate(keys):
+        value = keyframe["s"] if "s" in keyframe else keys[index - 1].get("e", keys[index - 1]["s"])
+        easing = css_keyframe_easing(keyframe, mode, report) if index < len(keys) - 1 else None
+        track.append((keyframe["t"] / op, format_value(value), easing))
+    if track[0][0] > 0:
+        track.insert(0, (0.0, track[0][1], "steps(1, end)"))
+    if track[-1][0] < 1:
+        track.append((1.0, track[-1][1], None))
+    return track
+
+
+def static_value(prop):
+    """A Lottie property's value at its first keyframe (or its static value)."""
+    return prop["k"][0]["s"] if prop.get("a") else prop["k"]
+
+
+def compile_lottie_css(lottie, mode=CSS_EASING):
+    """
+    Compile the shape layers of a Lottie document into CSS @keyframes and Web Animations
+    API keyframe arrays.
+
+    Each layer becomes one absolutely positioned element whose box is its rectangle.
+    Position, rotation and scale map onto the individual translate, rotate and scale
+    properties, which browsers apply in Lottie's order and run on the compositor. Layer
+    opacity maps to opacity, and fill color and opacity map to background-color.
+    Every animated channel gets its own @keyframes, so per-channel key times and eases
+    survive unchanged. Anything else is reported as unsupported and left out or
+    approximated. Returns (css text, WAAPI document, unsupported features).
+    """
+    name = lottie["nm"]
+    op = lottie["op"] - lottie.get("ip", 0)
+    duration = round(op / lottie["fr"] * 1000, 3)
+    unsupported = []
+    rules = [
+        f"/* Generated from {name}.json: {len(lottie['layers'])} layers, {duration}ms */",
+        f".{name} {{ position: relative; width: {lottie['w']}px; height: {lottie['h']}px; }}",
     ]
+    waapi = {"name": name, "duration": duration, "easing": mode, "layers": []}
+
+    for depth, layer in enumerate(lottie["layers"]):
+        layer_name = layer.get("nm", f"layer{depth + 1}")
+
+        def report(feature, detail, layer_name=layer_name):
+            entry = {"layer": layer_name, "feature": feature, "detail": detail}
+            if entry not in unsupported:
+                unsupported.append(entry)
+
+        if layer.get("ty") != 4:
+            report(f"layer type {layer.get('ty')}", "only shape layers are compiled; layer skipped")
+            continue
+        for key, feature in (("masksProperties", "masks"), ("ef", "effects"), ("tm", "time remapping"),
+                             ("parent", "parenting")):
+            if layer.get(key):
+                report(feature, "not representable on a single element; ignored")
+        if layer.get("ddd"):
+            report("3D layer", "rendered as 2D")
+
+        shapes = {shape["ty"]: shape for shape in layer.get("shapes", [])}
+        for shape_type in set(shapes) - {"rc", "fl", "gf"}:
+            report(f"shape {shape_type}", "only rectangles with solid or linear gradient fills are compiled")
+        rect = shapes.get("rc")
+        if rect is None:
+            report("no rectangle", "layer skipped")
+            continue
+        for key in ("s", "p", "r"):
+            if rect[key].get("a"):
+                report(f"animated rectangle {key}", "first value used")
+        width, height = static_value(rect["s"])
+        center = static_value(rect["p"])
+        left, top = center[0] - width / 2, center[1] - height / 2
+        transform = layer["ks"]
+        anchor = static_value(transform.get("a", {"a": 0, "k": [0, 0, 0]}))
+        if transform.get("a", {}).get("a"):
+            report("animated anchor", "first value used")
+
+        selector = f".{name}__{layer_name}"
+        style = {
+            "position": "absolute",
+            "left": f"{left:g}px",
+            "top": f"{top:g}px",
+            "width": f"{width:g}px",
+            "height": f"{height:g}px",
+            "border-radius": f"{static_value(rect['r']):g}px",
+            "transform-origin": f"{anchor[0] - left:g}px {anchor[1] - top:g}px",
+            "z-index": str(len(lottie["layers"]) - depth),  # Lottie draws the first layer on top
+        }
 
+        def translate(value):
+            return f"{value[0] - anchor[0]:g}px {value[1] - anchor[1]:g}px"
 
-def create_morph_lottie_layer(frame_count):
-    """Create Lottie layers for morph animation (plus to checkmark)."""
-    return [
-        # Horizontal bar (becomes short check arm)
-        {
-            "ddd": 0,
-            "ind": 1,
-            "ty": 4,
-            "nm": "HBar",
-            "sr": 1,
-            "ks": {
-                "o": {"a": 0, "k": 100},
-                "r": {
-                    "a": 1,
-                    "k": [
-                        {"t": 0, "s": [0], "e": [180]},
-                        {"t": 15, "s": [180], "e": [-45]},
-                        {"t": 30, "s": [-45]},
-                        {"t": 45, "s": [-45]}
-                    ]
-                },
-                "p": {
-                    "a": 1,
-                    "k": [
-                        {"t": 0, "s": [128, 64, 0]},
-                        {"t": 15, "s": [128, 64, 0]},
-                        {"t": 30, "s": [108, 72, 0]},
-                        {"t": 45, "s": [108, 72, 0]}
-                    ]
-                },
-                "a": {"a": 0, "k": [0, 0, 0]},
-                "s": {
-                    "a": 1,
-                    "k": [
-                        {"t": 0, "s": [100, 100, 100]},
-                        {"t": 15, "s": [50, 50, 50]},
-                        {"t": 30, "s": [50, 100, 100]},
-                        {"t": 45, "s": [50, 100, 100]}
-                    ]
-                }
-            },
-            "shapes": [{
-                "ty": "rc",
-                "d": 1,
-                "s": {"a": 0, "k": [60, 12]},
-                "p": {"a": 0, "k": [0, 0]},
-                "r": {"a": 0, "k": 4},
-                "nm": "Bar"
-            }, {
-                "ty": "fl",
-                "c": {"a": 0, "k": [0.549, 0.682, 0.769, 1]},
-                "o": {"a": 0, "k": 90},
-                "nm": "Fill"
-            }],
-            "ip": 0,
-            "op": frame_count,
-            "st": 0
-        },
-        # Vertical bar (becomes long check arm)
-        {
-            "ddd": 0,
-            "ind": 2,
-            "ty": 4,
-            "nm": "VBar",
-            "sr": 1,
-            "ks": {
-                "o": {"a": 0, "k": 100},
-                "r": {
-                    "a": 1,
-                    "k": [
-                        {"t": 0, "s": [90]},
-                        {"t": 15, "s": [270]},
-                        {"t": 30, "s": [45]},
-                        {"t": 45, "s": [45]}
-                    ]
-                },
-                "p": {
-                    "a": 1,
-                    "k": [
-                        {"t": 0, "s": [128, 64, 0]},
-                        {"t": 15, "s": [128, 64, 0]},
-                        {"t": 30, "s": [148, 52, 0]},
-                        {"t": 45, "s": [148, 52, 0]}
-                    ]
-                },
-                "a": {"a": 0, "k": [0, 0, 0]},
-                "s": {
-                    "a": 1,
-                    "k": [
-                        {"t": 0, "s": [100, 100, 100]},
-                        {"t": 15, "s": [50, 50, 50]},
-                        {"t": 30, "s": [120, 100, 100]},
-                        {"t": 45, "s": [120, 100, 100]}
-                    ]
-                }
-            },
-            "shapes": [{
-                "ty": "rc",
-                "d": 1,
-                "s": {"a": 0, "k": [60, 12]},
-                "p": {"a": 0, "k": [0, 0]},
-                "r": {"a": 0, "k": 4},
-                "nm": "Bar"
-            }, {
-                "ty": "fl",
-                "c": {"a": 0, "k": [0.549, 0.682, 0.769, 1]},
-                "o": {"a": 0, "k": 90},
-                "nm": "Fill"
-            }],
-            "ip": 0,
-            "op": frame_count,
-            "st": 0
+        def rotate(value):
+            return f"{(value[0] if isinstance(value, list) else value):g}deg"
+
+        def scale(value):
+            return f"{value[0] / 100:g} {value[1] / 100:g}"
+
+        def opacity(value):
+            return f"{(value[0] if isinstance(value, list) else value) / 100:g}"
+
+        channels = {
+            "translate": (transform["p"], translate),
+            "rotate": (transform.get("r", {"a": 0, "k": 0}), rotate),
+            "scale": (transform.get("s", {"a": 0, "k": [100, 100, 100]}), scale),
+            "opacity": (transform.get("o", {"a": 0, "k": 100}), opacity),
+        }
+        fill = shapes.get("fl")
+        if fill:
+            fill_alpha = (static_value(fill["o"]) if "o" in fill else 100) / 100
+            if fill.get("o", {}).get("a"):
+                report("animated fill opacity", "first value used")
+            channels["background-color"] = (fill["c"], lambda value, alpha=fill_alpha: css_rgba(value, alpha))
+        gradient = shapes.get("gf")
+        if gradient:
+            if gradient.get("t") != 1:
+                report("radial gradient", "compiled as linear")
+            if any(gradient[key].get("a") for key in ("s", "e", "o")) or gradient["g"]["k"].get("a"):
+                report("animated gradient", "first value used")
+            style["background-image"] = css_linear_gradient(gradient, left, top, width, height, report)
+
+        track_names = []
+        animations = []
+        for prop_name, (prop, format_value) in channels.items():
+            track = css_track(prop, format_value, op, mode, report)
+            if track is None:
+                style[prop_name] = format_value(static_value(prop))
+                continue
+            keyframes_name = f"{name}-{layer_name}-{prop_name}".lower()
+            track_names.append(keyframes_name)
+            lines = [f"@keyframes {keyframes_name} {{"]
+            for offset, value, easing in track:
+                timing = f" animation-timing-function: {easing};" if easing else ""
+                lines.append(f"  {round(offset * 100, 3):g}% {{ {prop_name}: {value};{timing} }}")
+            lines.append("}")
+            rules.append("\n".join(lines))
+            waapi_property = re.sub(r"-(\w)", lambda match: match.group(1).upper(), prop_name)
+            animations.append([
+                dict({"offset": round(offset, 5), waapi_property: value}, **({"easing": easing} if easing else {}))
+                for offset, value, easing in track
+            ])
+
+        if track_names:
+            style["animation"] = ", ".join(f"{track} {duration:g}ms linear both" for track in track_names)
+        rules.append(f"{selector} {{\n" + "".join(f"  {key}: {value};\n" for key, value in style.items()) + "}")
+        waapi["layers"].append({
+            "selector": selector,
+            "style": style,
+            "animations": [{"keyframes": keyframes, "options": {"duration": duration, "fill": "both"}}
+                           for keyframes in animations],
+        })
+
+    waapi["unsupported"] = unsupported
+    if unsupported:
+        rules.insert(1, "/* Unsupported: " + "; ".join(
+            f"{entry['layer']}: {entry['feature']} ({entry['detail']})" for entry in unsupported) + " */")
+    return "\n\n".join(rules) + "\n", waapi, unsupported
+
+
+def css_linear_gradient(gradient, left, top, width, height, report):
+    """
+    CSS linear-gradient() for a static Lottie gradient fill. Opacity stops are
+    interpolated at the color stop offsets, and the gradient line runs between the
+    Lottie start and end points in the element's box.
+    """
+    values = static_value(gradient["g"]["k"])
+    count = gradient["g"]["p"]
+    colors = np.asarray(values[:count * 4], dtype=float).reshape(count, 4)
+    opacity_values = values[count * 4:]
+    if len(opacity_values) % 2:
+        report("gradient opacity stops", "odd number of values; trailing value ignored")
+    alpha = np.asarray(opacity_values[:len(opacity_values) // 2 * 2], dtype=float).reshape(-1, 2)
+    start, end = np.asarray(static_value(gradient["s"])[:2]), np.asarray(static_value(gradient["e"])[:2])
+    direction = end - start
+    angle = math.degrees(math.atan2(direction[0], -direction[1]))  # CSS angles run clockwise from "up"
+
+    # CSS stretches the gradient line across the box along that angle; place stops on it
+    radians = math.radians(angle)
+    length = abs(width * math.sin(radians)) + abs(height * math.cos(radians))
+    center = np.array([left + width / 2, top + height / 2])
+    unit = direction / max(np.linalg.norm(direction), 1e-9)
+    stops = []
+    for offset, r, g, b in colors:
+        point = start + direction * offset
+        position = 50 + float((point - center) @ unit) / max(length, 1e-9) * 100
+        opacity = np.interp(offset, alpha[:, 0], alpha[:, 1]) if len(alpha) else 1.0
+        stops.append(f"{css_rgba((r, g, b), opacity)} {round(position, 2):g}%")
+    return f"linear-gradient({round(angle, 2):g}deg, {', '.join(stops)})"
+
+
+@traced
+def write_css_animation(lottie, mode=CSS_EASING):
+    """Write <name>.css and <name>.waapi.json for a Lottie document and print unsupported features."""
+    css, waapi, unsupported = compile_lottie_css(lottie, mode)
+    base = os.path.join(OUTPUT_DIR, lottie["nm"])
+    with open(base + ".css", 'w') as f:
+        f.write(css)
+    with open(base + ".waapi.json", 'w') as f:
+        json.dump(waapi, f, indent=2)
+    print(f"  Compiled CSS/WAAPI animation: {base}.css, {base}.waapi.json")
+    for entry in unsupported:
+        print(f"  Note: {entry['layer']} uses {entry['feature']} ({entry['detail']})")
+    return waapi
+
+
+def srgb_to_linear(values):
+    """Decode sRGB-encoded values in 0-1 to linear light."""
+    return np.where(values <= 0.04045, values / 12.92, ((values + 0.055) / 1.055) ** 2.4)
+
+
+def linear_to_srgb(values):
+    """Encode linear light values in 0-1 as sRGB."""
+    values = np.clip(values, 0.0, 1.0)
+    return np.where(values <= 0.0031308, values * 12.92, 1.055 * values ** (1 / 2.4) - 0.055)
+
+
+def mitchell(x):
+    """Mitchell-Netravali cubic (B = C = 1/3): sharp with little ringing on hard UI edges."""
+    x = np.abs(x)
+    near = (7 * x ** 3 - 12 * x ** 2 + 16 / 3) / 6
+    far = (-7 / 3 * x ** 3 + 12 * x ** 2 - 20 * x + 32 / 3) / 6
+    return np.where(x < 1, near, np.where(x < 2, far, 0.0))
+
+
+def resample_weights(source, target):
+    """
+    (target, source) matrix resampling one axis with the Mitchell filter, widened by the
+    reduction factor so every source pixel contributes when downsampling.
+    """
+    scale = source / target
+    support = max(scale, 1.0)
+    centers = (np.arange(target) + 0.5) * scale - 0.5
+    weights = mitchell((np.arange(source)[None, :] - centers[:, None]) / support)
+    return weights / weights.sum(axis=1, keepdims=True)
+
+
+def downsample_frames(frames, width, height):
+    """
+    Resize uint8 RGBA frames (N, H, W, 4) to width x height without dark or bright fringes.
+
+    Color is filtered premultiplied by alpha and in linear light, with separable
+    weight matrices applied to every frame at once, then unpremultiplied and re-encoded.
+    """
+    pixels = frames.astype(np.float32) / 255
+    alpha = pixels[..., 3:4]
+    premultiplied_linear = np.concatenate([srgb_to_linear(pixels[..., :3]) * alpha, alpha], axis=-1)
+    rows = resample_weights(frames.shape[1], height).astype(np.float32)
+    columns = resample_weights(frames.shape[2], width).astype(np.float32)
+    resized = np.einsum('yh,nhwc->nywc', rows, premultiplied_linear)
+    resized = np.einsum('xw,nywc->nyxc', columns, resized)
+
+    alpha = np.clip(resized[..., 3:4], 0.0, 1.0)
+    color = np.divide(resized[..., :3], alpha, out=np.zeros_like(resized[..., :3]), where=alpha > 1 / 510)
+    result = np.concatenate([linear_to_srgb(color), alpha], axis=-1)
+    return np.round(result * 255).astype(np.uint8)
+
+
+def density_label(scale):
+    """Label a device pixel ratio the way srcset does: 1x, 1.5x, 2x."""
+    return f"{scale:g}x"
+
+
+@traced
+def write_dpr_ladder(name, profile=DEFAULT_RENDER_PROFILE, scales=DPR_SCALES, frames=None):
+    """
+    Derive every density of a frame set rendered once at the largest scale.
+
+    Each scale gets its own <frames dir>@<scale>x directory, downsampled by
+    downsample_frames (the top scale is stored as rendered), and <name>.srcset.json lists
+    the directories, pixel sizes and a srcset string for the first frame.
+    """
+    scales = sorted(set(scales))
+    frames_dir = frames_dir_for(name, profile)
+    if frames is None:
+        frames = load_frames(frames_dir)
+    top = scales[-1]
+    base_width, base_height = frames.shape[2] / top, frames.shape[1] / top
+
+    densities = {}
+    for scale in scales:
+        width, height = round(base_width * scale), round(base_height * scale)
+        resized = frames if scale == top else downsample_frames(frames, width, height)
+        directory = f"{frames_dir}@{density_label(scale)}"
+        os.makedirs(directory, exist_ok=True)
+        total = sum(write_png(os.path.join(directory, f"frame_{frame:04d}.png"), pixels)
+                    for frame, pixels in enumerate(resized, 1))
+        densities[density_label(scale)] = {
+            "directory": os.path.relpath(directory, OUTPUT_DIR),
+            "width": width,
+            "height": height,
+            "bytes": total,
         }
+        print(f"  {density_label(scale)}: {width}x{height}, {total} B")
+
+    manifest = {
+        "frames": len(frames),
+        "fps": FPS,
+        "rendered_scale": top,
+        "densities": densities,
+        "srcset": ", ".join(f"{entry['directory']}/frame_0001.png {label}" for label, entry in densities.items()),
+    }
+    with open(output_base(name, profile) + ".srcset.json", 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def frame_files(frames_dir):
+    """List a frame set's PNG files in frame order."""
+    return sorted(
+        os.path.join(frames_dir, f) for f in os.listdir(frames_dir)
+        if f.startswith("frame_") and f.endswith(".png")
+    )
+
+
+def load_frames(frames_dir):
+    """Load a rendered frame set as a uint8 array shaped (frames, height, width, 4)."""
+    return np.stack([
+        np.round(load_image_pixels(path) * 255).astype(np.uint8)
+        for path in frame_files(frames_dir)
+    ])
+
+
+def png_chunk(tag, data):
+    """Serialize one PNG chunk."""
+    return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xffffffff)
+
+
+def filter_png_rows(rows, bpp, filter_type):
+    """
+    Apply one PNG filter to every scanline at once.
+
+    rows is (height, stride) uint8. Filters only look at unfiltered neighbours, so each
+    one is a handful of whole-array operations.
+    """
+    raw = rows.astype(np.int16)
+    left = np.zeros_like(raw)
+    left[:, bpp:] = raw[:, :-bpp]
+    up = np.zeros_like(raw)
+    up[1:] = raw[:-1]
+    if filter_type == 0:
+        filtered = raw
+    elif filter_type == 1:
+        filtered = raw - left
+    elif filter_type == 2:
+        filtered = raw - up
+    elif filter_type == 3:
+        filtered = raw - (left + up) // 2
+    else:
+        up_left = np.zeros_like(raw)
+        up_left[1:, bpp:] = raw[:-1, :-bpp]
+        estimate = left + up - up_left
+        dist_left, dist_up, dist_up_left = np.abs(estimate - left), np.abs(estimate - up), np.abs(estimate - up_left)
+        predictor = np.where((dist_left <= dist_up) & (dist_left <= dist_up_left), left,
+                             np.where(dist_up <= dist_up_left, up, up_left))
+        filtered = raw - predictor
+    return (filtered & 0xff).astype(np.uint8)
+
+
+def png_scanlines(pixels, filter_type=None):
+    """
+    Filter an image into PNG scanlines, each prefixed with its filter byte.
+
+    With filter_type None every row picks the filter with the smallest sum of absolute
+    signed residuals, the heuristic libpng uses.
+    """
+    height = pixels.shape[0]
+    bpp = pixels.shape[2] if pixels.ndim == 3 else 1
+    rows = pixels.reshape(height, -1)
+    if filter_type is not None:
+        chosen = np.full(height, filter_type)
+        filtered = filter_png_rows(rows, bpp, filter_type)
+    else:
+        candidates = np.stack([filter_png_rows(rows, bpp, f) for f in range(5)])
+        cost = np.abs(candidates.view(np.int8).astype(np.int32)).sum(axis=2)
+        chosen = cost.argmin(axis=0)
+        filtered = candidates[chosen, np.arange(height)]
+    return np.concatenate([chosen.astype(np.uint8)[:, None], filtered], axis=1)
+
+
+def encode_png(pixels, level=9, filter_type=None, strategy=zlib.Z_DEFAULT_STRATEGY, palette=None):
+    """
+    Encode a uint8 image as PNG bytes without any metadata chunks.
+
+    pixels is (height, width, 4) RGBA or (height, width, 3) RGB, or (height, width)
+    palette indices when palette is an (n, 4) RGBA array.
+    """
+    height, width = pixels.shape[:2]
+    if palette is not None:
+        color_type = 3
+    else:
+        color_type = 6 if pixels.shape[2] == 4 else 2
+    header = struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0)
+
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 15, 9, strategy)
+    data = compressor.compress(png_scanlines(pixels, filter_type).tobytes()) + compressor.flush()
+
+    chunks = [png_chunk(b"IHDR", header)]
+    if palette is not None:
+        chunks.append(png_chunk(b"PLTE", palette[:, :3].astype(np.uint8).tobytes()))
+        alpha = palette[:, 3].astype(np.uint8)
+        if (alpha < 255).any():
+            opaque_tail = len(alpha) - np.argmax(alpha[::-1] < 255)
+            chunks.append(png_chunk(b"tRNS", alpha[:opaque_tail].tobytes()))
+    chunks.append(png_chunk(b"IDAT", data))
+    chunks.append(png_chunk(b"IEND", b""))
+    return b"\x89PNG\r\n\x1a\n" + b"".join(chunks)
+
+
+def write_png(path, pixels, **options):
+    """Encode and write a PNG file, returning its size in bytes."""
+    data = encode_png(pixels, **options)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return len(data)
+
+
+def perceptual_features(pixels):
+    """
+    Map straight uint8 RGBA to a space where Euclidean distance follows visible
+    difference: color premultiplied by alpha and weighted by its share of luma, plus alpha.
+    """
+    rgba = np.asarray(pixels, dtype=np.float32) / 255
+    alpha = rgba[..., 3:4]
+    return np.concatenate([rgba[..., :3] * alpha * PNG_PALETTE_WEIGHTS, alpha], axis=-1)
+
+
+def nearest_colors(features, centers, chunk=65536):
+    """Index of the nearest center for every feature row, in chunks to bound memory."""
+    center_norms = (centers ** 2).sum(axis=1)
+    labels = np.empty(len(features), dtype=np.int64)
+    for start in range(0, len(features), chunk):
+        block = features[start:start + chunk]
+        distances = center_norms[None, :] - 2 * block @ centers.T
+        labels[start:start + chunk] = distances.argmin(axis=1)
+    return labels
+
+
+def median_cut(features, counts, colors):
+    """Split the weighted colors into boxes along their widest channel at the weighted median."""
+    def spread(box):
+        return float(np.ptp(features[box], axis=0).max() * counts[box].sum()) if len(box) > 1 else -1.0
+
+    boxes = [np.arange(len(features))]
+    spreads = [spread(boxes[0])]
+    while len(boxes) < colors:
+        i = int(np.argmax(spreads))
+        if spreads[i] <= 0:
+            break
+        box = boxes.pop(i)
+        spreads.pop(i)
+        channel = int(np.ptp(features[box], axis=0).argmax())
+        order = box[np.argsort(features[box, channel], kind='stable')]
+        cumulative = np.cumsum(counts[order])
+        split = min(max(int(np.searchsorted(cumulative, cumulative[-1] / 2)) + 1, 1), len(order) - 1)
+        for part in (order[:split], order[split:]):
+            boxes.append(part)
+            spreads.append(spread(part))
+    return np.array([np.average(features[box], axis=0, weights=counts[box]) for box in boxes])
+
+
+def build_palette(frames, colors=PNG_PALETTE_COLORS, samples=PNG_PALETTE_SAMPLES, iterations=8):
+    """
+    Build one RGBA palette for a whole frame set, so quantized frames do not flicker.
+
+    Entry 0 is fully transparent; the rest come from a median cut of the visible pixels
+    in perceptual_features space, refined with a few k-means iterations. Returns an
+    (n, 4) uint8 array of straight RGBA.
+    """
+    visible = frames[frames[..., 3] > 0]
+    if len(visible) > samples:
+        visible = visible[::len(visible) // samples + 1]
+    unique, counts = np.unique(visible, axis=0, return_counts=True)
+    features = perceptual_features(unique)
+    counts = counts.astype(np.float64)
+
+    centers = median_cut(features, counts, colors - 1)
+    for _ in range(iterations):
+        labels = nearest_colors(features, centers)
+        totals = np.bincount(labels, counts, len(centers))
+        sums = np.stack([np.bincount(labels, counts * features[:, c], len(centers)) for c in range(4)], axis=1)
+        used = totals > 0
+        centers[used] = sums[used] / totals[used, None]
+
+    alpha = np.clip(centers[:, 3:4], 1 / 255, 1)
+    rgb = np.clip(centers[:, :3] / PNG_PALETTE_WEIGHTS / alpha, 0, 1)
+    palette = np.round(np.concatenate([rgb, alpha], axis=1) * 255).astype(np.uint8)
+    return np.concatenate([np.zeros((1, 4), dtype=np.uint8), palette])
+
+
+def palette_indices(pixels, palette):
+    """Map straight RGBA pixels to their nearest palette entries; transparent pixels use entry 0."""
+    indices = nearest_colors(perceptual_features(pixels.reshape(-1, 4)), perceptual_features(palette[1:])) + 1
+    indices[pixels.reshape(-1, 4)[:, 3] == 0] = 0
+    return indices.reshape(pixels.shape[:2]).astype(np.uint8)
+
+
+def smallest_png(pixels, palette=None):
+    """Encode with every level, filter and strategy in the PNG_OPTIMIZE_* grid; return the smallest and its settings."""
+    best = None
+    for level, filter_type, strategy in itertools.product(PNG_OPTIMIZE_LEVELS, PNG_OPTIMIZE_FILTERS,
+                                                          PNG_OPTIMIZE_STRATEGIES):
+        data = encode_png(pixels, level, filter_type, strategy, palette)
+        if best is None or len(data) < len(best[0]):
+            best = data, {"level": level, "filter": "adaptive" if filter_type is None else filter_type,
+                          "strategy": PNG_STRATEGY_NAMES[strategy]}
+    return best
+
+
+def optimize_png_frame(path, pixels, palette=None, min_ssim=PNG_QUANTIZE_MIN_SSIM):
+    """
+    Rewrite one frame PNG as small as the encoder grid allows, without metadata chunks.
+
+    Fully transparent pixels are zeroed first, which changes nothing visible. With a
+    palette the frame is also tried as indexed color, kept only when its SSIM against the
+    original (premultiplied) reaches min_ssim. The file is replaced only when smaller.
+    """
+    original = os.path.getsize(path)
+    pixels = pixels.copy()
+    pixels[pixels[..., 3] == 0] = 0
+    data, settings = smallest_png(pixels)
+    entry = {"frame": os.path.basename(path), "original_bytes": original, "mode": "truecolor"}
+
+    if palette is not None:
+        indices = palette_indices(pixels, palette)
+        score = image_ssim(premultiplied(pixels / 255.0), premultiplied(palette[indices] / 255.0))
+        entry["palette_ssim"] = round(score, 5)
+        if score >= min_ssim:
+            indexed, indexed_settings = smallest_png(indices, palette)
+            if len(indexed) < len(data):
+                data, settings, entry["mode"] = indexed, indexed_settings, "palette"
+
+    if len(data) < original:
+        with open(path, 'wb') as f:
+            f.write(data)
+    else:
+        entry["mode"] = "original"
+    entry.update(settings, bytes=min(len(data), original))
+    return entry
+
+
+@traced
+def optimize_frame_pngs(name, profile=DEFAULT_RENDER_PROFILE, quantize=False, min_ssim=PNG_QUANTIZE_MIN_SSIM,
+                        workers=None, frames=None):
+    """
+    Losslessly recompress an animation's frame PNGs (and optionally palette-quantize them)
+    across a pool of workers, writing png-optimization.json into the frames directory.
+
+    Workers are threads: the time goes into zlib and NumPy, which release the GIL, and
+    Blender's embedded interpreter cannot reliably spawn processes that re-import this
+    script. Frames are decoded once here (or taken from the streamed array).
+    """
+    frames_dir = frames_dir_for(name, profile)
+    paths = frame_files(frames_dir) if os.path.isdir(frames_dir) else []
+    if not paths:
+        print(f"  No PNG frames to optimize for {name}")
+        return None
+    if frames is None:
+        frames = load_frames(frames_dir)
+
+    started = time.perf_counter()
+    palette = build_palette(frames) if quantize else None
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        entries = list(pool.map(lambda job: optimize_png_frame(*job, palette, min_ssim), zip(paths, frames)))
+
+    original = sum(entry["original_bytes"] for entry in entries)
+    optimized = sum(entry["bytes"] for entry in entries)
+    report = {
+        "frames": len(entries),
+        "original_bytes": original,
+        "bytes": optimized,
+        "saved_percent": round(100 * (1 - optimized / original), 1) if original else 0.0,
+        "palette_colors": len(palette) if palette is not None else None,
+        "palette_frames": sum(entry["mode"] == "palette" for entry in entries),
+        "seconds": round(time.perf_counter() - started, 2),
+        "workers": workers or os.cpu_count(),
+        "frame_results": entries,
+    }
+    with open(os.path.join(frames_dir, PNG_OPTIMIZE_REPORT), 'w') as f:
+        json.dump(report, f, indent=2)
+    quantized = f", {report['palette_frames']} palette" if quantize else ""
+    print(f"  Optimized {len(entries)} PNGs: {original} -> {optimized} B ({report['saved_percent']}% smaller"
+          f"{quantized}) in {report['seconds']}s")
+    return report
+
+
+def next_power_of_two(value):
+    """Smallest power of two that is at least value."""
+    return 1 << max(0, int(value - 1).bit_length())
+
+
+def pack_rects(sizes, power_of_two=False, max_size=ATLAS_MAX_SIZE):
+    """
+    Shelf-pack (width, height) rectangles into one sheet.
+
+    Rectangles go left to right in rows of decreasing height, with the row width chosen
+    to keep the sheet roughly square. Returns per-rectangle (x, y) positions in input
+    order and the sheet's (width, height).
+    """
+    order = sorted(range(len(sizes)), key=lambda i: (-sizes[i][1], -sizes[i][0]))
+    area = sum(w * h for w, h in sizes)
+    shelf_width = max(max(w for w, _ in sizes), int(math.ceil(math.sqrt(area))))
+    if power_of_two:
+        shelf_width = next_power_of_two(shelf_width)
+
+    positions = [None] * len(sizes)
+    x = y = shelf_height = sheet_width = 0
+    for i in order:
+        w, h = sizes[i]
+        if x + w > shelf_width:
+            x, y, shelf_height = 0, y + shelf_height, 0
+        positions[i] = (x, y)
+        x += w
+        shelf_height = max(shelf_height, h)
+        sheet_width = max(sheet_width, x)
+    sheet_height = y + shelf_height
+
+    if power_of_two:
+        sheet_width, sheet_height = next_power_of_two(sheet_width), next_power_of_two(sheet_height)
+    if max(sheet_width, sheet_height) > max_size:
+        raise ValueError(f"Sheet of {sheet_width}x{sheet_height} exceeds the {max_size}px limit")
+    return positions, (sheet_width, sheet_height)
+
+
+def opaque_bounds(frames):
+    """Bounding box (x, y, width, height) of every pixel with any alpha, across all frames."""
+    coverage = (frames[..., 3] > 0).any(axis=0)
+    if not coverage.any():
+        return 0, 0, 1, 1
+    rows = np.flatnonzero(coverage.any(axis=1))
+    cols = np.flatnonzero(coverage.any(axis=0))
+    return int(cols[0]), int(rows[0]), int(cols[-1] - cols[0] + 1), int(rows[-1] - rows[0] + 1)
+
+
+def convert_image(png_path, image_format, quality):
+    """Convert a PNG with cwebp or avifenc; returns the output path or None if the tool is missing."""
+    output_path = os.path.splitext(png_path)[0] + "." + image_format
+    if image_format == "webp":
+        command = ["cwebp", "-quiet", "-exact", "-q", str(quality), "-alpha_q", "100", png_path, "-o", output_path]
+    elif image_format == "avif":
+        command = ["avifenc", "-q", str(quality), "--qalpha", "100", png_path, output_path]
+    else:
+        raise ValueError(f"Unsupported image format: {image_format}")
+
+    if shutil.which(command[0]) is None:
+        print(f"  Note: {image_format.upper()} output skipped ({command[0]} not found)")
+        return None
+    subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+    return output_path
+
+
+@traced
+def pack_sprite_sheet(name, profile=DEFAULT_RENDER_PROFILE, formats=ATLAS_FORMATS, power_of_two=False, frames=None):
+    """
+    Pack a rendered frame set into a single atlas image with a JSON frame map.
+
+    The transparent margin shared by every frame is trimmed, identical frames are stored
+    once, and runs of repeated frames become one entry with a longer duration. frames
+    may be a streamed frame array; otherwise the PNG sequence is read.
+    """
+    if frames is None:
+        frames = load_frames(frames_dir_for(name, profile))
+    x0, y0, width, height = opaque_bounds(frames)
+    trimmed = frames[:, y0:y0 + height, x0:x0 + width]
+
+    unique = {}  # frame digest -> index of its first occurrence
+    timeline = []  # [first occurrence, run length]
+    for i, frame in enumerate(trimmed):
+        first = unique.setdefault(hashlib.sha1(frame.tobytes()).digest(), i)
+        if timeline and timeline[-1][0] == first:
+            timeline[-1][1] += 1
+        else:
+            timeline.append([first, 1])
+
+    stored = list(unique.values())
+    positions, (sheet_width, sheet_height) = pack_rects([(width, height)] * len(stored), power_of_two)
+    position_of = dict(zip(stored, positions))
+
+    sheet = np.zeros((sheet_height, sheet_width, 4), dtype=np.uint8)
+    for first, (x, y) in position_of.items():
+        sheet[y:y + height, x:x + width] = trimmed[first]
+
+    base = output_base(name, profile) + ".atlas"
+    png_path = base + ".png"
+    images = {"png": os.path.basename(png_path)}
+    sizes = {"png": write_png(png_path, sheet)}
+    for image_format in formats:
+        output = convert_image(png_path, image_format, ATLAS_QUALITY[image_format])
+        if output:
+            images[image_format] = os.path.basename(output)
+            sizes[image_format] = os.path.getsize(output)
+
+    frame_ms = 1000.0 / FPS
+    frame_map = {
+        "images": images,
+        "bytes": sizes,
+        "size": {"w": sheet_width, "h": sheet_height},
+        "sourceSize": {"w": frames.shape[2], "h": frames.shape[1]},
+        "offset": {"x": x0, "y": y0},  # Where each trimmed frame sits on the source canvas
+        "fps": FPS,
+        "frames": [
+            {"x": position_of[first][0], "y": position_of[first][1], "w": width, "h": height,
+             "duration": round(count * frame_ms, 2)}
+            for first, count in timeline
+        ],
+    }
+    with open(base + ".json", 'w') as f:
+        json.dump(frame_map, f, indent=2)
+
+    print(f"  Packed {len(frames)} frames ({len(stored)} unique, {width}x{height} trimmed) into "
+          f"a {sheet_width}x{sheet_height} atlas: " + ", ".join(f"{k} {v} B" for k, v in sizes.items()))
+    return frame_map
+
+
+def canonical_frames(frames):
+    """Copy of a uint8 RGBA sequence with fully transparent pixels zeroed, so hidden color never counts as change."""
+    frames = frames.copy()
+    frames[frames[..., 3] == 0] = 0
+    return frames
+
+
+def dirty_rects(previous, current, tile=DELTA_TILE):
+    """
+    Rectangles (x, y, width, height) covering every pixel that differs between two frames.
+
+    Changed pixels are first marked on a coarse tile grid; contiguous rows of changed
+    tiles form bands, each band is split into runs of changed tile columns, and every
+    run is shrunk to the exact changed pixels inside it. When the pieces cover nearly
+    as much as their union, the union is returned as one rectangle instead.
+    """
+    changed = (previous != current).any(axis=2)
+    if not changed.any():
+        return []
+    height, width = changed.shape
+    rows, cols = -(-height // tile), -(-width // tile)
+    padded = np.zeros((rows * tile, cols * tile), dtype=bool)
+    padded[:height, :width] = changed
+    grid = padded.reshape(rows, tile, cols, tile).any(axis=(1, 3))
+
+    rects = []
+    band_rows = np.flatnonzero(grid.any(axis=1))
+    for band in np.split(band_rows, np.flatnonzero(np.diff(band_rows) > 1) + 1):
+        columns = np.flatnonzero(grid[band].any(axis=0))
+        for run in np.split(columns, np.flatnonzero(np.diff(columns) > 1) + 1):
+            y0, y1 = band[0] * tile, min((band[-1] + 1) * tile, height)
+            x0, x1 = run[0] * tile, min((run[-1] + 1) * tile, width)
+            region = changed[y0:y1, x0:x1]
+            ys, xs = np.flatnonzero(region.any(axis=1)), np.flatnonzero(region.any(axis=0))
+            rects.append((int(x0 + xs[0]), int(y0 + ys[0]), int(xs[-1] - xs[0] + 1), int(ys[-1] - ys[0] + 1)))
+
+    union = union_rect(rects)
+    if sum(w * h for _, _, w, h in rects) > DELTA_MERGE_RATIO * union[2] * union[3]:
+        return [union]
+    return rects
+
+
+def union_rect(rects):
+    """Smallest rectangle (x, y, width, height) enclosing all the given rectangles."""
+    x0 = min(x for x, _, _, _ in rects)
+    y0 = min(y for _, y, _, _ in rects)
+    x1 = max(x + w for x, _, w, _ in rects)
+    y1 = max(y + h for _, y, _, h in rects)
+    return x0, y0, x1 - x0, y1 - y0
+
+
+def delta_timeline(frames, tile=DELTA_TILE):
+    """
+    Describe a frame sequence as changes against the previous frame.
+
+    Returns [frame index, dirty rects, run length] entries. The first frame is compared
+    with a transparent canvas, and frames identical to their predecessor only extend
+    the previous entry's run.
+    """
+    frames = canonical_frames(frames)
+    previous = np.zeros_like(frames[0])
+    timeline = []
+    for i, frame in enumerate(frames):
+        rects = dirty_rects(previous, frame, tile)
+        if timeline and not rects:
+            timeline[-1][2] += 1
+        else:
+            timeline.append([i, rects, 1])
+        previous = frame
+    return timeline
+
+
+def encode_apng(frames, fps=FPS, level=9):
+    """
+    Encode a (frames, height, width, 4) uint8 sequence as a looping APNG.
+
+    After the first full frame, each APNG frame only carries the rectangle enclosing
+    that frame's dirty regions, written with the SOURCE blend op over a NONE dispose so
+    it simply replaces those pixels; unchanged frames lengthen the previous delay.
+    """
+    height, width = frames.shape[1:3]
+    frames = canonical_frames(frames)
+    timeline = delta_timeline(frames)
+    chunks = [
+        png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)),
+        png_chunk(b"acTL", struct.pack(">II", len(timeline), 0)),
     ]
+    sequence = 0
+    for i, (index, rects, run) in enumerate(timeline):
+        x, y, w, h = (0, 0, width, height) if i == 0 else union_rect(rects)
+        chunks.append(png_chunk(b"fcTL", struct.pack(">IIIIIHHBB", sequence, w, h, x, y, run, fps, 0, 0)))
+        sequence += 1
+        data = zlib.compress(png_scanlines(frames[index, y:y + h, x:x + w]).tobytes(), level)
+        if i == 0:
+            chunks.append(png_chunk(b"IDAT", data))
+        else:
+            chunks.append(png_chunk(b"fdAT", struct.pack(">I", sequence) + data))
+            sequence += 1
+    chunks.append(png_chunk(b"IEND", b""))
+    return b"\x89PNG\r\n\x1a\n" + b"".join(chunks)
+
+
+def posterize(frames, quality):
+    """
+    Reduce color depth for APNG's quality knob: 100 keeps 8 bits per channel, 0 keeps 2.
+
+    Alpha is left untouched, and fully transparent pixels are zeroed so they compress to
+    nothing.
+    """
+    bits = 2 + int(round(quality * 6 / 100))
+    result = frames.copy()
+    if bits < 8:
+        step = 255 / ((1 << bits) - 1)
+        result[..., :3] = np.round(np.round(frames[..., :3] / step) * step).astype(np.uint8)
+    result[result[..., 3] == 0] = 0
+    return result
+
+
+def encode_motion(image_format, frame_paths, output_path, quality, frames=None):
+    """
+    Encode one animated image at a quality setting; returns its size, or None when the
+    encoder tool is missing.
+    """
+    if image_format == "apng":
+        with open(output_path, 'wb') as f:
+            f.write(encode_apng(posterize(frames, quality)))
+        return os.path.getsize(output_path)
+
+    if image_format == "webp":
+        # img2webp takes whole-millisecond delays, so 60 fps plays at ~59
+        command = ["img2webp", "-loop", "0", "-lossy", "-q", str(quality),
+                   "-d", str(round(1000 / FPS)), *frame_paths, "-o", output_path]
+    elif image_format == "avif":
+        command = ["avifenc", "--fps", str(FPS), "-q", str(quality), "--qalpha", str(quality),
+                   *frame_paths, output_path]
+    else:
+        raise ValueError(f"Unsupported animated format: {image_format}")
+
+    if shutil.which(command[0]) is None:
+        return None
+    subprocess.run(command, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return os.path.getsize(output_path)
+
+
+def search_quality(encode, low, high, budget):
+    """
+    Binary-search the highest quality whose encoded size fits the budget.
+
+    encode(quality) returns a size in bytes (or None if the encoder is unavailable).
+    Returns (quality, size, attempts); quality is None when even the lowest setting is
+    over budget.
+    """
+    attempts = []
+    best = None
+    while low <= high:
+        quality = (low + high) // 2
+        size = encode(quality)
+        if size is None:
+            return None, None, attempts
+        attempts.append({"quality": quality, "bytes": size})
+        if size <= budget:
+            best = (quality, size)
+            low = quality + 1
+        else:
+            high = quality - 1
+    if best is None:
+        return None, attempts[-1]["bytes"], attempts
+    return best[0], best[1], attempts
+
+
+@traced
+def encode_motion_formats(name, profile=DEFAULT_RENDER_PROFILE, formats=MOTION_FORMATS, budget=MOTION_BUDGET,
+                          frames=None):
+    """
+    Write animated WebP/AVIF/APNG versions of a frame set, each at the highest quality
+    that fits the byte budget, and record the chosen settings in MOTION_REPORT.
+
+    Streamed frames are encoded as they are; img2webp and avifenc only read files, so
+    for those a fast temporary PNG sequence is written.
+    """
+    base = output_base(name, profile)
+    workdir = None
+    if frames is None:
+        frame_paths = frame_files(frames_dir_for(name, profile))
+        if "apng" in formats:
+            frames = load_frames(frames_dir_for(name, profile))
+    elif set(formats) - {"apng"}:
+        workdir = tempfile.mkdtemp(prefix=f"{name}-frames-")
+        frame_paths = []
+        for index, pixels in enumerate(frames, start=1):
+            frame_paths.append(os.path.join(workdir, f"frame_{index:04d}.png"))
+            write_png(frame_paths[-1], pixels, level=1)
+    else:
+        frame_paths = []
+
+    results = {}
+    for image_format in formats:
+        # APNG keeps a .png extension so browsers and servers treat it as an image
+        output_path = f"{base}.apng.png" if image_format == "apng" else f"{base}.{image_format}"
+
+        def encode(quality):
+            return encode_motion(image_format, frame_paths, output_path, quality, frames)
+
+        low, high = MOTION_QUALITY_RANGE[image_format]
+        quality, size, attempts = search_quality(encode, low, high, budget)
+        if not attempts:
+            print(f"  Note: animated {image_format.upper()} skipped (encoder not found)")
+            continue
+        if quality is None:
+            quality = low
+            size = encode(quality)
+        elif attempts[-1]["quality"] != quality:
+            encode(quality)  # Leave the chosen setting's file on disk
+
+        results[image_format] = {
+            "file": os.path.basename(output_path),
+            "quality": quality,
+            "bytes": size,
+            "over_budget": size > budget,
+            "meets_min_quality": quality >= MOTION_MIN_QUALITY[image_format],
+            "attempts": attempts,
+        }
+        print(f"  Animated {image_format.upper()}: quality {quality}, {size} B "
+              f"after {len(attempts)} encodes{' (over budget)' if size > budget else ''}")
+
+    if workdir:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    eligible = [f for f, r in results.items() if not r["over_budget"] and r["meets_min_quality"]]
+    recommended = min(eligible, key=lambda f: results[f]["bytes"]) if eligible else None
+    if recommended:
+        print(f"  Recommended format: {recommended.upper()} ({results[recommended]['bytes']} B)")
+    elif results:
+        print(f"  Warning: no animated format fits {budget} B at its minimum quality")
+
+    report = {"profile": profile, "budget": budget, "recommended": recommended, "formats": results}
+    update_report(os.path.join(OUTPUT_DIR, MOTION_REPORT), os.path.basename(base), report)
+    return report
+
+
+@traced
+def write_delta_patches(name, profile=DEFAULT_RENDER_PROFILE, tile=DELTA_TILE, frames=None):
+    """
+    Store a frame set as the regions that change between frames.
+
+    Every dirty rectangle is cut from its frame and packed into <name>.delta.png; the
+    manifest <name>.delta.json lists per displayed frame its duration and the patches to
+    copy (not blend) from the sheet onto the canvas, starting from a transparent canvas.
+    """
+    frames_dir = frames_dir_for(name, profile)
+    streamed = frames is not None
+    frames = canonical_frames(frames if streamed else load_frames(frames_dir))
+    timeline = delta_timeline(frames, tile)
+    patches = [(index, rect) for index, rects, _ in timeline for rect in rects]
+    positions, (sheet_width, sheet_height) = pack_rects([(w, h) for _, (_, _, w, h) in patches] or [(1, 1)])
+
+    sheet = np.zeros((sheet_height, sheet_width, 4), dtype=np.uint8)
+    for (index, (x, y, w, h)), (sx, sy) in zip(patches, positions):
+        sheet[sy:sy + h, sx:sx + w] = frames[index, y:y + h, x:x + w]
+
+    base = output_base(name, profile) + ".delta"
+    sheet_bytes = write_png(base + ".png", sheet)
+    frame_ms = 1000.0 / FPS
+    placed = iter(positions)
+    manifest = {
+        "image": os.path.basename(base + ".png"),
+        "size": {"w": frames.shape[2], "h": frames.shape[1]},
+        "fps": FPS,
+        "blend": "source",  # Patches replace the canvas pixels, alpha included
+        "frames": [
+            {
+                "duration": round(count * frame_ms, 2),
+                "patches": [
+                    dict(zip(("x", "y", "w", "h", "sx", "sy"), (*rect, *next(placed))))
+                    for rect in rects
+                ],
+            }
+            for _, rects, count in timeline
+        ],
+    }
+    with open(base + ".json", 'w') as f:
+        json.dump(manifest, f, separators=(',', ':'))
+
+    patch_pixels = sum(w * h for _, (_, _, w, h) in patches)
+    full_bytes = "" if streamed else f" (full frames {sum(map(os.path.getsize, frame_files(frames_dir)))} B)"
+    print(f"  Delta patches: {len(patches)} patches covering {patch_pixels / frames[..., 0].size:.0%} of the "
+          f"frame pixels, {sheet_bytes} B{full_bytes}")
+    return manifest
+
+
+class FrameCache:
+    """Least-recently-used cache of encoded frames, bounded by total bytes."""
+
+    def __init__(self, max_bytes=SERVE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = collections.OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        data = self.entries.get(key)
+        if data is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return data
+
+    def put(self, key, data):
+        if key in self.entries:
+            self.bytes -= len(self.entries.pop(key))
+        self.entries[key] = data
+        self.bytes += len(data)
+        while self.bytes > self.max_bytes and len(self.entries) > 1:
+            _, evicted = self.entries.popitem(last=False)
+            self.bytes -= len(evicted)
+
+    def stats(self):
+        return {"entries": len(self.entries), "bytes": self.bytes, "max_bytes": self.max_bytes,
+                "hits": self.hits, "misses": self.misses}
+
+
+class PreviewSession:
+    """
+    A warm Blender session that renders single frames on demand.
+
+    The scene for the requested animation and profile is built once and kept until a
+    request asks for another. Rendered frames are cached by a hash of the scene state
+    at that frame: the spec, the profile settings and every F-curve's value. Frames
+    where nothing moves, such as the hover hold, share one render.
+    """
+
+    def __init__(self, cache_bytes=SERVE_CACHE_BYTES):
+        self.cache = FrameCache(cache_bytes)
+        self.current = None
+        self.frame_count = 0
+        self.base_hash = None
+        self.workdir = tempfile.mkdtemp(prefix="button-preview-")
+
+    def load(self, name, profile):
+        """Build the scene for an animation and profile unless it is already loaded."""
+        if self.current == (name, profile):
+            return
+        spec = ANIMATIONS[name]
+        self.frame_count = build_spec_scene(spec, profile)
+        self.current = (name, profile)
+        settings = get_render_profile(profile, name)
+        self.base_hash = hashlib.sha1(json.dumps([spec, settings], sort_keys=True).encode()).hexdigest()
+
+    def state_hash(self, frame):
+        """Hash the loaded scene's animated state at a frame."""
+        actions = sorted(bpy.data.actions, key=lambda action: action.name)
+        values = [[fcurve.data_path, fcurve.array_index, round(fcurve.evaluate(frame), 6)]
+                  for action in actions for fcurve in action.fcurves]
+        return hashlib.sha1(json.dumps([self.base_hash, values]).encode()).hexdigest()
+
+    def render(self, name, frame, profile):
+        """Return (PNG bytes, cache hit, seconds) for one frame, rendering it if needed."""
+        started = time.perf_counter()
+        self.load(name, profile)
+        if not 1 <= frame <= self.frame_count:
+            raise ValueError(f"{name} has frames 1-{self.frame_count}")
+        key = self.state_hash(frame)
+        data = self.cache.get(key)
+        hit = data is not None
+        if not hit:
+            scene = bpy.context.scene
+            scene.frame_set(frame)
+            scene.render.filepath = os.path.join(self.workdir, "frame.png")
+            bpy.ops.render.render(write_still=True)
+            with open(scene.render.filepath, 'rb') as f:
+                data = f.read()
+            self.cache.put(key, data)
+        return data, hit, time.perf_counter() - started
+
+
+PREVIEW_PAGE = """<!doctype html>
+<title>Button animation preview</title>
+<select id="animation"></select> <input id="frame" type="range" min="1" value="1"> <span id="info"></span>
+<div><img id="view" style="background: repeating-conic-gradient(#ccc 0 25%, #fff 0 50%) 0 0 / 16px 16px"></div>
+<script>
+const select = document.getElementById("animation"), slider = document.getElementById("frame");
+const view = document.getElementById("view"), info = document.getElementById("info");
+function show() {
+  view.src = `/frame?animation=${select.value}&frame=${slider.value}&profile=PROFILE`;
+  info.textContent = `frame ${slider.value}/${slider.max}`;
+}
+fetch("/animations").then(r => r.json()).then(animations => {
+  for (const [name, frames] of Object.entries(animations)) select.add(new Option(name, name));
+  const update = () => { slider.max = animations[select.value]; slider.value = 1; show(); };
+  select.onchange = update; slider.oninput = show; update();
+});
+</script>
+"""
+
+
+def serve_previews(port=SERVE_PORT, cache_bytes=SERVE_CACHE_BYTES, profile="preview"):
+    """
+    Serve frames from a warm Blender session over local HTTP until interrupted.
+
+    GET /frame?animation=NAME&frame=N&profile=P returns a PNG (X-Cache says hit or miss),
+    /animations the frame counts, /stats the cache counters and / a scrubbing page.
+    Requests are handled one at a time on Blender's main thread.
+    """
+    session = PreviewSession(cache_bytes)
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def send(self, status, body, content_type, headers=()):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Access-Control-Allow-Origin", "*")
+            for header, value in headers:
+                self.send_header(header, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def send_json(self, status, value):
+            self.send(status, json.dumps(value).encode(), "application/json")
+
+        def do_GET(self):
+            url = urllib.parse.urlparse(self.path)
+            query = dict(urllib.parse.parse_qsl(url.query))
+            if url.path == "/":
+                self.send(200, PREVIEW_PAGE.replace("PROFILE", profile).encode(), "text/html")
+            elif url.path == "/animations":
+                self.send_json(200, {name: spec["frames"] for name, spec in ANIMATIONS.items()})
+            elif url.path == "/stats":
+                self.send_json(200, dict(session.cache.stats(), loaded=session.current))
+            elif url.path == "/frame":
+                name = query.get("animation")
+                frame_profile = query.get("profile", profile)
+                if name not in ANIMATIONS or frame_profile not in RENDER_PROFILES:
+                    self.send_json(404, {"error": f"unknown animation or profile: {name}, {frame_profile}"})
+                    return
+                try:
+                    data, hit, seconds = session.render(name, int(query.get("frame", 1)), frame_profile)
+                except ValueError as e:
+                    self.send_json(400, {"error": str(e)})
+                    return
+                self.send(200, data, "image/png",
+                          [("X-Cache", "hit" if hit else "miss"), ("X-Render-Seconds", f"{seconds:.3f}")])
+            else:
+                self.send_json(404, {"error": f"no route {url.path}"})
+
+        def log_message(self, format, *args):
+            print(f"  {self.address_string()} {format % args}")
+
+    server = http.server.HTTPServer(("127.0.0.1", port), Handler)
+    print(f"Serving previews on http://127.0.0.1:{port}/ ({profile} profile, "
+          f"{cache_bytes // (1024 * 1024)} MB frame cache)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        shutil.rmtree(session.workdir, ignore_errors=True)
+
+
+def parse_args(argv=None):
+    """Parse the script arguments Blender passes through after '--'."""
+    if argv is None:
+        argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+
+    # Specs loaded from files become valid --only choices
+    spec_parser = argparse.ArgumentParser(add_help=False)
+    spec_parser.add_argument("--spec", action="append", default=[])
+    for path in spec_parser.parse_known_args(argv)[0].spec:
+        for spec in load_animation_specs(path):
+            ANIMATIONS[spec["name"]] = spec
+
+    parser = argparse.ArgumentParser(description="Render the premium button animations.")
+    parser.add_argument(
+        "command",
+        nargs="?",
+        choices=("render", "tune", "serve"),
+        default="render",
+        help="What to do (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--only",
+        action="append",
+        choices=list(ANIMATIONS),
+        help="Limit the command to this animation (repeatable)"
+    )
+    parser.add_argument(
+        "--spec",
+        action="append",
+        default=[],
+        metavar="FILE",
+        help="Add the animation specs in a JSON file (one spec or a list; repeatable)"
+    )
+    parser.add_argument(
+        "--profile",
+        choices=sorted(RENDER_PROFILES),
+        default=DEFAULT_RENDER_PROFILE,
+        help="Render profile to use (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--time-limit",
+        type=float,
+        help="Cap Cycles render time per frame, in seconds, for this run"
+    )
+    parser.add_argument(
+        "--tune-frames",
+        type=int,
+        default=TUNING_FRAMES,
+        help="Representative frames rendered per configuration when tuning (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--lottie-precision",
+        type=int,
+        default=LOTTIE_PRECISION,
+        help="Decimal places kept in Lottie output (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--pretty-lottie",
+        action="store_true",
+        help="Write indented, unoptimized Lottie JSON for debugging"
+    )
+    parser.add_argument(
+        "--optimize-lottie-runtime",
+        action="store_true",
+        help="Rewrite masks, gradients and static layers into cheaper equivalents before writing"
+    )
+    parser.add_argument(
+        "--lottie-cost-budget",
+        type=float,
+        default=LOTTIE_COST_BUDGET,
+        help=f"Runtime cost score allowed per Lottie file (default: {LOTTIE_COST_BUDGET})"
+    )
+    parser.add_argument(
+        "--lottie-cost-gate",
+        action="store_true",
+        help="Exit with status 1 when any animation's Lottie is over --lottie-cost-budget"
+    )
+    parser.add_argument(
+        "--bundle-lottie",
+        action="store_true",
+        help="Also write one Lottie file per button family with a marker per interaction"
+    )
+    parser.add_argument(
+        "--synthesize",
+        action="store_true",
+        help="Composite hover/press frames from a few key pose renders instead of rendering each frame"
+    )
+    parser.add_argument(
+        "--half-rate",
+        action="store_true",
+        help="Path-trace every other frame and interpolate the rest from the Vector pass (Cycles)"
+    )
+    parser.add_argument(
+        "--crop-border",
+        action="store_true",
+        help="Render only the region covered by the animated objects on each frame"
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Capture frames in memory from the compositor and feed them to the encoders directly"
+    )
+    parser.add_argument(
+        "--no-png",
+        dest="write_pngs",
+        action="store_false",
+        help="With --stream, skip archiving the PNG sequence"
+    )
+    parser.add_argument(
+        "--theme",
+        action="append",
+        choices=sorted(THEMES),
+        default=[],
+        help="Write recolored frames and Lottie JSON for a theme palette (repeatable, Cycles profiles)"
+    )
+    parser.add_argument(
+        "--easings",
+        action="store_true",
+        help="Write easings.css and easings.json with every easing's CSS and Lottie forms"
+    )
+    parser.add_argument(
+        "--css",
+        action="store_true",
+        help="Compile each Lottie into CSS @keyframes and Web Animations API keyframes"
+    )
+    parser.add_argument(
+        "--css-easing",
+        choices=("cubic-bezier", "linear"),
+        default=CSS_EASING,
+        help="Emit eases as cubic-bezier() or as linear() stop lists"
+    )
+    parser.add_argument(
+        "--dpr",
+        action="append",
+        type=float,
+        metavar="SCALE",
+        help="Device pixel ratio to derive (repeatable, e.g. --dpr 1 --dpr 2 --dpr 3); renders once at the largest"
+    )
+    parser.add_argument(
+        "--sprite-sheet",
+        action="store_true",
+        help="Pack each rendered frame set into a single atlas image with a JSON frame map"
+    )
+    parser.add_argument(
+        "--atlas-format",
+        action="append",
+        choices=ATLAS_FORMATS,
+        help="Compressed atlas format to write alongside the PNG (repeatable, default: all)"
+    )
+    parser.add_argument(
+        "--power-of-two",
+        action="store_true",
+        help="Round atlas dimensions up to powers of two for WebGL textures"
+    )
+    parser.add_argument(
+        "--delta-patches",
+        action="store_true",
+        help="Write only the regions that change between frames, with a compositing manifest"
+    )
+    parser.add_argument(
+        "--optimize-png",
+        action="store_true",
+        help="Recompress frame PNGs with the smallest zlib level/filter/strategy, in parallel"
+    )
+    parser.add_argument(
+        "--png-quantize",
+        action="store_true",
+        help="With --optimize-png, also try a shared 256-color RGBA palette per frame set"
+    )
+    parser.add_argument(
+        "--png-min-ssim",
+        type=float,
+        default=PNG_QUANTIZE_MIN_SSIM,
+        help=f"SSIM a quantized frame must reach to be kept (default: {PNG_QUANTIZE_MIN_SSIM})"
+    )
+    parser.add_argument(
+        "--png-workers",
+        type=int,
+        help="Worker threads for --optimize-png (default: one per core)"
+    )
+    parser.add_argument(
+        "--encode-motion",
+        action="store_true",
+        help="Encode animated AVIF/WebP/APNG versions of each frame set within a byte budget"
+    )
+    parser.add_argument(
+        "--motion-format",
+        action="append",
+        choices=MOTION_FORMATS,
+        help="Animated format to encode (repeatable, default: all)"
+    )
+    parser.add_argument(
+        "--motion-budget",
+        type=int,
+        default=MOTION_BUDGET,
+        help=f"Byte budget per animated image (default: {MOTION_BUDGET})"
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=SERVE_PORT,
+        help="Port for the serve command (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--cache-mb",
+        type=int,
+        default=SERVE_CACHE_BYTES // (1024 * 1024),
+        help="Frame cache size for the serve command, in MB (default: %(default)s)"
+    )
+    parser.add_argument("--min-ssim", type=float, default=TUNING_MIN_SSIM)
+    parser.add_argument("--min-psnr", type=float, default=TUNING_MIN_PSNR)
+    return parser.parse_args(argv)
 
 
 def main():
     """Main function to create all button animations."""
+    args = parse_args()
+    profile_overrides = {"time_limit": args.time_limit} if args.time_limit is not None else None
+
     print("=" * 60)
     print("Premium Button Animations Generator")
     print("=" * 60)
     print(f"Output directory: {OUTPUT_DIR}")
     print(f"Frame rate: {FPS} fps")
+    print(f"Render profile: {args.profile}")
     print()
 
     # Ensure output directory exists
     os.makedirs(OUTPUT_DIR, exist_ok=True)
+    names = args.only or list(ANIMATIONS)
 
-    # Create all animations
-    create_glass_button_hover_animation()
-    print()
+    if args.command == "serve":
+        serve_previews(args.port, args.cache_mb * 1024 * 1024, args.profile)
+        return
 
-    create_glass_button_press_animation()
-    print()
+    if args.command == "tune":
+        for name in names:
+            print(f"Tuning {name} ({args.profile} profile)...")
+            tune_animation(name, args.profile, args.tune_frames, args.min_ssim, args.min_psnr)
+            print()
+        return
 
-    create_cta_button_shine_animation()
-    print()
+    if args.easings:
+        write_easing_tables()
+        print()
 
-    create_icon_morph_animation()
-    print()
+    # Create all animations
+    lotties = {}
+    for name in names:
+        lotties[name], frames = create_animation(
+            name, args.profile, args.lottie_precision, args.pretty_lottie,
+            synthesize=args.synthesize, themes=args.theme, crop_border=args.crop_border,
+            stream=args.stream, write_pngs=args.write_pngs or not args.stream, half_rate=args.half_rate,
+            optimize_runtime=args.optimize_lottie_runtime, render_scale=max(args.dpr) if args.dpr else 1,
+            cost_budget=args.lottie_cost_budget, profile_overrides=profile_overrides,
+        )
+        if args.dpr:
+            write_dpr_ladder(name, args.profile, args.dpr, frames)
+        if args.css:
+            write_css_animation(lotties[name], args.css_easing)
+        if args.sprite_sheet:
+            pack_sprite_sheet(name, args.profile, args.atlas_format or ATLAS_FORMATS, args.power_of_two, frames)
+        if args.delta_patches:
+            write_delta_patches(name, args.profile, frames=frames)
+        if args.encode_motion:
+            encode_motion_formats(name, args.profile, args.motion_format or MOTION_FORMATS, args.motion_budget,
+                                  frames)
+        if args.optimize_png:
+            optimize_frame_pngs(name, args.profile, args.png_quantize, args.png_min_ssim, args.png_workers, frames)
+        print()
+
+    if args.bundle_lottie:
+        write_lottie_bundles(lotties, args.lottie_precision, args.pretty_lottie, args.lottie_cost_budget)
+        print()
+
+    over_budget = [name for name in names
+                   if lottie_runtime_cost(lotties[name], args.lottie_cost_budget)["over_budget"]]
+    if over_budget:
+        print(f"Lottie runtime cost over {args.lottie_cost_budget}: {', '.join(over_budget)}")
+        if args.lottie_cost_gate:
+            sys.exit(1)
+        print()
 
     print("=" * 60)
     print("All animations created successfully!")
     print("=" * 60)
     print()
     print("Output files:")
-    print(f"  - {OUTPUT_DIR}glass-button-hover.json (Lottie)")
-    print(f"  - {OUTPUT_DIR}glass-button-hover_frames/ (PNG sequence)")
-    print(f"  - {OUTPUT_DIR}glass-button-press.json (Lottie)")
-    print(f"  - {OUTPUT_DIR}glass-button-press_frames/ (PNG sequence)")
-    print(f"  - {OUTPUT_DIR}cta-button-shine.json (Lottie)")
-    print(f"  - {OUTPUT_DIR}cta-button-shine_frames/ (PNG sequence)")
-    print(f"  - {OUTPUT_DIR}icon-morph.json (Lottie)")
-    print(f"  - {OUTPUT_DIR}icon-morph_frames/ (PNG sequence)")
+    for name in names:
+        print(f"  - {OUTPUT_DIR}{name}.json (Lottie)")
+        print(f"  - {frames_dir_for(name, args.profile)}/ (PNG sequence)")
     print()
     print("To run:")
     print("  /Applications/Blender.app/Contents/MacOS/Blender --background --python create-button-animations.py")
+    print("  /Applications/Blender.app/Contents/MacOS/Blender --background --python create-button-animations.py -- --profile preview")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Dry Run: Generators Without Blender
+===================================
+Runs generate-pen-models.py or create-button-animations.py in plain Python against
+the recording bpy stand-in in bpy-stand-in/, then writes the plan of what Blender
+would have done: every operator call, plus each render and export with the objects,
+materials and keyframes in the scene at that moment. Lottie JSON, CSS and the other
+outputs that don't need rendered pixels are written for real.
+
+Run with:
+    python3 dry-run.py generate-pen-models.py
+    python3 dry-run.py create-button-animations.py --output /tmp/dry-run -- --only icon-morph --css
+
+Arguments after "--" are passed to the script. Outputs go to --output (a new
+temporary directory by default) and the plan to --plan (default: dry-run-plan.json
+in the output directory), listing the files written under "files". Renders write
+blank placeholder frames and passes at the configured resolution, so every render
+path (--crop-border, --stream, --half-rate, --synthesize, --theme, --dpr and the
+stages that read frames back) and the tune command run end to end; tuned profile
+overrides are read from and written to the output directory. The serve command
+runs too, and like the real one it serves until interrupted.
+
+Tests can skip the command line: put bpy-stand-in/ first on sys.path, import bpy,
+load a script with load_script(), call its functions and assert against
+bpy.plan(), with bpy.reset() between tests.
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+STAND_IN_DIR = os.path.join(SCRIPT_DIR, "bpy-stand-in")
+SCRIPTS = ("generate-pen-models.py", "create-button-animations.py")
+
+
+def load_script(filename, module_name):
+    """Import one of the generator scripts as a module, without running its main()."""
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(SCRIPT_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def written_files(output_dir, exclude):
+    """Files under the output directory, relative to it."""
+    return sorted(
+        os.path.relpath(os.path.join(root, name), output_dir)
+        for root, _, names in os.walk(output_dir) for name in names
+        if os.path.join(root, name) != exclude
+    )
+
+
+def main():
+    """Run a generator's main() against the stand-in and write its plan."""
+    argv = sys.argv[1:]
+    script_args = argv[argv.index("--") + 1:] if "--" in argv else []
+    argv = argv[:argv.index("--")] if "--" in argv else argv
+    parser = argparse.ArgumentParser(description="Run a Blender generator script without Blender and record its plan.")
+    parser.add_argument("script", choices=SCRIPTS, help="Generator to run")
+    parser.add_argument("--output", help="Directory for the script's outputs (default: a new temporary directory)")
+    parser.add_argument("--plan", help="Where to write the plan JSON (default: dry-run-plan.json in the output directory)")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, STAND_IN_DIR)
+    import bpy
+
+    output_dir = os.path.abspath(args.output or tempfile.mkdtemp(prefix="dry-run-"))
+    os.makedirs(output_dir, exist_ok=True)
+    plan_path = os.path.abspath(args.plan or os.path.join(output_dir, "dry-run-plan.json"))
+    module = load_script(args.script, os.path.splitext(args.script)[0].replace("-", "_"))
+    module.OUTPUT_DIR = os.path.join(output_dir, "")
+    if hasattr(module, "TUNED_PROFILES_PATH"):
+        # tune writes its overrides into the output directory, starting from the real ones
+        tuned_path = os.path.join(output_dir, os.path.basename(module.TUNED_PROFILES_PATH))
+        if os.path.exists(module.TUNED_PROFILES_PATH) and not os.path.exists(tuned_path):
+            shutil.copyfile(module.TUNED_PROFILES_PATH, tuned_path)
+        module.TUNED_PROFILES_PATH = tuned_path
+    sys.argv = [args.script, "--", *script_args]
+
+    started = time.perf_counter()
+    try:
+        module.main()
+    finally:
+        # Written even when the script exits early, e.g. on the Lottie cost gate
+        plan = bpy.plan()
+        plan["files"] = written_files(output_dir, plan_path)
+        with open(plan_path, 'w') as f:
+            json.dump(plan, f, indent=1)
+        print(f"\nDry run: {len(plan['operations'])} operator calls and {len(plan['outputs'])} outputs recorded, "
+              f"{len(plan['files'])} files written in {time.perf_counter() - started:.2f}s")
+        print(f"Plan: {plan_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,8 @@ Blender Python Script: Generate Realistic Pen 3D Models
 This script generates stylus and fountain pen 3D models for use in Three.js.
 
 Run with: blender --background --python generate-pen-models.py
+Profile with: BLENDER_TRACE=trace.json blender --background --python generate-pen-models.py
+(bpy.ops calls and pipeline stages, see pipeline_trace.py)
 
 Output:
 - /Users/zacharydemillo/Desktop/WEBSITE PROJECT/public/models/pen-stylus.glb
@@ -14,13 +16,18 @@ import bpy
 import bmesh
 import math
 import os
+import sys
 
 # Output directory
 OUTPUT_DIR = "/Users/zacharydemillo/Desktop/WEBSITE PROJECT/public/models"
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from pipeline_trace import traced  # noqa: E402  (BLENDER_TRACE profiling)
 
+
+@traced
 def clear_scene():
-    """Remove all objects from the scene."""
+    """Remove all objects from the scene, then every datablock nothing uses any more."""
     bpy.ops.object.select_all(action='SELECT')
     bpy.ops.object.delete(use_global=False)
 
@@ -32,7 +39,11 @@ def clear_scene():
     for mesh in bpy.data.meshes:
         bpy.data.meshes.remove(mesh)
 
+    # Curves, lights, cameras, node groups and images left without users
+    bpy.data.orphans_purge(do_local_ids=True, do_linked_ids=True, do_recursive=True)
+
 
+@traced
 def create_chrome_material(name="Chrome"):
     """Create a metallic chrome material."""
     mat = bpy.data.materials.new(name=name)
@@ -60,6 +71,7 @@ def create_chrome_material(name="Chrome"):
     return mat
 
 
+@traced
 def create_barrel_material(name="Barrel", color=(0.1, 0.1, 0.12, 1.0)):
     """Create a matte soft-touch barrel material."""
     mat = bpy.data.materials.new(name=name)
@@ -87,6 +99,7 @@ def create_barrel_material(name="Barrel", color=(0.1, 0.1, 0.12, 1.0)):
     return mat
 
 
+@traced
 def create_rubber_material(name="Rubber"):
     """Create a rubber material for stylus tip."""
     mat = bpy.data.materials.new(name=name)
@@ -114,6 +127,7 @@ def create_rubber_material(name="Rubber"):
     return mat
 
 
+@traced
 def create_gold_material(name="Gold"):
     """Create a gold material for fountain pen accents."""
     mat = bpy.data.materials.new(name=name)
@@ -141,6 +155,7 @@ def create_gold_material(name="Gold"):
     return mat
 
 
+@traced
 def create_nib_material(name="Nib"):
     """Create a polished gold material for fountain pen nib."""
     mat = bpy.data.materials.new(name=name)
@@ -222,6 +237,7 @@ def create_torus_mesh(name, major_radius, minor_radius, location, major_segments
     return obj
 
 
+@traced
 def smooth_object(obj):
     """Apply smooth shading to an object."""
     bpy.context.view_layer.objects.active = obj
@@ -238,6 +254,7 @@ def apply_material(obj, material):
         obj.data.materials.append(material)
 
 
+@traced
 def create_pocket_clip(chrome_mat, start_z, clip_length=0.08, barrel_radius=0.008):
     """Create a pocket clip for the pen."""
     clip_parts = []
@@ -281,7 +298,9 @@ def create_pocket_clip(chrome_mat, start_z, clip_length=0.08, barrel_radius=0.00
     curve.data.bevel_mode = 'OBJECT'
     curve.data.bevel_object = profile
 
-    # Convert to mesh
+    # Convert to mesh, with only the clip curve selected so the profile stays a curve
+    curve_data = curve.data
+    bpy.ops.object.select_all(action='DESELECT')
     bpy.context.view_layer.objects.active = curve
     curve.select_set(True)
     bpy.ops.object.convert(target='MESH')
@@ -292,8 +311,12 @@ def create_pocket_clip(chrome_mat, start_z, clip_length=0.08, barrel_radius=0.00
     apply_material(clip_mesh, chrome_mat)
     smooth_object(clip_mesh)
 
-    # Delete profile curve
+    # Delete profile curve, and the curve data the conversion left without users
+    profile_data = profile.data
     bpy.data.objects.remove(profile, do_unlink=True)
+    for data in (curve_data, profile_data):
+        if data.users == 0:
+            bpy.data.curves.remove(data)
 
     # Create clip attachment ring
     ring = create_torus_mesh(
@@ -317,6 +340,7 @@ def create_pocket_clip(chrome_mat, start_z, clip_length=0.08, barrel_radius=0.00
     return [clip_mesh, ring, tip_ball]
 
 
+@traced
 def create_stylus_pen():
     """Create a complete stylus pen model."""
     clear_scene()
@@ -495,6 +519,7 @@ def create_stylus_pen():
     return pen
 
 
+@traced
 def create_fountain_pen():
     """Create a complete fountain pen model."""
     clear_scene()
@@ -694,6 +719,7 @@ def create_fountain_pen():
     return pen
 
 
+@traced
 def export_to_glb(filepath):
     """Export the current scene to GLB format."""
     # Ensure the directory exists
@@ -712,6 +738,29 @@ def export_to_glb(filepath):
     print(f"Exported: {filepath}")
 
 
+# Pen name -> (builder, output file name)
+PENS = {
+    "stylus": (create_stylus_pen, "pen-stylus.glb"),
+    "fountain": (create_fountain_pen, "pen-fountain.glb"),
+}
+
+
+@traced
+def generate_pen(name, output_dir=None, export=True):
+    """
+    Build a pen model and, unless export is False, export it as GLB into output_dir
+    (OUTPUT_DIR by default). Returns the GLB path.
+    """
+    builder, filename = PENS[name]
+    builder()
+    path = os.path.join(output_dir or OUTPUT_DIR, filename)
+    if export:
+        # Select the pen for export
+        bpy.ops.object.select_all(action='SELECT')
+        export_to_glb(path)
+    return path
+
+
 def main():
     """Main function to generate all pen models."""
     print("=" * 50)
@@ -720,22 +769,12 @@ def main():
 
     # Generate and export stylus pen
     print("\n[1/2] Creating Stylus Pen...")
-    create_stylus_pen()
-    stylus_path = os.path.join(OUTPUT_DIR, "pen-stylus.glb")
-
-    # Select the pen for export
-    bpy.ops.object.select_all(action='SELECT')
-    export_to_glb(stylus_path)
+    stylus_path = generate_pen("stylus")
     print(f"Stylus pen exported to: {stylus_path}")
 
     # Generate and export fountain pen
     print("\n[2/2] Creating Fountain Pen...")
-    create_fountain_pen()
-    fountain_path = os.path.join(OUTPUT_DIR, "pen-fountain.glb")
-
-    # Select the pen for export
-    bpy.ops.object.select_all(action='SELECT')
-    export_to_glb(fountain_path)
+    fountain_path = generate_pen("fountain")
     print(f"Fountain pen exported to: {fountain_path}")
 
     print("\n" + "=" * 50)
@@ -0,0 +1,103 @@
+"""
+Pipeline Tracing for the Blender Scripts
+========================================
+Shared by generate-pen-models.py, create-button-animations.py and, through them,
+blender-worker.py. With BLENDER_TRACE set to a file path, every bpy.ops call and
+every pipeline stage marked with @traced is timed; at exit the events are written
+there as a Chrome/Perfetto trace (open it in ui.perfetto.dev or chrome://tracing)
+and the most expensive entries are printed. With BLENDER_TRACE unset nothing is
+wrapped and @traced returns functions untouched.
+
+The scripts import it from their own directory:
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from pipeline_trace import TRACER, traced
+"""
+
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+
+import bpy
+
+# Entries printed in the summary at exit
+TRACE_SUMMARY_TOP = 15
+
+
+class PipelineTracer:
+    """Collect pipeline stages and bpy.ops calls as Chrome trace events, written at exit."""
+
+    def __init__(self, path):
+        self.path = path
+        self.events = []
+        self.origin = time.perf_counter_ns()
+        atexit.register(self.write)
+
+    def record(self, name, category, start, args=None):
+        """Record a complete event that started at a perf_counter_ns() reading and ends now."""
+        end = time.perf_counter_ns()
+        self.events.append({
+            "name": name, "cat": category, "ph": "X",
+            "ts": (start - self.origin) / 1000, "dur": (end - start) / 1000,  # Microseconds
+            "pid": os.getpid(), "tid": threading.get_ident(), "args": args or {},
+        })
+
+    def summary(self, top=TRACE_SUMMARY_TOP):
+        """The top events by total time: (category, name, calls, total ms)."""
+        totals = {}
+        for event in self.events:
+            entry = totals.setdefault((event["cat"], event["name"]), [0, 0.0])
+            entry[0] += 1
+            entry[1] += event["dur"] / 1000
+        ranked = sorted(totals.items(), key=lambda item: item[1][1], reverse=True)
+        return [(category, name, calls, total) for (category, name), (calls, total) in ranked[:top]]
+
+    def write(self):
+        """Write the Chrome/Perfetto trace JSON and print the top-N summary."""
+        with open(self.path, 'w') as f:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, f)
+        print(f"Trace: {len(self.events)} events written to {self.path}")
+        for category, name, calls, total in self.summary():
+            print(f"  {total:10.1f} ms {calls:6d}x  {category:8s} {name}")
+
+
+def install_tracer(path):
+    """Trace every bpy.ops call by wrapping the operator call class."""
+    tracer = PipelineTracer(path)
+    operator_type = type(bpy.ops.object.select_all)
+    call = operator_type.__call__
+
+    def traced_call(self, *args, **kwargs):
+        start = time.perf_counter_ns()
+        try:
+            return call(self, *args, **kwargs)
+        finally:
+            active = getattr(bpy.context, "active_object", None)
+            context = {"mode": bpy.context.mode, "active": active.name if active else None}
+            context.update((key, repr(value)[:80]) for key, value in kwargs.items())
+            tracer.record(self.idname_py(), "bpy.ops", start, context)
+
+    operator_type.__call__ = traced_call
+    return tracer
+
+
+# Tracing is on when BLENDER_TRACE names the trace file to write. Both scripts import
+# this module, so they share one tracer.
+TRACER = install_tracer(os.environ["BLENDER_TRACE"]) if os.environ.get("BLENDER_TRACE") else None
+
+
+def traced(func):
+    """Record a pipeline stage's calls when tracing is on; with it off, func is returned untouched."""
+    if TRACER is None:
+        return func
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter_ns()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            TRACER.record(func.__name__, "stage", start)
+    return wrapper